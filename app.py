@@ -4,13 +4,29 @@ Complete Hackathon-Ready Streamlit Application
 """
 
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import qrcode
 from io import BytesIO
+from datetime import datetime, timedelta
+from contextlib import contextmanager, nullcontext
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import base64
-from datetime import datetime
+import functools
+import hashlib
+import heapq
+import hmac
+import io
 import json
+import math
+import multiprocessing
+import os
+import queue
+import secrets
+import sqlite3
+import threading
+import time
+
+# pandas, matplotlib and qrcode/PIL are imported inside the functions that
+# need them, so the login page and user home never pay for loading them.
 
 # ============================================
 # PAGE CONFIGURATION
@@ -25,7 +41,7 @@ st.set_page_config(
 # ============================================
 # CUSTOM CSS STYLING
 # ============================================
-st.markdown("""
+CUSTOM_CSS = """
 <style>
     /* Main Background */
     .main {
@@ -197,254 +213,2881 @@ st.markdown("""
         box-shadow: 0 3px 10px rgba(0,0,0,0.08);
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+def inject_css():
+    """Apply the custom theme"""
+    st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
 
 # ============================================
-# SESSION STATE INITIALIZATION
+# PROFILING
 # ============================================
-def init_session_state():
-    """Initialize all session state variables"""
+PROFILE_ENABLED = os.environ.get("URAMIX_PROFILE", "0") not in ("", "0")
+PROFILE_LOG_PATH = os.environ.get("URAMIX_PROFILE_LOG", "uramix_profile.jsonl")
+PROFILE_HISTORY = 1000
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+class RerunProfiler:
+    """Ring buffer of recent rerun timings, mirrored to a JSON-lines log"""
     
-    # User Database
-    if 'users' not in st.session_state:
-        st.session_state.users = {}
+    def __init__(self, history, log_path):
+        self.reruns = deque(maxlen=history)
+        self._lock = threading.Lock()
+        self._log = open(log_path, "a", buffering=1, encoding="utf-8") if log_path else None
     
-    # Authentication
-    if 'logged_in' not in st.session_state:
-        st.session_state.logged_in = False
-    if 'current_user' not in st.session_state:
-        st.session_state.current_user = None
-    if 'is_admin' not in st.session_state:
-        st.session_state.is_admin = False
+    def record(self, rerun):
+        """Store one finished rerun"""
+        line = json.dumps(rerun)
+        with self._lock:
+            self.reruns.append(rerun)
+            if self._log:
+                self._log.write(line + "\n")
+    
+    def section_stats(self):
+        """{section: {count, p50, p95, p99, max}} in milliseconds"""
+        with self._lock:
+            reruns = list(self.reruns)
+        
+        samples = {}
+        for rerun in reruns:
+            samples.setdefault('total', []).append(rerun['total_ms'])
+            for name, ms in rerun['sections'].items():
+                samples.setdefault(name, []).append(ms)
+        
+        stats = {}
+        for name, values in samples.items():
+            values.sort()
+            stats[name] = {
+                'count': len(values),
+                'p50': percentile(values, 50),
+                'p95': percentile(values, 95),
+                'p99': percentile(values, 99),
+                'max': values[-1]
+            }
+        return stats
+    
+    def slowest(self, n=10):
+        """The n slowest reruns in the buffer"""
+        with self._lock:
+            return heapq.nlargest(n, self.reruns, key=lambda rerun: rerun['total_ms'])
+
+@st.cache_resource
+def get_profiler():
+    """Rerun timings shared by every session"""
+    return RerunProfiler(PROFILE_HISTORY, PROFILE_LOG_PATH)
+
+# Sections of the rerun running on this thread (each script run has its own thread)
+profile_state = threading.local()
+
+def profiled_fragment(func):
+    """Profile a fragment's own reruns, which never pass through main()"""
+    name = f"fragment:{func.__name__}"
+    
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with profile_rerun(name):
+            return func(*args, **kwargs)
+    return wrapper
+
+class ProfileSection:
+    """Adds the time spent in a `with` block to the current rerun"""
+    __slots__ = ('name', 'start')
+    
+    def __init__(self, name):
+        self.name = name
     
-    # Waste Submissions (Global)
-    if 'waste_submissions' not in st.session_state:
-        st.session_state.waste_submissions = []
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
     
-    # QR Codes Database
-    if 'qr_codes' not in st.session_state:
-        st.session_state.qr_codes = {}
+    def __exit__(self, *exc):
+        sections = getattr(profile_state, 'sections', None)
+        if sections is not None:
+            elapsed = (time.perf_counter() - self.start) * 1000
+            sections[self.name] = sections.get(self.name, 0.0) + elapsed
+
+NO_PROFILE = nullcontext()
+
+def profile_section(name):
+    """Time a named section of the rerun; a shared no-op when profiling is off"""
+    return ProfileSection(name) if PROFILE_ENABLED else NO_PROFILE
+
+@contextmanager
+def profile_rerun(page=None):
+    """Collect section timings for one script or fragment run and record them"""
+    if not PROFILE_ENABLED:
+        yield {}
+        return
     
-    # System Metrics
-    if 'total_credits_issued' not in st.session_state:
-        st.session_state.total_credits_issued = 0
-    if 'daily_waste' not in st.session_state:
-        st.session_state.daily_waste = {}
+    # A fragment running inside a full rerun is just another section of it
+    if getattr(profile_state, 'sections', None) is not None:
+        with ProfileSection(page):
+            yield {}
+        return
+    
+    rerun = {'ts': datetime.now().isoformat(timespec='seconds'), 'page': page, 'sections': {}}
+    profile_state.sections = rerun['sections']
+    start = time.perf_counter()
     
-    # Manure Management
-    if 'manure_stock' not in st.session_state:
-        st.session_state.manure_stock = 500.0
-    if 'manure_price' not in st.session_state:
-        st.session_state.manure_price = 25
-    if 'manure_sales' not in st.session_state:
-        st.session_state.manure_sales = []
+    try:
+        yield rerun
+    finally:
+        rerun['total_ms'] = (time.perf_counter() - start) * 1000
+        profile_state.sections = None
+        get_profiler().record(rerun)
 
 # ============================================
-# AUTHENTICATION FUNCTIONS
+# PERSISTENT STORE (SQLite)
 # ============================================
-def create_new_user(email, password):
-    """Create a new user account"""
-    st.session_state.users[email] = {
-        'password': password,
-        'credits': 0,
-        'organic_bin': 0,
-        'inorganic_bin': 0,
-        'waste_history': [],
-        'manure_purchased': 0.0,
-        'referral_used': False,
-        'co2_reduced': 0.0,
-        'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    }
+DB_PATH = os.environ.get("URAMIX_DB_PATH", "uramix.db")
+DB_POOL_SIZE = 8
+# The WAL is the write journal and checkpoints fold it into the main file: keep it
+# short so a restart after an unclean shutdown has little to recover
+WAL_AUTOCHECKPOINT_PAGES = 1000
+JOURNAL_SIZE_LIMIT = 16 * 1024 * 1024
+WAL_TRUNCATE_BYTES = 64 * 1024 * 1024
+QUEUE_PAGE_SIZES = [10, 25, 50]
+HISTORY_PAGE_SIZES = [10, 25, 50]
+SALES_PAGE_SIZES = [25, 50, 100]
+USERS_PAGE_SIZES = [25, 50, 100]
 
-def signup_user(email, password):
-    """User signup"""
-    if not email or not password:
-        return False, "❌ Please fill all fields!"
+# Admin Users table sort options -> users column (each has an index in migration 7)
+USER_SORTS = {
+    "Email": "email",
+    "Credits": "credits",
+    "Submissions": "history_count",
+    "Manure (kg)": "manure_purchased",
+    "CO₂ (%)": "co2_reduced"
+}
+SQL_IN_CHUNK = 500
+
+# Categories behind the integer waste_history.type / .status codes (append only)
+WASTE_TYPES = ["Organic Waste", "Inorganic Waste"]
+HISTORY_STATUSES = ["Verified ✅"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    email TEXT PRIMARY KEY,
+    password TEXT NOT NULL,
+    credits INTEGER NOT NULL DEFAULT 0,
+    organic_bin INTEGER NOT NULL DEFAULT 0,
+    inorganic_bin INTEGER NOT NULL DEFAULT 0,
+    manure_purchased REAL NOT NULL DEFAULT 0,
+    referral_used INTEGER NOT NULL DEFAULT 0,
+    co2_reduced REAL NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS waste_history (
+    id INTEGER PRIMARY KEY,
+    user TEXT NOT NULL,
+    date TEXT NOT NULL,
+    type TEXT NOT NULL,
+    quantity REAL NOT NULL,
+    credits INTEGER NOT NULL,
+    status TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_waste_history_user ON waste_history(user, id);
+
+CREATE TABLE IF NOT EXISTS waste_submissions (
+    id TEXT PRIMARY KEY,
+    user TEXT NOT NULL,
+    waste_type TEXT NOT NULL,
+    status TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    credits INTEGER NOT NULL DEFAULT 0,
+    quantity REAL NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS qr_codes (
+    code TEXT PRIMARY KEY,
+    submission_id TEXT NOT NULL,
+    user TEXT NOT NULL,
+    waste_type TEXT NOT NULL,
+    credits INTEGER NOT NULL,
+    co2_reduction REAL NOT NULL,
+    quantity REAL NOT NULL,
+    scanned INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS daily_waste (
+    date TEXT PRIMARY KEY,
+    quantity REAL NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS manure_sales (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    user TEXT NOT NULL,
+    quantity REAL NOT NULL,
+    amount REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value
+);
+INSERT OR IGNORE INTO settings (key, value) VALUES
+    ('manure_stock', 500.0),
+    ('manure_price', 25);
+"""
+
+# Schema changes on top of SCHEMA, applied in order and tracked in PRAGMA user_version
+MIGRATIONS = [
+    # 1: submission index by status and by user, O(1) status counts
+    """
+    CREATE INDEX IF NOT EXISTS idx_submissions_status ON waste_submissions(status, timestamp, id);
+    CREATE INDEX IF NOT EXISTS idx_submissions_user_status ON waste_submissions(user, status, timestamp, id);
     
-    if email.lower() == "admin":
-        return False, "❌ Cannot use 'admin' as email!"
+    CREATE TABLE IF NOT EXISTS submission_counts (
+        status TEXT PRIMARY KEY,
+        n INTEGER NOT NULL DEFAULT 0
+    );
+    INSERT OR REPLACE INTO submission_counts (status, n)
+        SELECT status, COUNT(*) FROM waste_submissions GROUP BY status;
+    """,
+    # 2: pending queue filtered by waste type
+    """
+    CREATE INDEX IF NOT EXISTS idx_submissions_status_type
+        ON waste_submissions(status, waste_type, timestamp, id);
+    """,
+    # 3: running platform totals
+    """
+    CREATE TABLE IF NOT EXISTS aggregates (
+        key TEXT PRIMARY KEY,
+        value NOT NULL DEFAULT 0
+    );
+    INSERT OR REPLACE INTO aggregates (key, value) VALUES
+        ('users', (SELECT COUNT(*) FROM users)),
+        ('credit_balance', (SELECT COALESCE(SUM(credits), 0) FROM users)),
+        ('co2_reduced', (SELECT COALESCE(SUM(co2_reduced), 0.0) FROM users)),
+        ('credits_issued', COALESCE((SELECT value FROM settings WHERE key = 'total_credits_issued'), 0)),
+        ('waste_kg', (SELECT COALESCE(SUM(quantity), 0.0) FROM daily_waste)),
+        ('manure_sold_kg', (SELECT COALESCE(SUM(quantity), 0.0) FROM manure_sales)),
+        ('manure_revenue', (SELECT COALESCE(SUM(amount), 0.0) FROM manure_sales)),
+        ('manure_orders', (SELECT COUNT(*) FROM manure_sales));
+    DELETE FROM settings WHERE key = 'total_credits_issued';
+    """,
+    # 4: data versions for cached analytics charts
+    """
+    INSERT OR IGNORE INTO aggregates (key, value) VALUES
+        ('daily_waste_version', (SELECT COUNT(*) FROM daily_waste)),
+        ('manure_sales_version', (SELECT COUNT(*) FROM manure_sales));
+    """,
+    # 5: waste_history type/status as category codes, per-user history counts
+    """
+    CREATE TABLE waste_history_coded (
+        id INTEGER PRIMARY KEY,
+        user TEXT NOT NULL,
+        date TEXT NOT NULL,
+        type INTEGER NOT NULL,
+        quantity REAL NOT NULL,
+        credits INTEGER NOT NULL,
+        status INTEGER NOT NULL
+    );
+    INSERT INTO waste_history_coded (id, user, date, type, quantity, credits, status)
+        SELECT id, user, date, type != 'Organic Waste', quantity, credits, 0 FROM waste_history;
+    DROP TABLE waste_history;
+    ALTER TABLE waste_history_coded RENAME TO waste_history;
+    CREATE INDEX idx_waste_history_user ON waste_history(user, id);
     
-    if email in st.session_state.users:
-        return False, "❌ Email already registered!"
+    ALTER TABLE users ADD COLUMN history_count INTEGER NOT NULL DEFAULT 0;
+    UPDATE users SET history_count = (SELECT COUNT(*) FROM waste_history h WHERE h.user = users.email);
+    """,
+    # 6: per-day manure sales rollups
+    """
+    CREATE TABLE IF NOT EXISTS manure_daily (
+        date TEXT PRIMARY KEY,
+        kg REAL NOT NULL DEFAULT 0,
+        revenue REAL NOT NULL DEFAULT 0,
+        orders INTEGER NOT NULL DEFAULT 0,
+        buyers INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE TABLE IF NOT EXISTS manure_daily_buyers (
+        date TEXT NOT NULL,
+        user TEXT NOT NULL,
+        PRIMARY KEY (date, user)
+    ) WITHOUT ROWID;
     
-    if len(password) < 6:
-        return False, "❌ Password must be at least 6 characters!"
+    INSERT OR REPLACE INTO manure_daily (date, kg, revenue, orders, buyers)
+        SELECT date, SUM(quantity), SUM(amount), COUNT(*), COUNT(DISTINCT user) FROM manure_sales GROUP BY date;
+    INSERT OR IGNORE INTO manure_daily_buyers (date, user)
+        SELECT DISTINCT date, user FROM manure_sales;
+    """,
+    # 7: sort orders for the admin Users table (email order comes from the primary key)
+    """
+    CREATE INDEX IF NOT EXISTS idx_users_credits ON users(credits, email);
+    CREATE INDEX IF NOT EXISTS idx_users_history ON users(history_count, email);
+    CREATE INDEX IF NOT EXISTS idx_users_manure ON users(manure_purchased, email);
+    CREATE INDEX IF NOT EXISTS idx_users_co2 ON users(co2_reduced, email);
+    """,
+    # 8: key for signing QR tokens, generated once per database
+    """
+    INSERT OR IGNORE INTO settings (key, value) VALUES ('qr_secret', lower(hex(randomblob(32))));
+    """,
+    # 9: hourly waste buckets per type (bucket = hours since 1970-01-01, local time)
+    """
+    CREATE TABLE IF NOT EXISTS waste_series (
+        type INTEGER NOT NULL,
+        bucket INTEGER NOT NULL,
+        quantity REAL NOT NULL DEFAULT 0,
+        credits INTEGER NOT NULL DEFAULT 0,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (type, bucket)
+    ) WITHOUT ROWID;
     
-    create_new_user(email, password)
-    return True, "✅ Account created successfully! Please login."
+    INSERT OR REPLACE INTO waste_series (type, bucket, quantity, credits, count)
+        SELECT type, CAST(strftime('%s', date) AS INTEGER) / 3600, SUM(quantity), SUM(credits), COUNT(*)
+        FROM waste_history GROUP BY type, date;
+    """,
+    # 10: versioned credit rates per waste type (version 1 = the original fixed rates)
+    """
+    CREATE TABLE IF NOT EXISTS credit_rates (
+        version INTEGER NOT NULL,
+        type INTEGER NOT NULL,
+        base_credits INTEGER NOT NULL,
+        bonus_per_kg REAL NOT NULL,
+        bonus_cap INTEGER NOT NULL,
+        co2_reduction REAL NOT NULL,
+        created_at TEXT NOT NULL,
+        PRIMARY KEY (version, type)
+    ) WITHOUT ROWID;
+    
+    INSERT OR IGNORE INTO credit_rates VALUES
+        (1, 0, 60, 1.5, 15, 0.8, '2024-01-01 00:00:00'),
+        (1, 1, 35, 1.5, 15, 0.4, '2024-01-01 00:00:00');
+    """,
+    # 11: background jobs, one per (kind, key); run_at is when a queued job is due,
+    # when a running job's lease expires, or when a finished job finished (unix time)
+    """
+    CREATE TABLE IF NOT EXISTS jobs (
+        id INTEGER PRIMARY KEY,
+        kind TEXT NOT NULL,
+        key TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'queued',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        run_at REAL NOT NULL,
+        result TEXT,
+        error TEXT,
+        created_at TEXT NOT NULL,
+        UNIQUE (kind, key)
+    );
+    CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, run_at);
+    """,
+    # 12: bumped when past waste_series buckets change, so cached series reload in full
+    """
+    INSERT OR IGNORE INTO aggregates (key, value) VALUES ('waste_series_backfills', 0);
+    """,
+    # 13: node numbers handed out to processes minting submission IDs
+    """
+    INSERT OR IGNORE INTO settings (key, value) VALUES ('id_nodes_claimed', 0);
+    """,
+]
 
-def login_user(email, password):
-    """User/Admin login"""
-    if not email or not password:
-        return False, "❌ Please fill all fields!"
+# How each running total is derived from source data (for check_aggregates)
+AGGREGATE_SOURCES = {
+    'users': "SELECT COUNT(*) FROM users",
+    'credit_balance': "SELECT COALESCE(SUM(credits), 0) FROM users",
+    'co2_reduced': "SELECT COALESCE(SUM(co2_reduced), 0.0) FROM users",
+    'credits_issued': "SELECT COALESCE(SUM(credits), 0) FROM qr_codes WHERE scanned = 1",
+    'waste_kg': "SELECT COALESCE(SUM(quantity), 0.0) FROM daily_waste",
+    'manure_sold_kg': "SELECT COALESCE(SUM(quantity), 0.0) FROM manure_sales",
+    'manure_revenue': "SELECT COALESCE(SUM(amount), 0.0) FROM manure_sales",
+    'manure_orders': "SELECT COUNT(*) FROM manure_sales",
+}
+
+class Database:
+    """Pool of SQLite connections shared by every session"""
     
-    # Admin Login
-    if email.lower() == "admin" and password == "12345":
-        st.session_state.logged_in = True
-        st.session_state.is_admin = True
-        st.session_state.current_user = "admin"
-        return True, "✅ Admin login successful!"
+    def __init__(self, path, pool_size=DB_POOL_SIZE):
+        self.path = path
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        for _ in range(pool_size):
+            self._pool.put(None)
+        # SQLite admits one writer at a time; in-process writers queue here instead of
+        # sleeping in the busy handler's backoff. Reads never take it.
+        self._write_lock = threading.Lock()
+        self.last_checkpoint = None
+        
+        # Opening recovers whatever WAL a previous process left behind
+        start = time.perf_counter()
+        with self.connection() as conn:
+            conn.executescript(SCHEMA)
+            self._migrate(conn)
+        self.open_ms = (time.perf_counter() - start) * 1000
     
-    # User Login
-    if email in st.session_state.users:
-        if st.session_state.users[email]['password'] == password:
-            st.session_state.logged_in = True
-            st.session_state.is_admin = False
-            st.session_state.current_user = email
-            return True, "✅ Login successful!"
-        return False, "❌ Incorrect password!"
+    def _migrate(self, conn):
+        """Apply pending MIGRATIONS"""
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        
+        for number, script in enumerate(MIGRATIONS[version:], start=version + 1):
+            conn.executescript(f"BEGIN IMMEDIATE; {script}; PRAGMA user_version = {number}; COMMIT;")
     
-    return False, "❌ User not found! Please signup."
+    def _connect(self):
+        """Open a connection in WAL mode"""
+        conn = sqlite3.connect(
+            self.path,
+            timeout=30,
+            isolation_level=None,
+            check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA wal_autocheckpoint={WAL_AUTOCHECKPOINT_PAGES}")
+        conn.execute(f"PRAGMA journal_size_limit={JOURNAL_SIZE_LIMIT}")
+        return conn
+    
+    def checkpoint(self, conn=None):
+        """Copy the WAL into the database file and truncate it"""
+        start = time.perf_counter()
+        with nullcontext(conn) if conn else self.connection() as conn:
+            # Give up rather than wait if a reader still needs the WAL; the next attempt retries
+            conn.execute("PRAGMA busy_timeout = 0")
+            try:
+                busy = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()[0]
+            finally:
+                conn.execute("PRAGMA busy_timeout = 30000")
+        self.last_checkpoint = {
+            'at': datetime.now().isoformat(timespec='seconds'),
+            'ms': (time.perf_counter() - start) * 1000,
+            'complete': not busy
+        }
+        return self.last_checkpoint
+    
+    def storage_stats(self):
+        """Database and WAL file sizes plus open and checkpoint timings"""
+        def size(path):
+            return os.path.getsize(path) if os.path.exists(path) else 0
+        
+        return {
+            'db_bytes': size(self.path),
+            'wal_bytes': size(self.path + "-wal"),
+            'open_ms': self.open_ms,
+            'last_checkpoint': self.last_checkpoint
+        }
+    
+    @contextmanager
+    def connection(self):
+        """Borrow a connection from the pool"""
+        conn = self._pool.get()
+        if conn is None:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+    
+    @contextmanager
+    def transaction(self):
+        """Run a block of writes atomically"""
+        with self._write_lock, self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            
+            # Automatic checkpoints are passive: if readers never pause, the WAL is never
+            # restarted and grows without bound, so try to truncate it past a size limit
+            if WAL_TRUNCATE_BYTES and os.path.getsize(self.path + "-wal") > WAL_TRUNCATE_BYTES:
+                self.checkpoint(conn)
 
-def logout():
-    """Logout current user"""
-    st.session_state.logged_in = False
-    st.session_state.is_admin = False
-    st.session_state.current_user = None
+@st.cache_resource
+def open_database(path):
+    """Shared database handle (one per file per server process)"""
+    return Database(path)
+
+def get_db():
+    """Database at URAMIX_DB_PATH"""
+    return open_database(DB_PATH)
+
+def fetch_all(sql, params=()):
+    """Run a read query and return rows as dicts"""
+    with get_db().connection() as conn:
+        return [dict(row) for row in conn.execute(sql, params)]
+
+def fetch_one(sql, params=()):
+    """Run a read query and return the first row as a dict"""
+    with get_db().connection() as conn:
+        row = conn.execute(sql, params).fetchone()
+    return dict(row) if row else None
+
+def get_setting(key):
+    """Read a platform setting"""
+    row = fetch_one("SELECT value FROM settings WHERE key = ?", (key,))
+    return row['value'] if row else None
+
+def add_setting(conn, key, delta):
+    """Increment a numeric platform setting"""
+    conn.execute("UPDATE settings SET value = value + ? WHERE key = ?", (delta, key))
 
 # ============================================
-# QR CODE GENERATION
+# PLATFORM AGGREGATES
 # ============================================
-def generate_qr_code(data):
-    """Generate QR code and return base64 string"""
-    try:
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4,
-        )
-        qr.add_data(data)
-        qr.make(fit=True)
+def bump_aggregate(conn, key, delta):
+    """Adjust a running platform total inside a write transaction"""
+    conn.execute("UPDATE aggregates SET value = value + ? WHERE key = ?", (delta, key))
+
+def get_aggregates():
+    """All running totals plus submission counts, in one read"""
+    with get_db().connection() as conn:
+        totals = {row['key']: row['value'] for row in conn.execute("SELECT key, value FROM aggregates")}
+        for row in conn.execute("SELECT status, n FROM submission_counts"):
+            totals[f"submissions_{row['status']}"] = row['n']
+    return totals
+
+def check_aggregates(repair=False):
+    """Recompute totals from source data; returns {key: (stored, actual)} for mismatches"""
+    mismatches = {}
+    
+    with get_db().transaction() as conn:
+        stored = {row['key']: row['value'] for row in conn.execute("SELECT key, value FROM aggregates")}
         
-        img = qr.make_image(fill_color="black", back_color="white")
+        for key, sql in AGGREGATE_SOURCES.items():
+            actual = conn.execute(sql).fetchone()[0]
+            if abs(stored.get(key, 0) - actual) > 1e-6:
+                mismatches[key] = (stored.get(key, 0), actual)
         
-        buffer = BytesIO()
-        img.save(buffer, format="PNG")
-        buffer.seek(0)
-        img_str = base64.b64encode(buffer.getvalue()).decode()
+        stored_counts = {row['status']: row['n'] for row in conn.execute("SELECT status, n FROM submission_counts")}
+        actual_counts = {
+            row['status']: row['n']
+            for row in conn.execute("SELECT status, COUNT(*) AS n FROM waste_submissions GROUP BY status")
+        }
+        for status in stored_counts.keys() | actual_counts.keys():
+            if stored_counts.get(status, 0) != actual_counts.get(status, 0):
+                mismatches[f"submissions_{status}"] = (stored_counts.get(status, 0), actual_counts.get(status, 0))
         
-        return img_str
-    except Exception as e:
-        st.error(f"QR Error: {str(e)}")
-        return None
+        if repair and mismatches:
+            for key, sql in AGGREGATE_SOURCES.items():
+                conn.execute(
+                    "INSERT OR REPLACE INTO aggregates (key, value) VALUES (?, (" + sql + "))",
+                    (key,)
+                )
+            conn.execute("DELETE FROM submission_counts")
+            conn.execute(
+                "INSERT INTO submission_counts (status, n) "
+                "SELECT status, COUNT(*) FROM waste_submissions GROUP BY status"
+            )
+    
+    return mismatches
 
 # ============================================
-# CREDIT CALCULATION
+# SESSION STATE INITIALIZATION
 # ============================================
-def calculate_credits(waste_type, quantity):
-    """Calculate credits and CO2 reduction"""
-    if waste_type == "Organic Waste":
-        base_credits = 60
-        co2_reduction = 0.8
-    else:
-        base_credits = 35
-        co2_reduction = 0.4
+def init_session_state():
+    """Initialize per-session state and the shared store"""
     
-    quantity_bonus = min(int(quantity * 1.5), 15)
-    total_credits = base_credits + quantity_bonus
+    # Shared Store (users, submissions, QR codes, manure)
+    get_db()
     
-    return total_credits, co2_reduction
-
-def update_manure_stock(organic_quantity):
-    """Convert organic waste to manure"""
-    manure_generated = organic_quantity * 0.3
-    st.session_state.manure_stock += manure_generated
-    return manure_generated
+    # Authentication
+    if 'logged_in' not in st.session_state:
+        st.session_state.logged_in = False
+    if 'current_user' not in st.session_state:
+        st.session_state.current_user = None
+    if 'is_admin' not in st.session_state:
+        st.session_state.is_admin = False
+    
+    # Manure reservation awaiting confirmation
+    if 'manure_hold' not in st.session_state:
+        st.session_state.manure_hold = None
+    
+    # Admin background jobs to report on: [{'kind', 'label', 'ids'}], newest first
+    if 'job_groups' not in st.session_state:
+        st.session_state.job_groups = []
 
 # ============================================
-# AUTHENTICATION PAGE
+# REPOSITORY
 # ============================================
-def auth_page():
-    """Login and Signup Page"""
-    st.markdown('<p class="hero-title">♻️ URAMix</p>', unsafe_allow_html=True)
-    st.markdown('<p class="hero-subtitle">Waste to Wealth | Clean India Mission</p>', unsafe_allow_html=True)
+def get_user(email):
+    """Fetch a user record"""
+    if not email:
+        return None
+    return fetch_one("SELECT * FROM users WHERE email = ?", (email,))
+
+def get_waste_history(email, before=None, limit=HISTORY_PAGE_SIZES[0]):
+    """One page of a user's history, newest first, as typed column arrays; returns (columns, has_more)"""
+    import numpy as np
     
-    st.markdown("---")
+    sql = "SELECT id, date, type, quantity, credits, status FROM waste_history WHERE user = ?"
+    params = [email]
+    if before is not None:
+        sql += " AND id < ?"
+        params.append(before)
+    sql += " ORDER BY id DESC LIMIT ?"
+    params.append(limit + 1)
     
-    col1, col2, col3 = st.columns([1, 2, 1])
+    with get_db().connection() as conn:
+        cur = conn.cursor()
+        cur.row_factory = None
+        rows = cur.execute(sql, params).fetchall()
     
-    with col2:
-        st.markdown("""
-        <div style='text-align: center; padding: 20px; background: white; border-radius: 15px; box-shadow: 0 4px 12px rgba(0,0,0,0.1);'>
-            <h3 style='color: #2e7d32;'>🌍 Our Mission</h3>
-            <p style='color: #558b2f; font-size: 1.1em;'>
-                Make India Clean • Reduce Landfills<br>
-                Convert Waste to Value • Reward Citizens<br>
-                Affordable Natural Manure for Farmers
-            </p>
-        </div>
-        """, unsafe_allow_html=True)
+    has_more = len(rows) > limit
+    ids, dates, types, quantities, credits, statuses = zip(*rows[:limit]) if rows else ((),) * 6
     
-    st.markdown("---")
+    return {
+        'id': np.array(ids, dtype=np.int64),
+        'date': np.array(dates, dtype=object),
+        'type': np.array(types, dtype=np.int8),
+        'quantity': np.array(quantities, dtype=np.float64),
+        'credits': np.array(credits, dtype=np.int64),
+        'status': np.array(statuses, dtype=np.int8)
+    }, has_more
+
+def history_frame(columns):
+    """DataFrame over history columns; Type and Status wrap the stored codes as categoricals"""
+    import pandas as pd
     
-    col_left, col_center, col_right = st.columns([1, 2, 1])
+    return pd.DataFrame({
+        "Date": columns['date'],
+        "Type": pd.Categorical.from_codes(columns['type'], WASTE_TYPES),
+        "Quantity (kg)": columns['quantity'],
+        "Credits": columns['credits'],
+        "Status": pd.Categorical.from_codes(columns['status'], HISTORY_STATUSES)
+    }, copy=False)
+
+def apply_referral(email, bonus=20):
+    """Credit the one-time referral bonus"""
+    with get_db().transaction() as conn:
+        cur = conn.execute(
+            "UPDATE users SET credits = credits + ?, referral_used = 1 "
+            "WHERE email = ? AND referral_used = 0",
+            (bonus, email)
+        )
+        if cur.rowcount == 1:
+            bump_aggregate(conn, 'credit_balance', bonus)
+    return cur.rowcount == 1
+
+def add_submission(submission):
+    """Store a new waste submission and fill the user's bin"""
+    bin_column = 'organic_bin' if submission['waste_type'] == "Organic Waste" else 'inorganic_bin'
     
-    with col_center:
-        tab1, tab2 = st.tabs(["🔐 Login", "📝 Signup"])
+    with get_db().transaction() as conn:
+        conn.execute(
+            "INSERT INTO waste_submissions (id, user, waste_type, status, timestamp, credits, quantity) "
+            "VALUES (:id, :user, :waste_type, :status, :timestamp, :credits, :quantity)",
+            submission
+        )
+        bump_submission_count(conn, submission['status'], 1)
+        conn.execute(
+            f"UPDATE users SET {bin_column} = MIN({bin_column} + ?, 100) WHERE email = ?",
+            (BIN_FILL_PER_SUBMISSION, submission['user'])
+        )
+
+def list_pending_submissions(user):
+    """Pending submissions for one user"""
+    return fetch_all(
+        "SELECT * FROM waste_submissions WHERE user = ? AND status = 'pending' ORDER BY timestamp, id",
+        (user,)
+    )
+
+def list_pending_page(after=None, limit=QUEUE_PAGE_SIZES[0], waste_type=None, user=None, day=None):
+    """One page of the pending queue in (timestamp, id) order
+    
+    `after` is the (timestamp, id) of the last row of the previous page.
+    Returns (rows, has_more).
+    """
+    clauses = ["status = 'pending'"]
+    params = []
+    
+    if waste_type:
+        clauses.append("waste_type = ?")
+        params.append(waste_type)
+    if user:
+        clauses.append("user = ?")
+        params.append(user)
+    if day:
+        clauses.append("timestamp BETWEEN ? AND ?")
+        params += [f"{day} 00:00:00", f"{day} 23:59:59"]
+    if after:
+        clauses.append("(timestamp, id) > (?, ?)")
+        params += list(after)
+    
+    rows = fetch_all(
+        f"SELECT * FROM waste_submissions WHERE {' AND '.join(clauses)} "
+        f"ORDER BY timestamp, id LIMIT ?",
+        params + [limit + 1]
+    )
+    return rows[:limit], len(rows) > limit
+
+def count_submissions(status):
+    """Number of submissions with a given status"""
+    row = fetch_one("SELECT n FROM submission_counts WHERE status = ?", (status,))
+    return row['n'] if row else 0
+
+def bump_submission_count(conn, status, delta):
+    """Keep submission_counts in step with waste_submissions"""
+    conn.execute(
+        "INSERT INTO submission_counts (status, n) VALUES (?, ?) "
+        "ON CONFLICT(status) DO UPDATE SET n = n + excluded.n",
+        (status, delta)
+    )
+
+def verify_submission(sub, qr_data, quantity, credits, co2):
+    """Mark a pending submission verified and register its QR code"""
+    return verify_submissions([(sub, qr_data, quantity, credits, co2)])[0]
+
+def verify_submissions(batch, conn=None):
+    """Verify (sub, qr_data, quantity, credits, co2) items in one transaction
+    
+    Runs inside `conn`'s transaction when given. Returns one flag per item;
+    False when it was no longer pending.
+    """
+    results = []
+    
+    with nullcontext(conn) if conn else get_db().transaction() as conn:
+        for sub, qr_data, quantity, credits, co2 in batch:
+            cur = conn.execute(
+                "UPDATE waste_submissions SET status = 'verified', quantity = ?, credits = ? "
+                "WHERE id = ? AND status = 'pending'",
+                (quantity, credits, sub['id'])
+            )
+            if cur.rowcount != 1:
+                results.append(False)
+                continue
+            
+            bump_submission_count(conn, 'pending', -1)
+            bump_submission_count(conn, 'verified', 1)
+            conn.execute(
+                "INSERT OR REPLACE INTO qr_codes "
+                "(code, submission_id, user, waste_type, credits, co2_reduction, quantity, scanned) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, 0)",
+                (qr_data, sub['id'], sub['user'], sub['waste_type'], credits, co2, quantity)
+            )
+            results.append(True)
+    
+    return results
+
+def redeem_qr_code(code):
+    """Apply a QR code's credits; returns (status, qr_info, manure_kg)"""
+    _, status, qr_info, manure = redeem_qr_codes([code])[0]
+    return status, qr_info, manure
+
+def redeem_qr_codes(codes, conn=None):
+    """Redeem many QR codes in one transaction (`conn`'s, when given)
+    
+    Returns (code, status, qr_info, manure_kg) per code, where status is
+    'redeemed', 'scanned', 'no_user' or 'invalid'.
+    """
+    now = datetime.now()
+    today = now.strftime('%Y-%m-%d')
+    bucket = series_bucket(now)
+    results = []
+    
+    with nullcontext(conn) if conn else get_db().transaction() as conn:
+        qr_rows = {}
+        emails = set()
+        # Forged tokens are rejected here, without touching the index
+        unique_codes = [code for code in dict.fromkeys(codes) if qr_token_valid(code)]
         
-        # LOGIN TAB
-        with tab1:
-            st.markdown("### Login to Your Account")
+        for i in range(0, len(unique_codes), SQL_IN_CHUNK):
+            chunk = unique_codes[i:i + SQL_IN_CHUNK]
+            marks = ",".join("?" * len(chunk))
+            for row in conn.execute(f"SELECT * FROM qr_codes WHERE code IN ({marks})", chunk):
+                qr_rows[row['code']] = dict(row)
+        
+        owners = list({qr['user'] for qr in qr_rows.values()})
+        for i in range(0, len(owners), SQL_IN_CHUNK):
+            chunk = owners[i:i + SQL_IN_CHUNK]
+            marks = ",".join("?" * len(chunk))
+            emails.update(row['email'] for row in conn.execute(f"SELECT email FROM users WHERE email IN ({marks})", chunk))
+        
+        user_updates = {'organic_bin': [], 'inorganic_bin': []}
+        history = []
+        series = {}
+        scanned = []
+        total_credits = 0
+        total_co2 = 0.0
+        total_kg = 0.0
+        organic_kg = 0.0
+        
+        for code in codes:
+            qr_info = qr_rows.get(code)
             
-            login_email = st.text_input("Email / Username", key="login_email", placeholder="your.email@example.com")
-            login_password = st.text_input("Password", type="password", key="login_pass", placeholder="••••••••")
+            if qr_info is None:
+                results.append((code, 'invalid', None, 0.0))
+                continue
+            if qr_info['scanned']:
+                results.append((code, 'scanned', qr_info, 0.0))
+                continue
+            if qr_info['user'] not in emails:
+                results.append((code, 'no_user', qr_info, 0.0))
+                continue
             
-            col_a, col_b = st.columns(2)
+            manure = 0.0
+            if qr_info['waste_type'] == "Organic Waste":
+                bin_column = 'organic_bin'
+                organic_kg += qr_info['quantity']
+                manure = qr_info['quantity'] * 0.3
+            else:
+                bin_column = 'inorganic_bin'
             
-            with col_a:
-                if st.button("Login", use_container_width=True, key="btn_login"):
-                    success, message = login_user(login_email, login_password)
-                    if success:
-                        st.success(message)
-                        st.balloons()
-                        st.rerun()
-                    else:
-                        st.error(message)
+            type_code = WASTE_TYPES.index(qr_info['waste_type'])
+            user_updates[bin_column].append((qr_info['credits'], qr_info['co2_reduction'], qr_info['user']))
+            history.append((qr_info['user'], today, type_code, qr_info['quantity'], qr_info['credits']))
+            totals = series.setdefault(type_code, [0.0, 0, 0])
+            totals[0] += qr_info['quantity']
+            totals[1] += qr_info['credits']
+            totals[2] += 1
+            scanned.append((code,))
+            total_credits += qr_info['credits']
+            total_co2 += qr_info['co2_reduction']
+            total_kg += qr_info['quantity']
             
-            with col_b:
-                if st.button("🔍 Google (Demo)", use_container_width=True, key="btn_google"):
-                    st.info("🔄 Google Sign-In - Demo Mode")
+            qr_rows[code] = dict(qr_info, scanned=1)
+            results.append((code, 'redeemed', qr_info, manure))
         
-        # SIGNUP TAB
-        with tab2:
-            st.markdown("### Create New Account")
-            
-            signup_email = st.text_input("Email Address", key="signup_email", placeholder="your.email@example.com")
-            signup_password = st.text_input("Create Password", type="password", key="signup_pass", placeholder="Min. 6 characters")
-            signup_confirm = st.text_input("Confirm Password", type="password", key="confirm_pass", placeholder="Re-enter password")
-            
-            if st.button("Create Account", use_container_width=True, key="btn_signup"):
-                if signup_password != signup_confirm:
-                    st.error("❌ Passwords don't match!")
-                else:
-                    success, message = signup_user(signup_email, signup_password)
-                    if success:
-                        st.success(message)
-                    else:
-                        st.error(message)
+        if not scanned:
+            return results
+        
+        for bin_column, params in user_updates.items():
+            conn.executemany(
+                f"UPDATE users SET credits = credits + ?, co2_reduced = co2_reduced + ?, "
+                f"{bin_column} = MAX(0, {bin_column} - {BIN_EMPTY_PER_REDEMPTION}), history_count = history_count + 1 WHERE email = ?",
+                params
+            )
+        conn.executemany(
+            "INSERT INTO waste_history (user, date, type, quantity, credits, status) "
+            "VALUES (?, ?, ?, ?, ?, 0)",
+            history
+        )
+        conn.executemany("UPDATE qr_codes SET scanned = 1 WHERE code = ?", scanned)
+        conn.executemany(
+            "INSERT INTO waste_series (type, bucket, quantity, credits, count) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(type, bucket) DO UPDATE SET quantity = quantity + excluded.quantity, "
+            "credits = credits + excluded.credits, count = count + excluded.count",
+            [(type_code, bucket, *totals) for type_code, totals in series.items()]
+        )
+        
+        if organic_kg:
+            update_manure_stock(conn, organic_kg)
+        bump_aggregate(conn, 'credits_issued', total_credits)
+        bump_aggregate(conn, 'credit_balance', total_credits)
+        bump_aggregate(conn, 'co2_reduced', total_co2)
+        bump_aggregate(conn, 'waste_kg', total_kg)
+        bump_aggregate(conn, 'daily_waste_version', 1)
+        conn.execute(
+            "INSERT INTO daily_waste (date, quantity) VALUES (?, ?) "
+            "ON CONFLICT(date) DO UPDATE SET quantity = quantity + excluded.quantity",
+            (today, total_kg)
+        )
+    
+    return results
+
+def parse_qr_list(text):
+    """Split a newline/CSV list of QR payloads"""
+    codes = []
+    for line in text.splitlines():
+        codes.extend(part.strip().strip('"') for part in line.split(","))
+    return [code for code in codes if code]
+
+def withdraw_credits(email, amount):
+    """Deduct withdrawn credits if the balance allows it"""
+    with get_db().transaction() as conn:
+        cur = conn.execute(
+            "UPDATE users SET credits = credits - ? WHERE email = ? AND credits >= ?",
+            (amount, email, amount)
+        )
+        if cur.rowcount == 1:
+            bump_aggregate(conn, 'credit_balance', -amount)
+    return cur.rowcount == 1
+
+def add_manure_stock(quantity):
+    """Add manure to the shared stock"""
+    with get_db().transaction() as conn:
+        add_setting(conn, 'manure_stock', quantity)
+    get_manure_inventory().mark_stale()
+
+def set_manure_price(price):
+    """Update the manure price per kg"""
+    with get_db().transaction() as conn:
+        conn.execute("UPDATE settings SET value = ? WHERE key = 'manure_price'", (price,))
+
+def record_daily_sale(conn, date, email, quantity, amount):
+    """Fold one sale into its day's rollup"""
+    new_buyer = conn.execute(
+        "INSERT OR IGNORE INTO manure_daily_buyers (date, user) VALUES (?, ?)", (date, email)
+    ).rowcount
+    conn.execute("""
+        INSERT INTO manure_daily (date, kg, revenue, orders, buyers) VALUES (?, ?, ?, 1, ?)
+        ON CONFLICT(date) DO UPDATE SET
+            kg = kg + excluded.kg,
+            revenue = revenue + excluded.revenue,
+            orders = orders + 1,
+            buyers = buyers + excluded.buyers
+    """, (date, quantity, amount, new_buyer))
+
+def list_manure_sales_page(before=None, limit=SALES_PAGE_SIZES[0]):
+    """One page of raw sales, newest first; returns (rows, has_more)"""
+    sql = "SELECT id, date, user, quantity, amount FROM manure_sales"
+    params = []
+    if before is not None:
+        sql += " WHERE id < ?"
+        params.append(before)
+    sql += " ORDER BY id DESC LIMIT ?"
+    params.append(limit + 1)
+    
+    rows = fetch_all(sql, params)
+    return rows[:limit], len(rows) > limit
+
+def get_manure_sales_range(start, end):
+    """Sales totals for dates start..end inclusive (YYYY-MM-DD), from the daily rollups"""
+    totals = fetch_one("""
+        SELECT COALESCE(SUM(kg), 0.0) AS kg, COALESCE(SUM(revenue), 0.0) AS revenue,
+               COALESCE(SUM(orders), 0) AS orders
+        FROM manure_daily WHERE date BETWEEN ? AND ?
+    """, (start, end))
+    totals['buyers'] = fetch_one(
+        "SELECT COUNT(DISTINCT user) AS n FROM manure_daily_buyers WHERE date BETWEEN ? AND ?", (start, end)
+    )['n']
+    return totals
+
+def get_daily_manure_sales():
+    """Manure sold per day"""
+    return {row['date']: row['kg'] for row in fetch_all("SELECT date, kg FROM manure_daily ORDER BY date")}
+
+def email_prefix_range(prefix):
+    """[low, high) email bounds matching a prefix, so the primary key index can serve the search"""
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+def count_users(prefix=""):
+    """Number of users, optionally those whose email starts with prefix"""
+    if not prefix:
+        return get_aggregates()['users']
+    return fetch_one(
+        "SELECT COUNT(*) AS n FROM users WHERE email >= ? AND email < ?", email_prefix_range(prefix)
+    )['n']
+
+def list_users_page(prefix="", sort="email", descending=False, after=None, limit=USERS_PAGE_SIZES[0]):
+    """One page of users as tuples in (sort, email) order; returns (rows, cursor of the next page or None)"""
+    columns = ['email', 'credits', 'history_count', 'manure_purchased', 'co2_reduced']
+    keys = [sort, 'email'] if sort != 'email' else ['email']
+    op, direction = ("<", "DESC") if descending else (">", "ASC")
+    
+    sql = f"SELECT {', '.join(columns)} FROM users WHERE 1"
+    params = []
+    if prefix:
+        sql += " AND email >= ? AND email < ?"
+        params.extend(email_prefix_range(prefix))
+    if after is not None:
+        sql += f" AND ({', '.join(keys)}) {op} ({', '.join('?' * len(keys))})"
+        params.extend(after)
+    sql += f" ORDER BY {', '.join(f'{key} {direction}' for key in keys)} LIMIT ?"
+    params.append(limit + 1)
+    
+    with get_db().connection() as conn:
+        cur = conn.cursor()
+        cur.row_factory = None
+        rows = cur.execute(sql, params).fetchall()
+    
+    if len(rows) <= limit:
+        return rows, None
+    
+    last = rows[limit - 1]
+    return rows[:limit], tuple(last[columns.index(key)] for key in keys)
 
 # ============================================
-# HOME PAGE
+# WASTE TIME SERIES
 # ============================================
-def home_page():
-    """Home Page with Problem Statements"""
-    st.markdown('<p class="hero-title">🌍 Welcome to URAMix</p>', unsafe_allow_html=True)
-    st.markdown('<p class="hero-subtitle">Transform Waste into Wealth | Build a Cleaner India</p>', unsafe_allow_html=True)
+SERIES_EPOCH = datetime(1970, 1, 1)
+# Buckets re-read on refresh; redemption only writes the current hour, this covers clock changes
+SERIES_REFRESH_OVERLAP = 24
+# Chart period -> days back from now (None = whole history)
+WASTE_PERIODS = {
+    "Last 7 days": 7,
+    "Last 30 days": 30,
+    "Last 12 months": 365,
+    "All time": None
+}
+
+def series_bucket(moment):
+    """Hour bucket of a (local, naive) datetime"""
+    return int((moment - SERIES_EPOCH).total_seconds()) // 3600
+
+def series_step(hours):
+    """Chart resolution for a span: hourly up to 2 days, then daily, weekly, monthly"""
+    if hours <= 48:
+        return 'hour'
+    if hours <= 90 * 24:
+        return 'day'
+    if hours <= 3 * 365 * 24:
+        return 'week'
+    return 'month'
+
+def series_periods(buckets, step):
+    """Period number of each hour bucket (weeks start on Monday)"""
+    import numpy as np
     
-    # Hero Images
-    col1, col2 = st.columns(2)
+    if step == 'hour':
+        return buckets
+    if step == 'day':
+        return buckets // 24
+    if step == 'week':
+        # 1970-01-01 was a Thursday
+        return (buckets // 24 + 3) // 7
+    return buckets.astype('datetime64[h]').astype('datetime64[M]').astype(np.int64)
+
+def series_period_starts(periods, step):
+    """Start of each period number as datetime64"""
+    if step == 'hour':
+        return periods.astype('datetime64[h]')
+    if step == 'day':
+        return periods.astype('datetime64[D]')
+    if step == 'week':
+        return (periods * 7 - 3).astype('datetime64[D]')
+    return periods.astype('datetime64[M]').astype('datetime64[D]')
+
+class WasteSeries:
+    """Hourly buckets per waste type in sorted arrays, with prefix sums for O(log n) ranges"""
     
-    with col1:
-        st.markdown("""
-        <div style='text-align: center; padding: 20px; background: white; border-radius: 20px; box-shadow: 0 6px 20px rgba(0,0,0,0.1);'>
-            <div style='background: #e8f5e9; padding: 60px; border-radius: 15px; margin-bottom: 15px;'>
-                <div style='font-size: 80px;'>🗑️</div>
-            </div>
-            <h3 style='color: #2e7d32; margin: 15px 0;'>Smart Waste Collection</h3>
-            <p style='color: #666;'>Segregate & earn credits</p>
-        </div>
-        """, unsafe_allow_html=True)
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clear()
+    
+    def _clear(self):
+        """Forget every loaded bucket"""
+        import numpy as np
+        
+        self.version = None
+        self.backfills = None
+        self.buckets = [np.empty(0, dtype=np.int64) for _ in WASTE_TYPES]
+        self.quantity = [np.empty(0, dtype=np.float64) for _ in WASTE_TYPES]
+        self.cumulative = [np.zeros(1, dtype=np.float64) for _ in WASTE_TYPES]
+    
+    def refresh(self, version):
+        """Load buckets written since the last refresh; `version` changes with every redemption"""
+        import numpy as np
+        
+        with self._lock:
+            if version == self.version:
+                return
+            
+            with get_db().connection() as conn:
+                cur = conn.cursor()
+                cur.row_factory = None
+                # Imports can write buckets anywhere in the past, beyond the refresh overlap
+                backfills = cur.execute("SELECT value FROM aggregates WHERE key = 'waste_series_backfills'").fetchone()[0]
+                if backfills != self.backfills:
+                    self._clear()
+                    self.backfills = backfills
+                for code in range(len(WASTE_TYPES)):
+                    buckets = self.buckets[code]
+                    since = int(buckets[-1]) - SERIES_REFRESH_OVERLAP if len(buckets) else None
+                    rows = cur.execute(
+                        "SELECT bucket, quantity FROM waste_series WHERE type = ? AND bucket >= ? ORDER BY bucket",
+                        (code, since if since is not None else -1 << 62)
+                    ).fetchall()
+                    
+                    new = np.array(rows, dtype=np.float64).reshape(-1, 2)
+                    keep = 0 if since is None else int(buckets.searchsorted(since))
+                    cumulative = self.cumulative[code]
+                    self.buckets[code] = np.concatenate([buckets[:keep], new[:, 0].astype(np.int64)])
+                    self.quantity[code] = np.concatenate([self.quantity[code][:keep], new[:, 1]])
+                    self.cumulative[code] = np.concatenate([cumulative[:keep + 1], cumulative[keep] + np.cumsum(new[:, 1])])
+            self.version = version
+    
+    def first_bucket(self):
+        """Earliest bucket with any waste, or None"""
+        firsts = [int(b[0]) for b in self.buckets if len(b)]
+        return min(firsts) if firsts else None
+    
+    def span(self, code, start, end):
+        """Index range of buckets in [start, end] (binary search)"""
+        lo = int(self.buckets[code].searchsorted(start, 'left'))
+        hi = int(self.buckets[code].searchsorted(end, 'right'))
+        return lo, hi
+    
+    def total(self, code, start, end):
+        """Waste kg of one type over hour buckets [start, end]"""
+        lo, hi = self.span(code, start, end)
+        return float(self.cumulative[code][hi] - self.cumulative[code][lo])
+    
+    def resample(self, start, end, step=None):
+        """(period starts, step, [kg per period for each type]) over hour buckets [start, end]"""
+        import numpy as np
+        
+        step = step or series_step(end - start + 1)
+        first, last = series_periods(np.array([start, end], dtype=np.int64), step)
+        
+        totals = []
+        for code in range(len(WASTE_TYPES)):
+            lo, hi = self.span(code, start, end)
+            periods = series_periods(self.buckets[code][lo:hi], step) - first
+            totals.append(np.bincount(periods, weights=self.quantity[code][lo:hi], minlength=last - first + 1))
+        
+        return series_period_starts(np.arange(first, last + 1), step), step, totals
+
+@st.cache_resource
+def load_waste_series(path):
+    """Waste time series of the database at `path`, shared by every session"""
+    return WasteSeries()
+
+def get_waste_series(version):
+    """Waste time series of the database at URAMIX_DB_PATH, refreshed to `version` (daily_waste_version)"""
+    series = load_waste_series(DB_PATH)
+    series.refresh(version)
+    return series
+
+# ============================================
+# MANURE INVENTORY
+# ============================================
+# Buyers are spread over independently locked counters so purchases don't queue on one value
+INVENTORY_SHARDS = 8
+# How long a reservation holds stock while the buyer confirms
+RESERVATION_SECONDS = 120
+# Counters are re-based on the stored stock at least this often (redemptions add stock too)
+INVENTORY_RECONCILE_SECONDS = 5.0
+
+class InventoryShard:
+    """Sellable kg plus the reservations and confirmed sales drawn from it"""
+    
+    def __init__(self):
+        self.available = 0.0
+        self.holds = {}
+        self.expiries = []
+        self.committing = 0.0
+        self.lock = threading.Lock()
+    
+    def expire(self, now):
+        """Return expired holds to the available stock (call with the lock held)"""
+        while self.expiries and self.expiries[0][0] <= now:
+            _, hold_id = heapq.heappop(self.expiries)
+            kg = self.holds.pop(hold_id, None)
+            if kg is not None:
+                self.available += kg
+
+class ManureInventory:
+    """Manure stock as sharded in-memory counters in front of settings.manure_stock
+    
+    A reservation moves kg from a shard's available stock into a hold that
+    expires on its own. Confirmed holds are committed in batches (one
+    transaction for every sale queued meanwhile), each with a guarded
+    decrement of the stored stock, so other processes can't cause an
+    oversell either. Reconciling re-bases the counters on the stored stock.
+    """
+    
+    def __init__(self, db, shards):
+        self.db = db
+        self.shards = [InventoryShard() for _ in range(shards)]
+        self.reconciled_at = 0.0
+        self.stale = True
+        self._queue = []
+        self._queue_lock = threading.Lock()
+        self._commit_lock = threading.Lock()
+    
+    def refresh(self):
+        """Reconcile if due, unless a commit is under way"""
+        if self.stale or time.monotonic() - self.reconciled_at > INVENTORY_RECONCILE_SECONDS:
+            self.reconcile(wait=False)
+    
+    def reserve(self, email, kg, amount):
+        """Hold `kg` for a buyer; returns a hold dict, or None when stock is short"""
+        self.refresh()
+        
+        home = hash(email) % len(self.shards)
+        hold = self._take(home, kg) or self._gather(home, kg)
+        if hold is None and time.monotonic() - self.reconciled_at > 1.0:
+            # Stock may have arrived since the last reconcile
+            self.reconcile()
+            hold = self._gather(home, kg)
+        if hold is not None:
+            hold.update(email=email, kg=kg, amount=amount)
+        return hold
+    
+    def _take(self, index, kg):
+        """Hold kg from one shard if it has enough"""
+        shard = self.shards[index]
+        now = time.monotonic()
+        with shard.lock:
+            shard.expire(now)
+            if shard.available < kg:
+                return None
+            return self._hold(index, shard, kg, now)
+    
+    def _gather(self, index, kg):
+        """Pool every shard's stock into shard `index`, then hold from it"""
+        now = time.monotonic()
+        for shard in self.shards:
+            shard.lock.acquire()
+        try:
+            for shard in self.shards:
+                shard.expire(now)
+            target = self.shards[index]
+            for shard in self.shards:
+                if shard is not target:
+                    target.available += shard.available
+                    shard.available = 0.0
+            if target.available < kg:
+                return None
+            return self._hold(index, target, kg, now)
+        finally:
+            for shard in self.shards:
+                shard.lock.release()
+    
+    def _hold(self, index, shard, kg, now):
+        """Record a hold on a locked shard"""
+        hold_id = secrets.token_hex(8)
+        expires = now + RESERVATION_SECONDS
+        shard.available -= kg
+        shard.holds[hold_id] = kg
+        heapq.heappush(shard.expiries, (expires, hold_id))
+        return {'id': hold_id, 'shard': index, 'expires_at': time.time() + RESERVATION_SECONDS}
+    
+    def release(self, hold):
+        """Give a hold's stock back; False if it had already expired"""
+        shard = self.shards[hold['shard']]
+        with shard.lock:
+            kg = shard.holds.pop(hold['id'], None)
+            if kg is not None:
+                shard.available += kg
+        return kg is not None
+    
+    def confirm(self, hold):
+        """Sell a held quantity; returns 'ok', 'expired' or 'short'"""
+        shard = self.shards[hold['shard']]
+        with shard.lock:
+            shard.expire(time.monotonic())
+            kg = shard.holds.pop(hold['id'], None)
+            if kg is None:
+                return 'expired'
+            shard.committing += kg
+        
+        item = {'hold': dict(hold, kg=kg), 'done': threading.Event(), 'result': None}
+        with self._queue_lock:
+            self._queue.append(item)
+        
+        # Group commit: whoever gets the lock commits everything queued so far
+        with self._commit_lock:
+            if not item['done'].is_set():
+                with self._queue_lock:
+                    batch, self._queue = self._queue, []
+                self._commit(batch)
+        
+        if isinstance(item['result'], Exception):
+            raise item['result']
+        return item['result']
+    
+    def _commit(self, batch):
+        """Settle a batch of confirmed sales and wake their callers (commit lock held)"""
+        holds = [item['hold'] for item in batch]
+        try:
+            sold = self._write(holds)
+            error = None
+        except Exception as e:
+            sold = set()
+            error = e
+        
+        for item in batch:
+            hold = item['hold']
+            shard = self.shards[hold['shard']]
+            with shard.lock:
+                shard.committing -= hold['kg']
+                if error is not None:
+                    # Nothing was written, so the stock is still there
+                    shard.available += hold['kg']
+            item['result'] = error or ('ok' if hold['id'] in sold else 'short')
+            item['done'].set()
+        
+        if error is None and len(sold) < len(holds):
+            self.stale = True
+    
+    def _write(self, holds):
+        """Record sales in one transaction; returns the ids of holds the stored stock covered"""
+        with self.db.transaction() as conn:
+            total = sum(hold['kg'] for hold in holds)
+            cur = conn.execute(
+                "UPDATE settings SET value = value - ? WHERE key = 'manure_stock' AND value >= ?",
+                (total, total)
+            )
+            if cur.rowcount == 1:
+                sold = holds
+            else:
+                # Another process sold some of it: settle sale by sale
+                sold = [
+                    hold for hold in holds
+                    if conn.execute(
+                        "UPDATE settings SET value = value - ? WHERE key = 'manure_stock' AND value >= ?",
+                        (hold['kg'], hold['kg'])
+                    ).rowcount == 1
+                ]
+            if not sold:
+                return set()
+            
+            today = datetime.now().strftime('%Y-%m-%d')
+            conn.executemany(
+                "UPDATE users SET manure_purchased = manure_purchased + ? WHERE email = ?",
+                [(hold['kg'], hold['email']) for hold in sold]
+            )
+            conn.executemany(
+                "INSERT INTO manure_sales (date, user, quantity, amount) VALUES (?, ?, ?, ?)",
+                [(today, hold['email'], hold['kg'], hold['amount']) for hold in sold]
+            )
+            for hold in sold:
+                record_daily_sale(conn, today, hold['email'], hold['kg'], hold['amount'])
+            bump_aggregate(conn, 'manure_sold_kg', sum(hold['kg'] for hold in sold))
+            bump_aggregate(conn, 'manure_revenue', sum(hold['amount'] for hold in sold))
+            bump_aggregate(conn, 'manure_orders', len(sold))
+            bump_aggregate(conn, 'manure_sales_version', 1)
+        
+        return {hold['id'] for hold in sold}
+    
+    def reconcile(self, wait=True):
+        """Re-base the counters on the stored stock, minus what is held or being committed"""
+        if not self._commit_lock.acquire(blocking=wait):
+            return
+        try:
+            with self.db.connection() as conn:
+                stored = conn.execute("SELECT value FROM settings WHERE key = 'manure_stock'").fetchone()[0]
+            now = time.monotonic()
+            for shard in self.shards:
+                shard.lock.acquire()
+            try:
+                for shard in self.shards:
+                    shard.expire(now)
+                outstanding = sum(sum(shard.holds.values()) + shard.committing for shard in self.shards)
+                free = max(0.0, stored - outstanding)
+                share = free / len(self.shards)
+                for shard in self.shards:
+                    shard.available = share
+                self.shards[-1].available = free - share * (len(self.shards) - 1)
+            finally:
+                for shard in self.shards:
+                    shard.lock.release()
+            self.reconciled_at = now
+            self.stale = False
+        finally:
+            self._commit_lock.release()
+    
+    def mark_stale(self):
+        """Reconcile before the next reservation (after stock was added)"""
+        self.stale = True
+    
+    def snapshot(self):
+        """Approximate {'available', 'held', 'holds'} for display"""
+        self.refresh()
+        now = time.monotonic()
+        available = held = 0.0
+        holds = 0
+        for shard in self.shards:
+            with shard.lock:
+                shard.expire(now)
+                available += shard.available
+                held += sum(shard.holds.values())
+                holds += len(shard.holds)
+        return {'available': available, 'held': held, 'holds': holds}
+
+@st.cache_resource
+def load_manure_inventory(path):
+    """Manure inventory of the database at `path`, shared by every session"""
+    return ManureInventory(open_database(path), INVENTORY_SHARDS)
+
+def get_manure_inventory():
+    """Manure inventory of the database at URAMIX_DB_PATH"""
+    return load_manure_inventory(DB_PATH)
+
+def reserve_manure(email, quantity, amount):
+    """Hold stock for a buyer to confirm; returns the hold or None when stock is short"""
+    return get_manure_inventory().reserve(email, quantity, amount)
+
+def confirm_manure(hold):
+    """Complete a reserved purchase; returns 'ok', 'expired' or 'short'"""
+    return get_manure_inventory().confirm(hold)
+
+def release_manure(hold):
+    """Cancel a reservation"""
+    return get_manure_inventory().release(hold)
+
+def purchase_manure(email, quantity, amount):
+    """Reserve and buy in one step; returns False when stock is short"""
+    inventory = get_manure_inventory()
+    hold = inventory.reserve(email, quantity, amount)
+    return hold is not None and inventory.confirm(hold) == 'ok'
+
+# ============================================
+# BIN FORECASTING
+# ============================================
+# Bin fill changes (percentage points): a submission adds, a redemption empties some
+BIN_FILL_PER_SUBMISSION = 15
+BIN_EMPTY_PER_REDEMPTION = 20
+# Fill rates are exponentially weighted event rates with this time constant
+FORECAST_TAU_DAYS = 14
+FORECAST_WINDOW_DAYS = 4 * FORECAST_TAU_DAYS
+# Forecasts older than this are recomputed when the Collection tab opens
+FORECAST_MAX_AGE_SECONDS = 15 * 60
+OVERFLOW_HORIZONS = {"24 hours": 24, "3 days": 72, "7 days": 168}
+ALERT_LIST_SIZE = 50
+
+class BinForecaster:
+    """Fill level, fill rate and hours to overflow of every bin, as (waste type, user rowid) arrays"""
+    
+    def __init__(self, db):
+        self.db = db
+        self.fill = None
+        self.rate = None
+        self.hours_left = None
+        self.alerts = []
+        self.computed_at = None
+        self.compute_ms = 0.0
+        self._lock = threading.Lock()
+    
+    def _events(self, conn, sql, params):
+        """(type codes, rowids, epoch seconds) arrays from a query returning (rowid, type, seconds)"""
+        import numpy as np
+        
+        cur = conn.cursor()
+        cur.row_factory = None
+        rows = np.array(cur.execute(sql, params).fetchall(), dtype=np.int64).reshape(-1, 3)
+        return rows[:, 1], rows[:, 0], rows[:, 2]
+    
+    def recompute(self, now=None):
+        """Rebuild every bin's forecast from current fill and recent activity"""
+        import numpy as np
+        
+        t0 = time.perf_counter()
+        now = now or datetime.now()
+        now_s = int((now - SERIES_EPOCH).total_seconds())
+        since = now - timedelta(days=FORECAST_WINDOW_DAYS)
+        type_case = " ".join(f"WHEN ? THEN {code}" for code in range(len(WASTE_TYPES)))
+        
+        with self.db.connection() as conn:
+            cur = conn.cursor()
+            cur.row_factory = None
+            users = np.array(
+                cur.execute("SELECT rowid, organic_bin, inorganic_bin FROM users").fetchall(), dtype=np.int64
+            ).reshape(-1, 3)
+            submitted = self._events(conn, f"""
+                SELECT u.rowid, CASE s.waste_type {type_case} END, CAST(strftime('%s', s.timestamp) AS INTEGER)
+                FROM waste_submissions s JOIN users u ON u.email = s.user
+                WHERE s.timestamp >= ?
+            """, (*WASTE_TYPES, since.strftime('%Y-%m-%d %H:%M:%S')))
+            # History has dates only: count each redemption at midday
+            redeemed = self._events(conn, """
+                SELECT u.rowid, h.type, CAST(strftime('%s', h.date) AS INTEGER) + 43200
+                FROM waste_history h JOIN users u ON u.email = h.user
+                WHERE h.date >= ?
+            """, (since.strftime('%Y-%m-%d'),))
+        
+        size = int(users[:, 0].max()) + 1 if len(users) else 1
+        fill = np.zeros((len(WASTE_TYPES), size), dtype=np.float64)
+        fill[0, users[:, 0]] = users[:, 1]
+        fill[1, users[:, 0]] = users[:, 2]
+        
+        # Exponentially weighted events per day, per bin, in fill points
+        rate = np.zeros_like(fill)
+        for (codes, rowids, seconds), points in ((submitted, BIN_FILL_PER_SUBMISSION), (redeemed, -BIN_EMPTY_PER_REDEMPTION)):
+            age_days = np.maximum(now_s - seconds, 0) / 86400
+            weights = points * np.exp(-age_days / FORECAST_TAU_DAYS) / FORECAST_TAU_DAYS
+            np.add.at(rate, (codes, rowids), weights)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            hours_left = np.where(rate > 0, (100 - fill) / rate * 24, np.inf)
+        hours_left[fill >= 100] = 0.0
+        
+        # Most urgent first; fuller bins first among equals
+        horizon = max(OVERFLOW_HORIZONS.values())
+        codes, rowids = np.nonzero(hours_left <= horizon)
+        alerts = list(zip(hours_left[codes, rowids].tolist(), (-fill[codes, rowids]).tolist(), codes.tolist(), rowids.tolist()))
+        heapq.heapify(alerts)
+        
+        with self._lock:
+            self.fill, self.rate, self.hours_left, self.alerts = fill, rate, hours_left, alerts
+            self.computed_at = now
+            self.compute_ms = (time.perf_counter() - t0) * 1000
+    
+    def due(self):
+        """True when there is no forecast or it is stale"""
+        return self.computed_at is None or (datetime.now() - self.computed_at).total_seconds() > FORECAST_MAX_AGE_SECONDS
+    
+    def overflowing(self, hours, limit=ALERT_LIST_SIZE):
+        """Up to `limit` (hours left, fill, rate, type code, rowid) bins overflowing within `hours`, most urgent first"""
+        urgent = []
+        with self._lock:
+            # Walk the heap in priority order without popping it: a frontier heap of node indices
+            alerts = self.alerts
+            frontier = [(alerts[0], 0)] if alerts else []
+            while frontier and len(urgent) < limit:
+                (hours_left, _, code, rowid), i = heapq.heappop(frontier)
+                if hours_left > hours:
+                    break
+                for child in (2 * i + 1, 2 * i + 2):
+                    if child < len(alerts):
+                        heapq.heappush(frontier, (alerts[child], child))
+                # Entries for bins collected since they were queued are stale
+                if self.hours_left[code, rowid] == hours_left:
+                    urgent.append((hours_left, float(self.fill[code, rowid]), float(self.rate[code, rowid]), code, rowid))
+        return urgent
+    
+    def count_within(self, hours):
+        """Bins overflowing within `hours`"""
+        with self._lock:
+            return 0 if self.hours_left is None else int((self.hours_left <= hours).sum())
+    
+    def bin(self, code, rowid):
+        """(fill, rate per day, hours left) of one bin, or None without a forecast"""
+        with self._lock:
+            if self.fill is None or rowid >= self.fill.shape[1]:
+                return None
+            return float(self.fill[code, rowid]), float(self.rate[code, rowid]), float(self.hours_left[code, rowid])
+    
+    def emptied(self, code, rowid):
+        """Record a collected bin until the next recompute"""
+        with self._lock:
+            if self.fill is not None and rowid < self.fill.shape[1]:
+                self.fill[code, rowid] = 0
+                rate = float(self.rate[code, rowid])
+                hours_left = 100 / rate * 24 if rate > 0 else float('inf')
+                # Collected again before a recompute: its heap entry is still current
+                if self.hours_left[code, rowid] == hours_left:
+                    return
+                self.hours_left[code, rowid] = hours_left
+                if hours_left <= max(OVERFLOW_HORIZONS.values()):
+                    heapq.heappush(self.alerts, (hours_left, -0.0, code, rowid))
+
+@st.cache_resource
+def load_bin_forecaster(path):
+    """Bin forecasts of the database at `path`, shared by every session"""
+    return BinForecaster(open_database(path))
+
+def get_bin_forecaster():
+    """Bin forecasts of the database at URAMIX_DB_PATH"""
+    return load_bin_forecaster(DB_PATH)
+
+def user_rowid(email):
+    """Row id of a user (the bin index in forecasts), or None"""
+    row = fetch_one("SELECT rowid FROM users WHERE email = ?", (email,))
+    return row['rowid'] if row else None
+
+def collect_bin(email, code):
+    """Empty a user's bin after collection"""
+    bin_column = ('organic_bin', 'inorganic_bin')[code]
+    with get_db().transaction() as conn:
+        conn.execute(f"UPDATE users SET {bin_column} = 0 WHERE email = ?", (email,))
+        rowid = conn.execute("SELECT rowid FROM users WHERE email = ?", (email,)).fetchone()[0]
+    get_bin_forecaster().emptied(code, rowid)
+
+def format_hours(hours):
+    """'now', '5 h' or '2.5 days'"""
+    if hours <= 0:
+        return "now"
+    if hours < 48:
+        return f"{hours:.0f} h"
+    return f"{hours / 24:.1f} days"
+
+# ============================================
+# PASSWORD HASHING
+# ============================================
+# scrypt cost (memory is 128 * N * r bytes per hash); raising it upgrades hashes on next login
+SCRYPT_N = int(os.environ.get("URAMIX_SCRYPT_N", 2 ** 14))
+SCRYPT_R = 8
+SCRYPT_P = 1
+# Concurrent hashes at most; the rest of the CPU stays free for reruns
+HASH_WORKERS = int(os.environ.get("URAMIX_HASH_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+
+def scrypt_hash(password, n=None):
+    """Hash a password into 'scrypt$n$r$p$salt$key' (runs on the calling thread)"""
+    n = n or SCRYPT_N
+    salt = secrets.token_bytes(16)
+    key = hashlib.scrypt(password.encode(), salt=salt, n=n, r=SCRYPT_R, p=SCRYPT_P, maxmem=256 * n * SCRYPT_R)
+    return "$".join([
+        "scrypt", str(n), str(SCRYPT_R), str(SCRYPT_P),
+        base64.b64encode(salt).decode(), base64.b64encode(key).decode()
+    ])
+
+def scrypt_check(stored, password):
+    """(matches, needs rehash) for a stored hash or a legacy plaintext password"""
+    if not stored.startswith("scrypt$"):
+        return hmac.compare_digest(stored.encode(), password.encode()), True
+    
+    _, n, r, p, salt, key = stored.split("$")
+    n, r, p = int(n), int(r), int(p)
+    actual = hashlib.scrypt(
+        password.encode(), salt=base64.b64decode(salt), n=n, r=r, p=p, maxmem=256 * n * r
+    )
+    return hmac.compare_digest(actual, base64.b64decode(key)), (n, r, p) != (SCRYPT_N, SCRYPT_R, SCRYPT_P)
+
+class PasswordHasher:
+    """Bounded thread pool for scrypt (hashlib releases the GIL while it works)"""
+    
+    def __init__(self, workers):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="uramix-hash")
+        self._rehashing = set()
+        self._lock = threading.Lock()
+    
+    def run(self, func, *args):
+        """Run func on the pool and wait for its result"""
+        return self._pool.submit(func, *args).result()
+    
+    def map(self, func, items):
+        """Run func over items on the pool; results in order"""
+        return list(self._pool.map(func, items))
+    
+    def rehash_later(self, email, old_hash, password):
+        """Queue an upgrade of a stored hash, at most one per account at a time"""
+        with self._lock:
+            if email in self._rehashing:
+                return
+            self._rehashing.add(email)
+        self._pool.submit(self._rehash, email, old_hash, password)
+    
+    def _rehash(self, email, old_hash, password):
+        """Store a fresh hash unless the password changed meanwhile"""
+        try:
+            new_hash = scrypt_hash(password)
+            with get_db().transaction() as conn:
+                conn.execute(
+                    "UPDATE users SET password = ? WHERE email = ? AND password = ?",
+                    (new_hash, email, old_hash)
+                )
+        finally:
+            with self._lock:
+                self._rehashing.discard(email)
+
+@st.cache_resource
+def get_password_hasher():
+    """Password hashing pool shared by every session"""
+    return PasswordHasher(HASH_WORKERS)
+
+def hash_password(password):
+    """Hash a password on the hashing pool"""
+    return get_password_hasher().run(scrypt_hash, password)
+
+def check_password(stored, password):
+    """Verify a password on the hashing pool; returns (matches, needs rehash)"""
+    if not stored.startswith("scrypt$"):
+        return scrypt_check(stored, password)
+    return get_password_hasher().run(scrypt_check, stored, password)
+
+# ============================================
+# AUTHENTICATION FUNCTIONS
+# ============================================
+def create_new_user(email, password):
+    """Create a new user account"""
+    create_new_users([(email, hash_password(password), datetime.now().strftime('%Y-%m-%d %H:%M:%S'))])
+
+def create_new_users(accounts):
+    """Create (email, password hash, created_at) accounts in one transaction"""
+    with get_db().transaction() as conn:
+        cur = conn.executemany(
+            "INSERT INTO users (email, password, created_at) VALUES (?, ?, ?)",
+            accounts
+        )
+        bump_aggregate(conn, 'users', cur.rowcount)
+
+def signup_user(email, password):
+    """User signup"""
+    if not email or not password:
+        return False, "❌ Please fill all fields!"
+    
+    if email.lower() == "admin":
+        return False, "❌ Cannot use 'admin' as email!"
+    
+    if get_user(email):
+        return False, "❌ Email already registered!"
+    
+    if len(password) < 6:
+        return False, "❌ Password must be at least 6 characters!"
+    
+    try:
+        create_new_user(email, password)
+    except sqlite3.IntegrityError:
+        # Another signup for the same email committed since the check above
+        return False, "❌ Email already registered!"
+    return True, "✅ Account created successfully! Please login."
+
+def login_user(email, password):
+    """User/Admin login"""
+    if not email or not password:
+        return False, "❌ Please fill all fields!"
+    
+    # Admin Login
+    if email.lower() == "admin" and password == "12345":
+        st.session_state.logged_in = True
+        st.session_state.is_admin = True
+        st.session_state.current_user = "admin"
+        return True, "✅ Admin login successful!"
+    
+    # User Login
+    status = authenticate(email, password)
+    if status == 'ok':
+        st.session_state.logged_in = True
+        st.session_state.is_admin = False
+        st.session_state.current_user = email
+        return True, "✅ Login successful!"
+    if status == 'wrong_password':
+        return False, "❌ Incorrect password!"
+    
+    return False, "❌ User not found! Please signup."
+
+def authenticate(email, password):
+    """Check user credentials: 'ok', 'wrong_password' or 'no_user'"""
+    user = get_user(email)
+    if not user:
+        return 'no_user'
+    
+    matches, needs_rehash = check_password(user['password'], password)
+    if not matches:
+        return 'wrong_password'
+    
+    # Upgrade plaintext or weaker hashes in the background; the login doesn't wait
+    if needs_rehash:
+        get_password_hasher().rehash_later(email, user['password'], password)
+    return 'ok'
+
+def logout():
+    """Logout current user"""
+    if st.session_state.get('manure_hold'):
+        release_manure(st.session_state.manure_hold)
+        st.session_state.manure_hold = None
+    st.session_state.logged_in = False
+    st.session_state.is_admin = False
+    st.session_state.current_user = None
+
+# ============================================
+# SUBMISSION IDS & QR TOKENS
+# ============================================
+# Crockford base32: no I/L/O/U, and upper case so QR codes use the dense alphanumeric mode
+ID_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+ID_EPOCH_MS = 1704067200000  # 2024-01-01 UTC
+# 43 bits of milliseconds (~278 years) + 10 bits of node + 12 bits of sequence = 65 bits = 13 chars
+ID_NODE_BITS = 10
+ID_SEQ_BITS = 12
+ID_LENGTH = 13
+QR_SIGNATURE_LENGTH = 8  # 40 bits of HMAC-SHA256
+QR_TOKEN_LENGTH = ID_LENGTH + QR_SIGNATURE_LENGTH
+
+def base32_encode(value, length):
+    """Fixed-width Crockford base32 of a non-negative integer"""
+    chars = []
+    for _ in range(length):
+        value, digit = divmod(value, 32)
+        chars.append(ID_ALPHABET[digit])
+    return "".join(reversed(chars))
+
+class IdGenerator:
+    """Time + node + sequence IDs that sort in creation order and never repeat"""
+    
+    def __init__(self, node):
+        self.node = node
+        self.last_ms = 0
+        self.seq = 0
+        self._lock = threading.Lock()
+    
+    def next_id(self):
+        """Next 13-character ID, strictly greater than the previous one"""
+        with self._lock:
+            # Never step back, even if the wall clock does
+            now = max(int(time.time() * 1000) - ID_EPOCH_MS, self.last_ms)
+            if now == self.last_ms:
+                self.seq += 1
+                if self.seq >> ID_SEQ_BITS:
+                    # Sequence exhausted: borrow the next millisecond
+                    now += 1
+                    self.seq = 0
+            else:
+                self.seq = 0
+            self.last_ms = now
+            value = (now << (ID_NODE_BITS + ID_SEQ_BITS)) | (self.node << ID_SEQ_BITS) | self.seq
+        return base32_encode(value, ID_LENGTH)
+
+def claim_id_node():
+    """Node number for this process, unique among the last 1024 processes to open the database"""
+    with get_db().transaction() as conn:
+        claimed = conn.execute(
+            "UPDATE settings SET value = value + 1 WHERE key = 'id_nodes_claimed' RETURNING value"
+        ).fetchone()[0]
+    return (claimed - 1) % (1 << ID_NODE_BITS)
+
+@st.cache_resource
+def load_id_generator(path):
+    """Submission ID generator for the database at `path`, shared by every session
+    
+    Processes sharing a database claim distinct node numbers from it, so
+    their IDs never collide; URAMIX_NODE_ID pins one instead.
+    """
+    node = os.environ.get("URAMIX_NODE_ID")
+    return IdGenerator(int(node) % (1 << ID_NODE_BITS) if node else claim_id_node())
+
+def get_id_generator():
+    """Submission ID generator of the database at URAMIX_DB_PATH"""
+    return load_id_generator(DB_PATH)
+
+def new_submission_id():
+    """Compact, monotonic submission ID"""
+    return get_id_generator().next_id()
+
+@st.cache_resource
+def load_qr_secret(path):
+    """QR signing key: URAMIX_QR_SECRET, else the one migration 8 stored in `path`"""
+    secret = os.environ.get("URAMIX_QR_SECRET") or get_setting('qr_secret')
+    return secret.encode()
+
+def get_qr_secret():
+    """QR signing key of the database at URAMIX_DB_PATH"""
+    return load_qr_secret(DB_PATH)
+
+def qr_signature(submission_id):
+    """Truncated HMAC of a submission ID, in base32"""
+    digest = hmac.new(get_qr_secret(), submission_id.encode(), hashlib.sha256).digest()
+    return base32_encode(int.from_bytes(digest[:5], "big"), QR_SIGNATURE_LENGTH)
+
+def qr_token(submission_id):
+    """Short signed QR payload for a submission (its qr_codes key)"""
+    return submission_id + qr_signature(submission_id)
+
+def qr_token_valid(code):
+    """False for a forged or mistyped token; older free-form codes pass through to the lookup"""
+    if len(code) != QR_TOKEN_LENGTH or not all(c in ID_ALPHABET for c in code):
+        return True
+    return hmac.compare_digest(qr_signature(code[:ID_LENGTH]), code[ID_LENGTH:])
+
+# ============================================
+# QR CODE GENERATION
+# ============================================
+QR_CACHE_MAX_BYTES = 32 * 1024 * 1024
+QR_BATCH_CHUNK = 25
+
+class QRImageCache:
+    """LRU cache of rendered QR images, bounded by total size in bytes"""
+    
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        """Cached image or None; marks it recently used"""
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+    
+    def put(self, key, value):
+        """Store an image, evicting least recently used ones"""
+        if len(value) > self.max_bytes:
+            return
+        
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            
+            self._items[key] = value
+            self.size += len(value)
+            
+            while self.size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.size -= len(evicted)
+
+@st.cache_resource
+def get_qr_cache():
+    """Rendered QR images shared by every session"""
+    return QRImageCache(QR_CACHE_MAX_BYTES)
+
+@st.cache_resource
+def get_qr_pool():
+    """Worker processes for batch QR rendering"""
+    return ProcessPoolExecutor(mp_context=multiprocessing.get_context("spawn"))
+
+def generate_qr_code(data):
+    """Generate QR code and return base64 string"""
+    cache = get_qr_cache()
+    img_str = cache.get(data)
+    
+    if img_str is None:
+        from qr_render import render_qr_png
+        
+        try:
+            with profile_section("qr_encode"):
+                img_str = render_qr_png(data)
+        except Exception as e:
+            st.error(f"QR Error: {str(e)}")
+            return None
+        cache.put(data, img_str)
+    
+    return img_str
+
+def generate_qr_codes(payloads):
+    """Generate many QR codes in parallel; returns {payload: base64 string}"""
+    cache = get_qr_cache()
+    images = {}
+    missing = []
+    
+    for data in dict.fromkeys(payloads):
+        img_str = cache.get(data)
+        if img_str is None:
+            missing.append(data)
+        else:
+            images[data] = img_str
+    
+    from qr_render import render_qr_batch
+    
+    with profile_section("qr_encode"):
+        if len(missing) <= QR_BATCH_CHUNK:
+            rendered = render_qr_batch(missing)
+        else:
+            chunks = [missing[i:i + QR_BATCH_CHUNK] for i in range(0, len(missing), QR_BATCH_CHUNK)]
+            rendered = [img for chunk in get_qr_pool().map(render_qr_batch, chunks) for img in chunk]
+    
+    for data, img_str in zip(missing, rendered):
+        cache.put(data, img_str)
+        images[data] = img_str
+    
+    return images
+
+# ============================================
+# BACKGROUND JOBS
+# ============================================
+# Worker threads running verification/redemption side effects off the script thread
+JOB_WORKERS = int(os.environ.get("URAMIX_JOB_WORKERS", 2))
+# Jobs of one kind claimed and applied together in one transaction
+JOB_BATCH_SIZE = 100
+# A claimed job not finished within its lease (worker or process died) is claimed again
+JOB_LEASE_SECONDS = 60
+JOB_MAX_ATTEMPTS = 5
+# Retry backoff: base * 2^(attempt - 1) seconds
+JOB_RETRY_SECONDS = 1.0
+# Idle workers still look for due retries and leftover jobs this often
+JOB_POLL_SECONDS = 2.0
+JOB_RETENTION_SECONDS = 7 * 86400
+JOB_PRUNE_SECONDS = 3600
+# How often the admin job panel refreshes itself
+JOB_PANEL_REFRESH = "2s"
+JOB_GROUPS_SHOWN = 5
+
+def render_verify_jobs(payloads):
+    """Render QR images into the shared cache before the verify transaction"""
+    generate_qr_codes([payload['qr_data'] for payload in payloads])
+
+def apply_verify_jobs(conn, payloads):
+    """Mark submissions verified and register their QR codes; one result per payload"""
+    verified = verify_submissions([
+        ({'id': p['submission_id'], 'user': p['user'], 'waste_type': p['waste_type']},
+         p['qr_data'], p['quantity'], p['credits'], p['co2'])
+        for p in payloads
+    ], conn)
+    return [{'qr_data': p['qr_data'], 'verified': ok} for p, ok in zip(payloads, verified)]
+
+def apply_redeem_jobs(conn, payloads):
+    """Redeem QR codes; one result per payload"""
+    return [{
+        'code': code,
+        'status': status,
+        'user': qr_info['user'] if qr_info else "",
+        'credits': qr_info['credits'] if qr_info else 0,
+        'co2_reduction': qr_info['co2_reduction'] if qr_info else 0.0,
+        'quantity': qr_info['quantity'] if qr_info else 0.0,
+        'manure': manure
+    } for code, status, qr_info, manure in redeem_qr_codes([p['code'] for p in payloads], conn)]
+
+# Job kind -> (prepare(payloads) outside the write lock or None, apply(conn, payloads) -> results)
+JOB_KINDS = {
+    'verify': (render_verify_jobs, apply_verify_jobs),
+    'redeem': (None, apply_redeem_jobs),
+}
+
+class JobQueue:
+    """Side-effect jobs stored in the jobs table and run by background threads
+    
+    A job is marked done in the same transaction as its effects, so a retry
+    after a crash or a failed attempt never applies them twice. Submitting a
+    (kind, key) again returns the existing job unless it failed for good, or
+    it is a redemption that found no code or no user yet and may succeed now.
+    """
+    
+    def __init__(self, db, workers):
+        self.db = db
+        self._wake = threading.Event()
+        self._pruned_at = 0.0
+        self._threads = [
+            threading.Thread(target=self._run, name=f"uramix-jobs-{n}", daemon=True) for n in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+    
+    def submit(self, kind, items):
+        """Queue (key, payload) jobs of one kind; returns their job ids in order"""
+        now = time.time()
+        created = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        keys = [key for key, _ in items]
+        
+        with self.db.transaction() as conn:
+            conn.executemany(
+                "INSERT INTO jobs (kind, key, payload, run_at, created_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(kind, key) DO UPDATE SET status = 'queued', attempts = 0, result = NULL, error = NULL, "
+                "payload = excluded.payload, run_at = excluded.run_at WHERE jobs.status = 'failed' "
+                "OR (jobs.kind = 'redeem' AND jobs.status = 'done' "
+                "AND json_extract(jobs.result, '$.status') NOT IN ('redeemed', 'scanned'))",
+                [(kind, key, json.dumps(payload), now, created) for key, payload in items]
+            )
+            ids = {}
+            for i in range(0, len(keys), SQL_IN_CHUNK):
+                chunk = keys[i:i + SQL_IN_CHUNK]
+                marks = ",".join("?" * len(chunk))
+                ids.update(conn.execute(f"SELECT key, id FROM jobs WHERE kind = ? AND key IN ({marks})", [kind] + chunk))
+        
+        self._wake.set()
+        return [ids[key] for key in keys]
+    
+    def statuses(self, ids):
+        """{id: {'kind', 'key', 'status', 'attempts', 'run_at', 'result', 'error'}}"""
+        jobs = {}
+        with self.db.connection() as conn:
+            for i in range(0, len(ids), SQL_IN_CHUNK):
+                chunk = ids[i:i + SQL_IN_CHUNK]
+                marks = ",".join("?" * len(chunk))
+                for row in conn.execute(
+                    f"SELECT id, kind, key, status, attempts, run_at, result, error FROM jobs WHERE id IN ({marks})", chunk
+                ):
+                    job = dict(row)
+                    job['result'] = json.loads(job['result']) if job['result'] else None
+                    jobs[job.pop('id')] = job
+        return jobs
+    
+    def depth(self):
+        """{'queued', 'running', 'failed'} job counts"""
+        with self.db.connection() as conn:
+            counts = dict(conn.execute(
+                "SELECT status, COUNT(*) FROM jobs WHERE status IN ('queued', 'running', 'failed') GROUP BY status"
+            ).fetchall())
+        return {status: counts.get(status, 0) for status in ('queued', 'running', 'failed')}
+    
+    def _run(self):
+        """Worker loop: claim a batch, run it, sleep until the next job is due"""
+        while True:
+            self._wake.clear()
+            wait = JOB_POLL_SECONDS
+            try:
+                claimed = self._claim()
+                if claimed:
+                    self._process(*claimed)
+                    continue
+                self._prune()
+                next_run = self._next_run()
+                if next_run is not None:
+                    wait = min(wait, max(next_run - time.time(), 0.01))
+            except sqlite3.Error:
+                # Database busy or unavailable: back off, leases bring the jobs back
+                pass
+            self._wake.wait(wait)
+    
+    def _next_run(self):
+        """Earliest time a queued job is due or a running job's lease expires; None if there are none"""
+        with self.db.connection() as conn:
+            times = [
+                conn.execute("SELECT MIN(run_at) FROM jobs WHERE status = ?", (status,)).fetchone()[0]
+                for status in ('queued', 'running')
+            ]
+        return min((t for t in times if t is not None), default=None)
+    
+    def _claim(self):
+        """(kind, jobs) of the oldest due jobs of one kind, leased to this worker; None if none are due"""
+        now = time.time()
+        
+        # Look without the write lock first: idle polls stay read-only
+        next_run = self._next_run()
+        if next_run is None or next_run > now:
+            return None
+        
+        with self.db.transaction() as conn:
+            # Jobs whose lease ran out go back in the queue
+            conn.execute("UPDATE jobs SET status = 'queued' WHERE status = 'running' AND run_at <= ?", (now,))
+            first = conn.execute(
+                "SELECT kind FROM jobs WHERE status = 'queued' AND run_at <= ? ORDER BY run_at LIMIT 1", (now,)
+            ).fetchone()
+            if first is None:
+                return None
+            kind = first['kind']
+            jobs = [dict(row) for row in conn.execute(
+                "SELECT id, key, payload, attempts FROM jobs WHERE status = 'queued' AND run_at <= ? AND kind = ? "
+                "ORDER BY run_at LIMIT ?",
+                (now, kind, JOB_BATCH_SIZE)
+            )]
+            conn.executemany(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, run_at = ? WHERE id = ?",
+                [(now + JOB_LEASE_SECONDS, job['id']) for job in jobs]
+            )
+        
+        for job in jobs:
+            job['attempts'] += 1
+            job['payload'] = json.loads(job['payload'])
+        return kind, jobs
+    
+    def _process(self, kind, jobs):
+        """Run claimed jobs together; if that fails, run them one by one so one bad job can't sink the rest"""
+        prepare, apply = JOB_KINDS[kind]
+        
+        try:
+            if prepare:
+                prepare([job['payload'] for job in jobs])
+            with self.db.transaction() as conn:
+                # A job whose lease ran out may have been claimed again since; leave it to that claim
+                marks = ",".join("?" * len(jobs))
+                held = {tuple(row) for row in conn.execute(
+                    f"SELECT id, attempts FROM jobs WHERE status = 'running' AND id IN ({marks})", [job['id'] for job in jobs]
+                )}
+                held_jobs = [job for job in jobs if (job['id'], job['attempts']) in held]
+                if not held_jobs:
+                    return
+                results = apply(conn, [job['payload'] for job in held_jobs])
+                conn.executemany(
+                    "UPDATE jobs SET status = 'done', result = ?, error = NULL, run_at = ? WHERE id = ?",
+                    [(json.dumps(result), time.time(), job['id']) for job, result in zip(held_jobs, results)]
+                )
+        except Exception as e:
+            if len(jobs) > 1:
+                for job in jobs:
+                    self._process(kind, [job])
+                return
+            self._retry(jobs[0], e)
+    
+    def _retry(self, job, error):
+        """Queue a failed job again after a backoff, or give up on it"""
+        if job['attempts'] >= JOB_MAX_ATTEMPTS:
+            status, run_at = 'failed', time.time()
+        else:
+            status, run_at = 'queued', time.time() + JOB_RETRY_SECONDS * 2 ** (job['attempts'] - 1)
+        
+        with self.db.transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, run_at = ?, error = ? WHERE id = ?",
+                (status, run_at, f"{type(error).__name__}: {error}", job['id'])
+            )
+    
+    def _prune(self):
+        """Drop finished jobs past retention (at most once per JOB_PRUNE_SECONDS)"""
+        now = time.time()
+        if now - self._pruned_at < JOB_PRUNE_SECONDS:
+            return
+        self._pruned_at = now
+        with self.db.transaction() as conn:
+            conn.execute("DELETE FROM jobs WHERE status = 'done' AND run_at < ?", (now - JOB_RETENTION_SECONDS,))
+
+@st.cache_resource
+def load_job_queue(path):
+    """Job queue and its workers for the database at `path` (one per server process)"""
+    return JobQueue(open_database(path), JOB_WORKERS)
+
+def get_job_queue():
+    """Job queue of the app database"""
+    return load_job_queue(DB_PATH)
+
+def queue_verifications(batch):
+    """Queue (sub, qr_data, quantity, credits, co2) verifications, keyed by submission ID; returns job ids"""
+    return get_job_queue().submit('verify', [(sub['id'], {
+        'submission_id': sub['id'], 'user': sub['user'], 'waste_type': sub['waste_type'],
+        'qr_data': qr_data, 'quantity': quantity, 'credits': credits, 'co2': co2
+    }) for sub, qr_data, quantity, credits, co2 in batch])
+
+def queue_redemptions(codes):
+    """Queue QR code redemptions, keyed by code (a token carries its submission ID); returns job ids"""
+    return get_job_queue().submit('redeem', [(code, {'code': code}) for code in dict.fromkeys(codes)])
+
+# ============================================
+# CREDIT CALCULATION
+# ============================================
+# Rate tables published by another server process are picked up within this long
+CREDIT_RATES_RECHECK_SECONDS = 5.0
+
+class CreditRates:
+    """One version of the rate table, indexed by waste type code"""
+    
+    def __init__(self, version, rows):
+        import numpy as np
+        
+        self.version = version
+        # Plain lists for the scalar path, arrays for the batch path
+        self.base = [row['base_credits'] for row in rows]
+        self.per_kg = [row['bonus_per_kg'] for row in rows]
+        self.cap = [row['bonus_cap'] for row in rows]
+        self.co2 = [row['co2_reduction'] for row in rows]
+        self.base_array = np.array(self.base, dtype=np.int64)
+        self.per_kg_array = np.array(self.per_kg, dtype=np.float64)
+        self.cap_array = np.array(self.cap, dtype=np.float64)
+        self.co2_array = np.array(self.co2, dtype=np.float64)
+
+def current_credit_rate_version():
+    """Newest published rate table version"""
+    return fetch_one("SELECT MAX(version) AS version FROM credit_rates")['version']
+
+@st.cache_resource
+def load_credit_rates(path, version):
+    """A published rate table version of the database at `path` (never changes once published)"""
+    return CreditRates(version, fetch_all("SELECT * FROM credit_rates WHERE version = ? ORDER BY type", (version,)))
+
+class CurrentCreditRates:
+    """Newest rate table, re-checked at most every CREDIT_RATES_RECHECK_SECONDS instead of per call"""
+    
+    def __init__(self, path):
+        self.path = path
+        self.rates = None
+        self.checked_at = 0.0
+    
+    def get(self):
+        """Newest rate table, as of at most CREDIT_RATES_RECHECK_SECONDS ago"""
+        now = time.monotonic()
+        if self.rates is None or now - self.checked_at > CREDIT_RATES_RECHECK_SECONDS:
+            version = current_credit_rate_version()
+            if self.rates is None or self.rates.version != version:
+                self.rates = load_credit_rates(self.path, version)
+            self.checked_at = now
+        return self.rates
+    
+    def invalidate(self):
+        """Re-read the newest version on the next get (after publishing one)"""
+        self.rates = None
+
+@st.cache_resource
+def load_current_credit_rates(path):
+    """Newest rate table of the database at `path`, shared by every session"""
+    return CurrentCreditRates(path)
+
+def get_credit_rates(version=None):
+    """Rate table `version`, or the newest one"""
+    if version:
+        return load_credit_rates(DB_PATH, version)
+    return load_current_credit_rates(DB_PATH).get()
+
+def publish_credit_rates(rates):
+    """Add a rate table version from {waste_type: (base, bonus per kg, bonus cap, co2)}; returns it"""
+    with get_db().transaction() as conn:
+        version = conn.execute("SELECT COALESCE(MAX(version), 0) + 1 FROM credit_rates").fetchone()[0]
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        conn.executemany(
+            "INSERT INTO credit_rates VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(version, WASTE_TYPES.index(waste_type), *rates[waste_type], now) for waste_type in WASTE_TYPES]
+        )
+    load_current_credit_rates(DB_PATH).invalidate()
+    return version
+
+def calculate_credits(waste_type, quantity, rates=None):
+    """Calculate credits and CO2 reduction (newest rates unless given)"""
+    rates = rates or get_credit_rates()
+    code = WASTE_TYPES.index(waste_type)
+    
+    quantity_bonus = min(int(quantity * rates.per_kg[code]), rates.cap[code])
+    total_credits = rates.base[code] + quantity_bonus
+    
+    return total_credits, rates.co2[code]
+
+def waste_type_codes(waste_types):
+    """Type codes for an array of waste type names (or codes, passed through)"""
+    import numpy as np
+    
+    types = np.asarray(waste_types)
+    if types.dtype.kind in 'iu':
+        return types.astype(np.int64)
+    
+    codes = np.full(types.shape, -1, dtype=np.int64)
+    for code, name in enumerate(WASTE_TYPES):
+        codes[types == name] = code
+    if (codes < 0).any():
+        raise ValueError(f"unknown waste type {types[codes < 0][0]!r}")
+    return codes
+
+def calculate_credits_batch(waste_types, quantities, rates=None):
+    """calculate_credits over arrays: (int64 credits, float64 co2), identical to the scalar results"""
+    import numpy as np
+    
+    rates = rates or get_credit_rates()
+    codes = waste_type_codes(waste_types)
+    quantities = np.asarray(quantities, dtype=np.float64)
+    
+    # trunc matches int(); the product is the same float64 multiplication as the scalar path
+    quantity_bonus = np.minimum(np.trunc(quantities * rates.per_kg_array[codes]), rates.cap_array[codes])
+    return rates.base_array[codes] + quantity_bonus.astype(np.int64), rates.co2_array[codes]
+
+def repricing_impact(version, chunk=100_000):
+    """Credits of all verified QR codes now vs under rate table `version`: {'codes', 'current', 'repriced'}"""
+    import numpy as np
+    
+    rates = get_credit_rates(version)
+    type_case = " ".join(f"WHEN ? THEN {code}" for code in range(len(WASTE_TYPES)))
+    impact = {'codes': 0, 'current': 0, 'repriced': 0}
+    
+    with get_db().connection() as conn:
+        cur = conn.cursor()
+        cur.row_factory = None
+        cur.execute(f"SELECT CASE waste_type {type_case} END, quantity, credits FROM qr_codes", WASTE_TYPES)
+        while True:
+            rows = cur.fetchmany(chunk)
+            if not rows:
+                break
+            codes, quantities, credits = (np.array(column) for column in zip(*rows))
+            repriced, _ = calculate_credits_batch(codes.astype(np.int64), quantities, rates)
+            impact['codes'] += len(rows)
+            impact['current'] += int(credits.sum())
+            impact['repriced'] += int(repriced.sum())
+    
+    return impact
+
+def update_manure_stock(conn, organic_quantity):
+    """Convert organic waste to manure"""
+    manure_generated = organic_quantity * 0.3
+    add_setting(conn, 'manure_stock', manure_generated)
+    return manure_generated
+
+# ============================================
+# DATA EXPORT & IMPORT
+# ============================================
+# Exports read this many rows per query; imports validate and commit this many per transaction
+EXPORT_CHUNK_ROWS = 20_000
+IMPORT_BATCH_ROWS = 5_000
+IMPORT_MAX_ERRORS = 50
+SUBMISSION_STATUSES = ["pending", "verified"]
+EXPORT_FORMATS = {"CSV": ("csv", "text/csv"), "Parquet": ("parquet", "application/vnd.apache.parquet")}
+
+def parse_text(value):
+    """Non-empty string"""
+    value = str(value).strip()
+    if not value:
+        raise ValueError("is empty")
+    return value
+
+def parse_email(value):
+    """Account email (same rules as signup: anything but 'admin')"""
+    value = parse_text(value)
+    if value.lower() == "admin":
+        raise ValueError(f"{value!r} is not a user email")
+    return value
+
+def parse_password(value):
+    """Stored scrypt hash, or a plain password of 6+ characters (hashed before insert)"""
+    value = str(value)
+    if value.startswith("scrypt$"):
+        parts = value.split("$")
+        try:
+            if len(parts) != 6:
+                raise ValueError
+            n, r, p = int(parts[1]), int(parts[2]), int(parts[3])
+            # Same limits hashlib.scrypt enforces at login
+            if n < 2 or n & (n - 1) or r < 1 or p < 1:
+                raise ValueError
+            if not base64.b64decode(parts[4], validate=True) or not base64.b64decode(parts[5], validate=True):
+                raise ValueError
+        except ValueError:
+            raise ValueError("is not a valid scrypt hash") from None
+    elif len(value) < 6:
+        raise ValueError("must be at least 6 characters")
+    return value
+
+def parse_count(value, high=None):
+    """Whole number >= 0 (and <= high)"""
+    if isinstance(value, float) and not value.is_integer():
+        raise ValueError(f"{value!r} is not a whole number")
+    value = int(value)
+    if value < 0 or (high is not None and value > high):
+        raise ValueError(f"{value} is out of range")
+    return value
+
+def parse_amount(value):
+    """Finite number >= 0"""
+    value = float(value)
+    if not math.isfinite(value) or value < 0:
+        raise ValueError(f"{value} is out of range")
+    return value
+
+def parse_datetime(value):
+    """'YYYY-MM-DD HH:MM:SS' timestamp"""
+    value = parse_text(value)
+    datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
+    return value
+
+def parse_date(value):
+    """'YYYY-MM-DD' date"""
+    value = parse_text(value)
+    datetime.strptime(value, '%Y-%m-%d')
+    return value
+
+def parse_choice(choices):
+    """Parser accepting one of `choices`"""
+    def parse(value):
+        value = parse_text(value)
+        if value not in choices:
+            raise ValueError(f"{value!r} is not one of {', '.join(choices)}")
+        return value
+    return parse
+
+# Column kind -> (parser, Parquet type)
+TRANSFER_KINDS = {
+    'text': (parse_text, 'string'),
+    'email': (parse_email, 'string'),
+    'password': (parse_password, 'string'),
+    'count': (parse_count, 'int64'),
+    'fill': (functools.partial(parse_count, high=100), 'int64'),
+    'flag': (functools.partial(parse_count, high=1), 'int64'),
+    'amount': (parse_amount, 'double'),
+    'datetime': (parse_datetime, 'string'),
+    'date': (parse_date, 'string'),
+    'waste_type': (parse_choice(WASTE_TYPES), 'string'),
+    'status': (parse_choice(SUBMISSION_STATUSES), 'string'),
+}
+
+def users_exported(rows):
+    """Export rows with legacy plaintext passwords replaced by a hash, so files never carry them"""
+    plain = [i for i, row in enumerate(rows) if not row[1].startswith("scrypt$")]
+    if not plain:
+        return rows
+    rows = [list(row) for row in rows]
+    for i, hashed in zip(plain, get_password_hasher().map(scrypt_hash, [rows[i][1] for i in plain])):
+        rows[i][1] = hashed
+    return rows
+
+def users_imported(conn, rows):
+    """Platform totals for imported accounts"""
+    bump_aggregate(conn, 'users', len(rows))
+    bump_aggregate(conn, 'credit_balance', sum(row['credits'] for row in rows))
+    bump_aggregate(conn, 'co2_reduced', sum(row['co2_reduced'] for row in rows))
+
+def submissions_imported(conn, rows):
+    """Status counts for imported submissions"""
+    for status in SUBMISSION_STATUSES:
+        n = sum(1 for row in rows if row['status'] == status)
+        if n:
+            bump_submission_count(conn, status, n)
+
+def qr_codes_imported(conn, rows):
+    """Credits issued by imported codes that were already scanned"""
+    bump_aggregate(conn, 'credits_issued', sum(row['credits'] for row in rows if row['scanned']))
+
+def manure_sales_imported(conn, rows):
+    """Daily rollups and totals for imported sales"""
+    for row in rows:
+        record_daily_sale(conn, row['date'], row['user'], row['quantity'], row['amount'])
+    bump_aggregate(conn, 'manure_sold_kg', sum(row['quantity'] for row in rows))
+    bump_aggregate(conn, 'manure_revenue', sum(row['amount'] for row in rows))
+    bump_aggregate(conn, 'manure_orders', len(rows))
+    bump_aggregate(conn, 'manure_sales_version', 1)
+
+def daily_waste_imported(conn, rows):
+    """Waste total and chart buckets for imported days"""
+    conn.executemany(
+        "INSERT INTO waste_series (type, bucket, quantity, credits, count) VALUES (?, ?, ?, 0, 0) "
+        "ON CONFLICT(type, bucket) DO UPDATE SET quantity = quantity + excluded.quantity",
+        [
+            (WASTE_TYPES.index(row['waste_type']), series_bucket(datetime.strptime(row['date'], '%Y-%m-%d')), row['quantity'])
+            for row in rows
+        ]
+    )
+    bump_aggregate(conn, 'waste_kg', sum(row['quantity'] for row in rows))
+    bump_aggregate(conn, 'daily_waste_version', 1)
+    bump_aggregate(conn, 'waste_series_backfills', 1)
+
+# Tables that move in and out of the platform. The key column comes first
+# (imports skip keys that already exist), `owner` must name an existing user,
+# columns without a default are required and `derived` columns are export
+# only. `extra` columns are read on import for the `imported` hook but not
+# stored; `exported` rewrites each chunk of exported rows.
+TRANSFER_TABLES = {
+    "users": {
+        'label': "👥 Users",
+        'columns': [
+            ('email', 'email'), ('password', 'password'), ('credits', 'count'),
+            ('organic_bin', 'fill'), ('inorganic_bin', 'fill'), ('manure_purchased', 'amount'),
+            ('referral_used', 'flag'), ('co2_reduced', 'amount'), ('created_at', 'datetime')
+        ],
+        'defaults': {
+            'credits': 0, 'organic_bin': 0, 'inorganic_bin': 0, 'manure_purchased': 0.0,
+            'referral_used': 0, 'co2_reduced': 0.0
+        },
+        'derived': [('history_count', 'count')],
+        'exported': users_exported,
+        'imported': users_imported,
+    },
+    "waste_submissions": {
+        'label': "♻️ Submissions",
+        'owner': 'user',
+        'columns': [
+            ('id', 'text'), ('user', 'email'), ('waste_type', 'waste_type'), ('status', 'status'),
+            ('timestamp', 'datetime'), ('credits', 'count'), ('quantity', 'amount')
+        ],
+        'defaults': {'credits': 0, 'quantity': 0.0},
+        'imported': submissions_imported,
+    },
+    "qr_codes": {
+        'label': "📱 QR Codes",
+        'owner': 'user',
+        'columns': [
+            ('code', 'text'), ('submission_id', 'text'), ('user', 'email'), ('waste_type', 'waste_type'),
+            ('credits', 'count'), ('co2_reduction', 'amount'), ('quantity', 'amount'), ('scanned', 'flag')
+        ],
+        'defaults': {'scanned': 0},
+        'imported': qr_codes_imported,
+    },
+    "manure_sales": {
+        'label': "🌿 Manure Sales",
+        'owner': 'user',
+        'columns': [('id', 'count'), ('date', 'date'), ('user', 'email'), ('quantity', 'amount'), ('amount', 'amount')],
+        # No id: numbered on insert
+        'defaults': {'id': None},
+        'imported': manure_sales_imported,
+    },
+    "daily_waste": {
+        'label': "📅 Daily Waste",
+        'columns': [('date', 'date'), ('quantity', 'amount')],
+        # Days carry no type; the Analytics chart files them under this one
+        'extra': [('waste_type', 'waste_type')],
+        'defaults': {'waste_type': WASTE_TYPES[0]},
+        'imported': daily_waste_imported,
+    },
+}
+
+def export_columns(table):
+    """(column, kind) pairs written by exports (passwords only as scrypt hashes)"""
+    spec = TRANSFER_TABLES[table]
+    return spec['columns'] + spec.get('derived', [])
+
+def export_batches(table, chunk=EXPORT_CHUNK_ROWS):
+    """Rows of `table` as tuples, `chunk` at a time in rowid order
+    
+    Each chunk is a separate read, so a slow consumer never holds a
+    snapshot open (which would stop checkpoints from resetting the WAL).
+    """
+    columns = ", ".join(name for name, _ in export_columns(table))
+    exported = TRANSFER_TABLES[table].get('exported')
+    db = get_db()
+    last = 0
+    
+    while True:
+        with db.connection() as conn:
+            cur = conn.cursor()
+            cur.row_factory = None
+            rows = cur.execute(
+                f"SELECT rowid, {columns} FROM {table} WHERE rowid > ? ORDER BY rowid LIMIT ?", (last, chunk)
+            ).fetchall()
+        if not rows:
+            return
+        last = rows[-1][0]
+        batch = [row[1:] for row in rows]
+        yield exported(batch) if exported else batch
+        if len(rows) < chunk:
+            return
+
+def export_csv(table, chunk=EXPORT_CHUNK_ROWS):
+    """CSV bytes of `table`, one piece per chunk of rows"""
+    import csv
+    
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow([name for name, _ in export_columns(table)])
+    
+    for rows in export_batches(table, chunk):
+        writer.writerows(rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+class ChunkSink:
+    """Write-only file that hands over what was written since the last drain"""
+    
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+        self.closed = False
+    
+    def write(self, data):
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+    
+    def tell(self):
+        return self._position
+    
+    def flush(self):
+        pass
+    
+    def close(self):
+        self.closed = True
+    
+    def drain(self):
+        """Bytes written since the last drain"""
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+def export_parquet(table, chunk=EXPORT_CHUNK_ROWS):
+    """Parquet bytes of `table`, one row group per chunk of rows"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    columns = export_columns(table)
+    schema = pa.schema([(name, TRANSFER_KINDS[kind][1]) for name, kind in columns])
+    sink = ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    
+    for rows in export_batches(table, chunk):
+        writer.write_table(pa.Table.from_arrays(
+            [pa.array(values, type=field.type) for values, field in zip(zip(*rows), schema)], schema=schema
+        ))
+        yield sink.drain()
+    
+    writer.close()
+    yield sink.drain()
+
+class ExportStream(io.RawIOBase):
+    """Read-only file over a generator of byte chunks"""
+    
+    def __init__(self, chunks):
+        self._chunks = chunks
+        self._chunk = memoryview(b"")
+        self._position = 0
+    
+    def readable(self):
+        return True
+    
+    def seek(self, offset, whence=io.SEEK_SET):
+        # Consumers rewind before reading; only that no-op is supported
+        if (offset, whence) == (0, io.SEEK_SET) and self._position == 0:
+            return 0
+        raise io.UnsupportedOperation("export streams only read forwards")
+    
+    def tell(self):
+        return self._position
+    
+    def readinto(self, buffer):
+        while not self._chunk:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._chunk = memoryview(chunk)
+        n = min(len(buffer), len(self._chunk))
+        buffer[:n] = self._chunk[:n]
+        self._chunk = self._chunk[n:]
+        self._position += n
+        return n
+    
+    def readall(self):
+        data = bytes(self._chunk) + b"".join(self._chunks)
+        self._chunk = memoryview(b"")
+        self._position += len(data)
+        return data
+    
+    def close(self):
+        self._chunks.close()
+        super().close()
+
+def export_file(table, fmt):
+    """Binary file streaming `table` as 'csv' or 'parquet'"""
+    return ExportStream(export_parquet(table) if fmt == "parquet" else export_csv(table))
+
+def read_csv_rows(file):
+    """Dict rows of an uploaded CSV file, read incrementally"""
+    import csv
+    
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        yield from csv.DictReader(text)
+    finally:
+        # Leave the upload itself open for the caller
+        text.detach()
+
+def read_parquet_rows(file, batch_size=IMPORT_BATCH_ROWS):
+    """Dict rows of an uploaded Parquet file, one record batch at a time"""
+    import pyarrow.parquet as pq
+    
+    for batch in pq.ParquetFile(file).iter_batches(batch_size=batch_size):
+        yield from batch.to_pylist()
+
+def parse_row(spec, row):
+    """Column values of one import row in spec order; raises ValueError"""
+    values = []
+    for name, kind in spec['columns'] + spec.get('extra', []):
+        value = row.get(name)
+        if value is None or value == "":
+            if name not in spec['defaults']:
+                raise ValueError(f"{name} is missing")
+            values.append(spec['defaults'][name])
+            continue
+        try:
+            values.append(TRANSFER_KINDS[kind][0](value))
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"{name}: {e}") from None
+    return values
+
+def existing_values(conn, table, column, values):
+    """Subset of `values` already present in table.column"""
+    values = list(values)
+    found = set()
+    for i in range(0, len(values), SQL_IN_CHUNK):
+        chunk = values[i:i + SQL_IN_CHUNK]
+        marks = ",".join("?" * len(chunk))
+        found.update(row[0] for row in conn.execute(f"SELECT {column} FROM {table} WHERE {column} IN ({marks})", chunk))
+    return found
+
+def import_rows(table, rows, batch_size=IMPORT_BATCH_ROWS):
+    """Validate dict rows for `table` and insert them batch by batch
+    
+    Keys that already exist (in the table or earlier in the file) are
+    skipped; invalid rows and rows naming an unknown user are rejected with
+    their row number. Each batch is one transaction together with the
+    aggregates it moves. Returns {'rows', 'inserted', 'duplicates',
+    'rejected', 'errors': [(row number, message)]}.
+    """
+    spec = TRANSFER_TABLES[table]
+    columns = [name for name, _ in spec['columns']]
+    fields = columns + [name for name, _ in spec.get('extra', [])]
+    owner = columns.index(spec['owner']) if 'owner' in spec else None
+    insert = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({','.join('?' * len(columns))})"
+    report = {'rows': 0, 'inserted': 0, 'duplicates': 0, 'rejected': 0, 'errors': []}
+    
+    def reject(number, message):
+        report['rejected'] += 1
+        if len(report['errors']) < IMPORT_MAX_ERRORS:
+            report['errors'].append((number, message))
+    
+    def commit(batch):
+        if table == "users":
+            # Plain passwords are hashed on the pool, outside the write transaction
+            plain = [values for _, values in batch if not values[1].startswith("scrypt$")]
+            for values, hashed in zip(plain, get_password_hasher().map(scrypt_hash, [values[1] for values in plain])):
+                values[1] = hashed
+        
+        with get_db().transaction() as conn:
+            existing = existing_values(conn, table, columns[0], {values[0] for _, values in batch if values[0] is not None})
+            owners = set()
+            if owner is not None:
+                owners = existing_values(conn, "users", "email", {values[owner] for _, values in batch})
+            
+            fresh = []
+            for number, values in batch:
+                if values[0] is not None and values[0] in existing:
+                    report['duplicates'] += 1
+                    continue
+                if owner is not None and values[owner] not in owners:
+                    reject(number, f"unknown user {values[owner]!r}")
+                    continue
+                if values[0] is not None:
+                    existing.add(values[0])
+                fresh.append(values)
+            
+            if fresh:
+                conn.executemany(insert, [values[:len(columns)] for values in fresh])
+                spec['imported'](conn, [dict(zip(fields, values)) for values in fresh])
+        
+        report['inserted'] += len(fresh)
+    
+    batch = []
+    for number, row in enumerate(rows, start=1):
+        report['rows'] += 1
+        try:
+            batch.append((number, parse_row(spec, row)))
+        except ValueError as e:
+            reject(number, str(e))
+        if len(batch) == batch_size:
+            commit(batch)
+            batch = []
+    if batch:
+        commit(batch)
+    
+    report['errors'].sort()
+    return report
+
+# ============================================
+# AUTHENTICATION PAGE
+# ============================================
+def auth_page():
+    """Login and Signup Page"""
+    st.markdown('<p class="hero-title">♻️ URAMix</p>', unsafe_allow_html=True)
+    st.markdown('<p class="hero-subtitle">Waste to Wealth | Clean India Mission</p>', unsafe_allow_html=True)
+    
+    st.markdown("---")
+    
+    col1, col2, col3 = st.columns([1, 2, 1])
+    
+    with col2:
+        st.markdown("""
+        <div style='text-align: center; padding: 20px; background: white; border-radius: 15px; box-shadow: 0 4px 12px rgba(0,0,0,0.1);'>
+            <h3 style='color: #2e7d32;'>🌍 Our Mission</h3>
+            <p style='color: #558b2f; font-size: 1.1em;'>
+                Make India Clean • Reduce Landfills<br>
+                Convert Waste to Value • Reward Citizens<br>
+                Affordable Natural Manure for Farmers
+            </p>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    st.markdown("---")
+    
+    col_left, col_center, col_right = st.columns([1, 2, 1])
+    
+    with col_center:
+        tab1, tab2 = st.tabs(["🔐 Login", "📝 Signup"])
+        
+        # LOGIN TAB
+        with tab1:
+            st.markdown("### Login to Your Account")
+            
+            login_email = st.text_input("Email / Username", key="login_email", placeholder="your.email@example.com")
+            login_password = st.text_input("Password", type="password", key="login_pass", placeholder="••••••••")
+            
+            col_a, col_b = st.columns(2)
+            
+            with col_a:
+                if st.button("Login", use_container_width=True, key="btn_login"):
+                    success, message = login_user(login_email, login_password)
+                    if success:
+                        st.success(message)
+                        st.balloons()
+                        st.rerun()
+                    else:
+                        st.error(message)
+            
+            with col_b:
+                if st.button("🔍 Google (Demo)", use_container_width=True, key="btn_google"):
+                    st.info("🔄 Google Sign-In - Demo Mode")
+        
+        # SIGNUP TAB
+        with tab2:
+            st.markdown("### Create New Account")
+            
+            signup_email = st.text_input("Email Address", key="signup_email", placeholder="your.email@example.com")
+            signup_password = st.text_input("Create Password", type="password", key="signup_pass", placeholder="Min. 6 characters")
+            signup_confirm = st.text_input("Confirm Password", type="password", key="confirm_pass", placeholder="Re-enter password")
+            
+            if st.button("Create Account", use_container_width=True, key="btn_signup"):
+                if signup_password != signup_confirm:
+                    st.error("❌ Passwords don't match!")
+                else:
+                    success, message = signup_user(signup_email, signup_password)
+                    if success:
+                        st.success(message)
+                    else:
+                        st.error(message)
+
+# ============================================
+# HOME PAGE
+# ============================================
+def home_page():
+    """Home Page with Problem Statements"""
+    st.markdown('<p class="hero-title">🌍 Welcome to URAMix</p>', unsafe_allow_html=True)
+    st.markdown('<p class="hero-subtitle">Transform Waste into Wealth | Build a Cleaner India</p>', unsafe_allow_html=True)
+    
+    # Hero Images
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown("""
+        <div style='text-align: center; padding: 20px; background: white; border-radius: 20px; box-shadow: 0 6px 20px rgba(0,0,0,0.1);'>
+            <div style='background: #e8f5e9; padding: 60px; border-radius: 15px; margin-bottom: 15px;'>
+                <div style='font-size: 80px;'>🗑️</div>
+            </div>
+            <h3 style='color: #2e7d32; margin: 15px 0;'>Smart Waste Collection</h3>
+            <p style='color: #666;'>Segregate & earn credits</p>
+        </div>
+        """, unsafe_allow_html=True)
     
     with col2:
         st.markdown("""
@@ -458,7 +3101,7 @@ def home_page():
         """, unsafe_allow_html=True)
     
     # Eco Quote
-    user = st.session_state.users.get(st.session_state.current_user, {})
+    user = get_user(st.session_state.current_user) or {}
     co2_reduced = user.get('co2_reduced', 0)
     credits = user.get('credits', 0)
     
@@ -541,16 +3184,54 @@ def home_page():
 # ============================================
 def user_dashboard():
     """User Dashboard Page"""
-    user = st.session_state.users.get(st.session_state.current_user)
+    email = st.session_state.current_user
     
-    if not user:
+    if not get_user(email):
         st.error("❌ User data not found!")
         return
     
     st.title("📊 Your Dashboard")
-    st.markdown(f"Welcome back, **{st.session_state.current_user}** 👋")
+    st.markdown(f"Welcome back, **{email}** 👋")
+    
+    # Each section is a fragment: its own widgets rerun only that section.
+    # Actions that change data shown elsewhere trigger one full rerun.
+    dashboard_metrics(email)
+    
+    st.markdown("---")
+    
+    # Virtual Dustbins
+    st.markdown("### 🗑️ Virtual Dustbin Status")
+    dashboard_bins(email)
+    
+    st.markdown("---")
+    
+    # Waste Submission
+    st.markdown("### ♻️ Submit Waste")
+    
+    col_a, col_b = st.columns([2, 1])
+    
+    with col_a:
+        dashboard_submit(email)
+    
+    with col_b:
+        dashboard_referral(email)
+    
+    # Withdrawal
+    st.markdown("---")
+    st.markdown("### 💰 Withdraw Credits")
+    dashboard_withdraw(email)
+    
+    # History
+    st.markdown("---")
+    st.markdown("### 📜 Waste History")
+    dashboard_history(email)
+
+@st.fragment
+@profiled_fragment
+def dashboard_metrics(email):
+    """Top metric cards"""
+    user = get_user(email)
     
-    # Top Metrics
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
@@ -573,7 +3254,7 @@ def user_dashboard():
     with col3:
         st.markdown(f"""
         <div class='metric-card'>
-            <div class='metric-value'>{len(user['waste_history'])}</div>
+            <div class='metric-value'>{user['history_count']}</div>
             <div class='metric-label'>🗑️ Submissions</div>
         </div>
         """, unsafe_allow_html=True)
@@ -585,11 +3266,25 @@ def user_dashboard():
             <div class='metric-label'>🌍 CO₂ Reduced</div>
         </div>
         """, unsafe_allow_html=True)
+
+@st.fragment
+@profiled_fragment
+def dashboard_bins(email):
+    """Organic and inorganic dustbin visuals"""
+    user = get_user(email)
+    forecaster = get_bin_forecaster()
+    rowid = user_rowid(email) if forecaster.computed_at else None
     
-    st.markdown("---")
-    
-    # Virtual Dustbins
-    st.markdown("### 🗑️ Virtual Dustbin Status")
+    def fill_outlook(code, fill):
+        """Caption with the bin's fill rate from the latest fleet forecast"""
+        forecast = forecaster.bin(code, rowid) if rowid is not None else None
+        if forecast is None:
+            return
+        rate = forecast[1]
+        if rate > 0:
+            st.caption(f"📈 +{rate:.1f}%/day · full in {format_hours((100 - fill) / rate * 24)}")
+        else:
+            st.caption("📉 Emptying faster than it fills")
     
     col_left, col_right = st.columns(2)
     
@@ -615,6 +3310,7 @@ def user_dashboard():
             st.warning("⚠️ Bin half full.")
         else:
             st.success("✅ Space available.")
+        fill_outlook(0, organic_fill)
     
     with col_right:
         st.markdown("#### 🔵 Inorganic Waste Bin")
@@ -638,47 +3334,31 @@ def user_dashboard():
             st.warning("⚠️ Bin half full.")
         else:
             st.success("✅ Space available.")
+        fill_outlook(1, inorganic_fill)
+
+@st.fragment
+@profiled_fragment
+def dashboard_submit(email):
+    """Waste type picker and submit button"""
+    waste_type = st.selectbox(
+        "Select Waste Type",
+        ["Organic Waste", "Inorganic Waste"],
+        key="waste_type_select"
+    )
     
-    st.markdown("---")
-    
-    # Waste Submission
-    st.markdown("### ♻️ Submit Waste")
-    
-    col_a, col_b = st.columns([2, 1])
-    
-    with col_a:
-        waste_type = st.selectbox(
-            "Select Waste Type",
-            ["Organic Waste", "Inorganic Waste"],
-            key="waste_type_select"
-        )
-        
-        st.info("""
-        **💡 Credit Information:**
-        - **Organic Waste:** 60+ credits
-        - **Inorganic Waste:** 35+ credits
-        - **Referral Bonus:** +20 credits (one-time)
-        """)
-    
-    with col_b:
-        st.markdown("#### 🎁 Referral")
-        if not user['referral_used']:
-            ref_code = st.text_input("Referral Code", key="ref_code", placeholder="Enter code")
-            if st.button("Apply", use_container_width=True, key="btn_ref"):
-                if ref_code:
-                    user['credits'] += 20
-                    user['referral_used'] = True
-                    st.success("🎉 +20 credits!")
-                    st.rerun()
-        else:
-            st.success("✅ Applied!")
+    st.info("""
+    **💡 Credit Information:**
+    - **Organic Waste:** 60+ credits
+    - **Inorganic Waste:** 35+ credits
+    - **Referral Bonus:** +20 credits (one-time)
+    """)
     
     if st.button("📤 Submit Waste Request", use_container_width=True, type="primary", key="btn_submit_waste"):
-        submission_id = f"{st.session_state.current_user}_{waste_type.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        submission_id = new_submission_id()
         
         submission = {
             'id': submission_id,
-            'user': st.session_state.current_user,
+            'user': email,
             'waste_type': waste_type,
             'status': 'pending',
             'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
@@ -686,21 +3366,36 @@ def user_dashboard():
             'quantity': 0
         }
         
-        st.session_state.waste_submissions.append(submission)
-        
-        if waste_type == "Organic Waste":
-            user['organic_bin'] = min(user['organic_bin'] + 15, 100)
-        else:
-            user['inorganic_bin'] = min(user['inorganic_bin'] + 15, 100)
+        add_submission(submission)
         
         st.success("✅ Request created!")
         st.info("⏳ Waiting for admin verification")
         st.balloons()
+        # Bins and the pending list live in other fragments
         st.rerun()
+
+@st.fragment
+@profiled_fragment
+def dashboard_referral(email):
+    """One-time referral code"""
+    st.markdown("#### 🎁 Referral")
     
-    # Withdrawal
-    st.markdown("---")
-    st.markdown("### 💰 Withdraw Credits")
+    if not get_user(email)['referral_used']:
+        ref_code = st.text_input("Referral Code", key="ref_code", placeholder="Enter code")
+        if st.button("Apply", use_container_width=True, key="btn_ref"):
+            if ref_code:
+                apply_referral(email)
+                st.success("🎉 +20 credits!")
+                # Credits show in the metrics and withdraw fragments
+                st.rerun()
+    else:
+        st.success("✅ Applied!")
+
+@st.fragment
+@profiled_fragment
+def dashboard_withdraw(email):
+    """Credit withdrawal"""
+    user = get_user(email)
     
     if user['credits'] >= 500:
         col_w1, col_w2 = st.columns(2)
@@ -722,28 +3417,56 @@ def user_dashboard():
         with col_w2:
             st.markdown("<br>", unsafe_allow_html=True)
             if st.button("💸 Withdraw Now", use_container_width=True, key="btn_withdraw"):
-                if user['credits'] >= withdraw:
-                    user['credits'] -= withdraw
+                if withdraw_credits(email, withdraw):
                     st.success(f"✅ Withdrawn ₹{w_rupees:.2f}!")
                     st.balloons()
+                    # Credits show in the metrics fragment
                     st.rerun()
     else:
         remaining = 500 - user['credits']
         st.warning(f"⚠️ Need **{remaining} more credits** (Min: 500)")
+
+@st.fragment
+@profiled_fragment
+def dashboard_history(email):
+    """Verified history (newest first, one page at a time) and pending submissions"""
+    page_size = st.selectbox("Per Page", HISTORY_PAGE_SIZES, key="history_page_size")
     
-    # History
-    st.markdown("---")
-    st.markdown("### 📜 Waste History")
-    
-    if user['waste_history']:
-        df = pd.DataFrame(user['waste_history'])
-        st.dataframe(df, use_container_width=True, hide_index=True)
+    # Keyset cursors (oldest id shown) of the pages before the current one
+    if st.session_state.get('history_filters') != (email, page_size):
+        st.session_state.history_filters = (email, page_size)
+        st.session_state.history_cursors = []
+    
+    cursors = st.session_state.history_cursors
+    history, has_more = get_waste_history(email, before=cursors[-1] if cursors else None, limit=page_size)
+    
+    if len(history['id']):
+        with profile_section("dataframes"):
+            st.dataframe(history_frame(history), use_container_width=True, hide_index=True)
+        
+        if cursors or has_more:
+            total = get_user(email)['history_count']
+            st.caption(f"Page {len(cursors) + 1} of {-(-total // page_size)} · {total} submissions")
+            
+            col_prev, col_next = st.columns(2)
+            
+            # Callbacks move the cursor before the fragment reruns, so no extra rerun is needed
+            with col_prev:
+                st.button(
+                    "⬅️ Newer", key="btn_history_prev", disabled=not cursors, use_container_width=True,
+                    on_click=cursors.pop
+                )
+            
+            with col_next:
+                st.button(
+                    "Older ➡️", key="btn_history_next", disabled=not has_more, use_container_width=True,
+                    on_click=cursors.append, args=(int(history['id'][-1]),)
+                )
     else:
         st.info("No submissions yet.")
     
     # Pending
-    pending = [s for s in st.session_state.waste_submissions 
-               if s['user'] == st.session_state.current_user and s['status'] == 'pending']
+    pending = list_pending_submissions(email)
     
     if pending:
         st.markdown("### ⏳ Pending Verifications")
@@ -759,7 +3482,7 @@ def user_dashboard():
 # ============================================
 def manure_store():
     """Manure Marketplace"""
-    user = st.session_state.users.get(st.session_state.current_user)
+    user = get_user(st.session_state.current_user)
     
     if not user:
         st.error("❌ User data not found!")
@@ -777,14 +3500,22 @@ def manure_store():
     </div>
     """, unsafe_allow_html=True)
     
+    manure_stock = get_manure_inventory().snapshot()['available']
+    manure_price = get_setting('manure_price')
+    hold = st.session_state.get('manure_hold')
+    if hold and hold['expires_at'] <= time.time():
+        release_manure(hold)
+        st.session_state.manure_hold = hold = None
+        st.warning("⌛ Your reservation expired")
+    
     # Stock Info
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        st.metric("📦 Stock", f"{st.session_state.manure_stock:.1f} kg")
+        st.metric("📦 Stock", f"{manure_stock:.1f} kg")
     
     with col2:
-        st.metric("💵 Price", f"₹{st.session_state.manure_price}/kg")
+        st.metric("💵 Price", f"₹{manure_price}/kg")
     
     with col3:
         st.metric("🛒 Your Purchases", f"{user['manure_purchased']:.1f} kg")
@@ -806,12 +3537,37 @@ def manure_store():
                 100% Organic • Community-Generated<br>
                 Affordable • Eco-Friendly
             </p>
-            <h1 style='color: #43a047; margin: 25px 0;'>₹{st.session_state.manure_price} per kg</h1>
+            <h1 style='color: #43a047; margin: 25px 0;'>₹{manure_price} per kg</h1>
         </div>
         """, unsafe_allow_html=True)
         
-        if st.session_state.manure_stock > 0:
-            max_qty = min(st.session_state.manure_stock, 50.0)
+        if hold:
+            st.info(
+                f"🔒 **{hold['kg']} kg reserved** for ₹{hold['amount']:.2f} · "
+                f"confirm by {datetime.fromtimestamp(hold['expires_at']).strftime('%H:%M:%S')}"
+            )
+            col_confirm, col_cancel = st.columns(2)
+            
+            with col_confirm:
+                if st.button("✅ Confirm Purchase", use_container_width=True, type="primary", key="btn_confirm_purchase"):
+                    st.session_state.manure_hold = None
+                    status = confirm_manure(hold)
+                    if status == 'ok':
+                        st.success(f"✅ Purchased {hold['kg']} kg!")
+                        st.balloons()
+                        st.rerun()
+                    elif status == 'expired':
+                        st.error("⌛ Reservation expired!")
+                    else:
+                        st.error("❌ Insufficient stock!")
+            
+            with col_cancel:
+                if st.button("✖️ Cancel", use_container_width=True, key="btn_cancel_reservation"):
+                    release_manure(hold)
+                    st.session_state.manure_hold = None
+                    st.rerun()
+        elif manure_stock > 0:
+            max_qty = min(manure_stock, 50.0)
             quantity = st.number_input(
                 "Quantity (kg)",
                 min_value=1.0,
@@ -821,168 +3577,525 @@ def manure_store():
                 key="manure_qty"
             )
             
-            total = quantity * st.session_state.manure_price
+            total = quantity * manure_price
             st.info(f"💰 **Total:** ₹{total:.2f}")
             
-            if st.button("🛒 Purchase Now", use_container_width=True, type="primary", key="btn_purchase"):
-                if st.session_state.manure_stock >= quantity:
-                    st.session_state.manure_stock -= quantity
-                    user['manure_purchased'] += quantity
-                    
-                    st.session_state.manure_sales.append({
-                        'date': datetime.now().strftime('%Y-%m-%d'),
-                        'user': st.session_state.current_user,
-                        'quantity': quantity,
-                        'amount': total
-                    })
-                    
-                    st.success(f"✅ Purchased {quantity} kg!")
-                    st.balloons()
+            if st.button("🛒 Reserve", use_container_width=True, type="primary", key="btn_purchase"):
+                hold = reserve_manure(st.session_state.current_user, quantity, total)
+                if hold:
+                    st.session_state.manure_hold = hold
                     st.rerun()
                 else:
                     st.error("❌ Insufficient stock!")
         else:
             st.error("❌ Out of Stock!")
 
+# ============================================
+# ANALYTICS CHARTS
+# ============================================
+def figure_png(fig):
+    """Encode a matplotlib figure as PNG bytes"""
+    buffer = BytesIO()
+    fig.savefig(buffer, format="png")
+    return buffer.getvalue()
+
+SERIES_STEP_LABELS = {'hour': "Hourly", 'day': "Daily", 'week': "Weekly", 'month': "Monthly"}
+SERIES_COLORS = ['#43a047', '#1e88e5']
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def waste_series_chart(version, start, end):
+    """Stacked waste bars per type over hour buckets [start, end], downsampled to fit"""
+    from matplotlib.figure import Figure
+    import matplotlib.dates as mdates
+    import numpy as np
+    
+    starts, step, totals = get_waste_series(version).resample(start, end)
+    # Bars span their period (months vary in length)
+    edges = np.append(starts, series_period_starts(series_periods(np.array([end], dtype=np.int64), step) + 1, step))
+    widths = np.diff(edges).astype('timedelta64[m]').astype(np.float64) / (24 * 60)
+    
+    fig1 = Figure(figsize=(10, 5))
+    ax1 = fig1.subplots()
+    bottom = np.zeros(len(starts))
+    for waste_type, kg, color in zip(WASTE_TYPES, totals, SERIES_COLORS):
+        ax1.bar(starts, kg, width=widths, bottom=bottom, align='edge', color=color, alpha=0.8, label=waste_type)
+        bottom += kg
+    
+    locator = mdates.AutoDateLocator()
+    ax1.xaxis.set_major_locator(locator)
+    ax1.xaxis.set_major_formatter(mdates.ConciseDateFormatter(locator))
+    ax1.set_ylabel('Waste (kg)', fontsize=12, fontweight='bold')
+    ax1.set_title(f'{SERIES_STEP_LABELS[step]} Waste Collection', fontsize=14, fontweight='bold')
+    ax1.grid(axis='y', alpha=0.3)
+    ax1.legend()
+    fig1.tight_layout()
+    return figure_png(fig1)
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def manure_sales_chart(version):
+    """Manure sales line chart; `version` changes whenever manure_sales does"""
+    from matplotlib.figure import Figure
+    
+    sales = get_daily_manure_sales()
+    
+    fig2 = Figure(figsize=(10, 5))
+    ax2 = fig2.subplots()
+    ax2.plot(list(sales.keys()), list(sales.values()), marker='o', color='#f57c00', linewidth=3, markersize=10)
+    ax2.set_xlabel('Date', fontsize=12, fontweight='bold')
+    ax2.set_ylabel('Quantity (kg)', fontsize=12, fontweight='bold')
+    ax2.set_title('Manure Sales', fontsize=14, fontweight='bold')
+    ax2.grid(True, alpha=0.3)
+    ax2.tick_params(axis='x', labelrotation=45)
+    fig2.tight_layout()
+    return figure_png(fig2)
+
 # ============================================
 # ADMIN DASHBOARD
 # ============================================
+def verification_queue():
+    """Paged pending queue - widgets are built for the visible page only"""
+    col_f1, col_f2, col_f3, col_f4 = st.columns(4)
+    
+    with col_f1:
+        waste_filter = st.selectbox("Waste Type", ["All", "Organic Waste", "Inorganic Waste"], key="queue_type")
+    
+    with col_f2:
+        user_filter = st.text_input("User", key="queue_user", placeholder="user@example.com").strip()
+    
+    with col_f3:
+        day_filter = st.date_input("Date", value=None, key="queue_day")
+    
+    with col_f4:
+        page_size = st.selectbox("Per Page", QUEUE_PAGE_SIZES, key="queue_page_size")
+    
+    filters = (waste_filter, user_filter, day_filter, page_size)
+    
+    # Keyset cursors of the pages before the current one
+    if st.session_state.get('queue_filters') != filters:
+        st.session_state.queue_filters = filters
+        st.session_state.queue_cursors = []
+    
+    cursors = st.session_state.queue_cursors
+    
+    pending, has_more = list_pending_page(
+        after=cursors[-1] if cursors else None,
+        limit=page_size,
+        waste_type=None if waste_filter == "All" else waste_filter,
+        user=user_filter or None,
+        day=day_filter.strftime('%Y-%m-%d') if day_filter else None
+    )
+    
+    if not pending and cursors:
+        cursors.pop()
+        st.rerun()
+    
+    if pending:
+        st.markdown(f"**{count_submissions('pending')} Pending** · Page {len(cursors) + 1}")
+        
+        # Credits for the whole page in one call; the quantity inputs hold last run's values
+        page_credits, page_co2 = calculate_credits_batch(
+            [sub['waste_type'] for sub in pending],
+            [st.session_state.get(f"qty_{sub['id']}", 5.0) for sub in pending]
+        )
+        
+        for sub, credits, co2 in zip(pending, page_credits.tolist(), page_co2.tolist()):
+            with st.expander(f"🗑️ {sub['waste_type']} - {sub['user']} - {sub['timestamp']}"):
+                col_a, col_b = st.columns([2, 1])
+                
+                with col_a:
+                    st.write(f"**User:** {sub['user']}")
+                    st.write(f"**Type:** {sub['waste_type']}")
+                    st.write(f"**Time:** {sub['timestamp']}")
+                    
+                    st.number_input(
+                        "Verified Quantity (kg)",
+                        min_value=0.5,
+                        value=5.0,
+                        step=0.5,
+                        key=f"qty_{sub['id']}"
+                    )
+                    
+                    st.info(f"💳 Credits: {credits} | 🌍 CO₂: {co2}%")
+                
+                with col_b:
+                    st.button(
+                        "✅ Verify", key=f"verify_{sub['id']}", use_container_width=True,
+                        on_click=verify_clicked, args=([sub], f"✅ Verify · {sub['user']} · {sub['waste_type']}")
+                    )
+        
+        st.button(
+            f"✅ Verify All {len(pending)} on Page", key="btn_verify_page", use_container_width=True,
+            on_click=verify_clicked, args=(pending, f"✅ Verify {len(pending)} on page")
+        )
+        
+        col_prev, col_next = st.columns(2)
+        
+        with col_prev:
+            if st.button("⬅️ Previous", key="btn_queue_prev", disabled=not cursors, use_container_width=True):
+                cursors.pop()
+                st.rerun()
+        
+        with col_next:
+            if st.button("Next ➡️", key="btn_queue_next", disabled=not has_more, use_container_width=True):
+                last = pending[-1]
+                cursors.append((last['timestamp'], last['id']))
+                st.rerun()
+    else:
+        st.info("✅ No pending!")
+
+def verify_clicked(subs, label):
+    """Queue verification of submissions at their entered quantities"""
+    credits, co2 = calculate_credits_batch(
+        [sub['waste_type'] for sub in subs],
+        [st.session_state.get(f"qty_{sub['id']}", 5.0) for sub in subs]
+    )
+    ids = queue_verifications([
+        (sub, qr_token(sub['id']), st.session_state.get(f"qty_{sub['id']}", 5.0), c, k)
+        for sub, c, k in zip(subs, credits.tolist(), co2.tolist())
+    ])
+    add_job_group('verify', label, ids)
+
+def redeem_clicked(bulk):
+    """Queue redemption of the entered QR code(s)"""
+    if bulk:
+        codes = parse_qr_list(st.session_state.get('qr_bulk_input', ""))
+        bulk_file = st.session_state.get('qr_bulk_file')
+        if bulk_file is not None:
+            codes += parse_qr_list(bulk_file.getvalue().decode("utf-8", errors="ignore"))
+        label = f"🔓 Redeem {len(codes)} QR codes"
+    else:
+        codes = [st.session_state.get('qr_scan_input', "").strip()]
+        label = f"🔓 Redeem {codes[0]}"
+    
+    codes = [code for code in codes if code]
+    if codes:
+        add_job_group('redeem', label, queue_redemptions(codes))
+
+def add_job_group(kind, label, ids):
+    """Report on a set of queued jobs in the job panel"""
+    groups = st.session_state.job_groups
+    groups.insert(0, {'kind': kind, 'label': label, 'ids': ids, 'at': time.time()})
+    del groups[JOB_GROUPS_SHOWN:]
+
+def clear_job_groups():
+    """Forget finished job groups"""
+    queue = get_job_queue()
+    groups = st.session_state.job_groups
+    jobs = queue.statuses([job_id for group in groups for job_id in group['ids']])
+    groups[:] = [
+        group for group in groups
+        if any(jobs.get(job_id, {}).get('status') in ('queued', 'running') for job_id in group['ids'])
+    ]
+
+# Not profiled: it reruns every JOB_PANEL_REFRESH and would flood the rerun log
+@st.fragment(run_every=JOB_PANEL_REFRESH)
+def job_panel():
+    """Background job queue depth and this session's recent jobs, refreshed while the page is open"""
+    queue = get_job_queue()
+    depth = queue.depth()
+    groups = st.session_state.job_groups
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric("⏳ Jobs Queued", depth['queued'])
+    
+    with col2:
+        st.metric("⚙️ Jobs Running", depth['running'])
+    
+    with col3:
+        st.metric("❌ Jobs Failed", depth['failed'])
+    
+    if not groups:
+        return
+    
+    jobs = queue.statuses([job_id for group in groups for job_id in group['ids']])
+    
+    for group in groups:
+        with st.container(border=True):
+            job_group(group, [jobs[job_id] for job_id in group['ids'] if job_id in jobs])
+    
+    st.button("🧹 Clear Finished", key="btn_clear_jobs", on_click=clear_job_groups)
+
+def job_group(group, jobs):
+    """Progress and results of one set of jobs"""
+    import pandas as pd
+    
+    done = [job for job in jobs if job['status'] == 'done']
+    failed = [job for job in jobs if job['status'] == 'failed']
+    
+    st.markdown(f"**{group['label']}**")
+    if len(done) + len(failed) < len(jobs):
+        retrying = sum(1 for job in jobs if job['status'] == 'queued' and job['attempts'])
+        st.progress(
+            (len(done) + len(failed)) / len(jobs),
+            text=f"⏳ {len(done) + len(failed)}/{len(jobs)} done" + (f" · {retrying} retrying" if retrying else "")
+        )
+    
+    for job in failed:
+        st.error(f"❌ {job['key']}: {job['error']}")
+    
+    # Submitting a finished job again returns it: its effects belong to the earlier click
+    repeats = {id(job) for job in done if job['run_at'] < group['at']}
+    
+    if group['kind'] == 'verify':
+        codes = [job['result']['qr_data'] for job in done if job['result']['verified'] and id(job) not in repeats]
+        already = len(done) - len(codes)
+        if already:
+            st.warning(f"⚠️ {already} already verified!")
+        if not codes:
+            return
+        
+        # Rendered by the worker, so these come from the image cache
+        images = generate_qr_codes(codes)
+        st.success(f"✅ {len(codes)} QR Codes Generated!")
+        qr_cols = st.columns(4)
+        for i, qr_data in enumerate(codes):
+            with qr_cols[i % 4]:
+                st.image(f"data:image/png;base64,{images[qr_data]}", width=250 if len(jobs) == 1 else 160)
+                st.code(qr_data)
+        return
+    
+    results = [
+        dict(job['result'], status='scanned', manure=0.0) if id(job) in repeats and job['result']['status'] == 'redeemed'
+        else job['result']
+        for job in done
+    ]
+    if len(jobs) == 1:
+        for result in results:
+            if result['status'] == 'redeemed':
+                if result['manure']:
+                    st.success(f"🌿 +{result['manure']:.2f} kg manure!")
+                
+                st.success(f"""
+✅ **QR Processed!**
+👤 {result['user']}
+💳 {result['credits']} credits
+🌍 {result['co2_reduction']}% CO₂
+📦 {result['quantity']} kg
+                """)
+            elif result['status'] == 'no_user':
+                st.error("❌ User not found!")
+            elif result['status'] == 'scanned':
+                st.warning("⚠️ Already scanned!")
+            else:
+                st.error("❌ Invalid QR!")
+        return
+    
+    if not results:
+        return
+    
+    labels = {
+        'redeemed': "✅ Redeemed",
+        'scanned': "⚠️ Already scanned",
+        'no_user': "❌ User not found",
+        'invalid': "❌ Invalid"
+    }
+    
+    redeemed = [result for result in results if result['status'] == 'redeemed']
+    st.success(
+        f"✅ {len(redeemed)}/{len(results)} redeemed · "
+        f"💳 {sum(result['credits'] for result in redeemed)} credits · "
+        f"📦 {sum(result['quantity'] for result in redeemed):.1f} kg · "
+        f"🌿 +{sum(result['manure'] for result in results):.2f} kg manure"
+    )
+    
+    with profile_section("dataframes"):
+        df = pd.DataFrame([{
+            'QR Code': result['code'],
+            'Result': labels[result['status']],
+            'User': result['user'],
+            'Credits': result['credits'],
+            'Quantity (kg)': result['quantity']
+        } for result in results])
+        st.dataframe(df, use_container_width=True, hide_index=True)
+
+def sales_history():
+    """Sales summary for a date range (from daily rollups) over a paged table of raw sales"""
+    import pandas as pd
+    
+    today = datetime.now().date()
+    period = st.date_input("Period", value=(today - timedelta(days=29), today), key="sales_period")
+    
+    # The range picker yields a single date while the end is being chosen
+    if len(period) == 2:
+        summary = get_manure_sales_range(period[0].strftime('%Y-%m-%d'), period[1].strftime('%Y-%m-%d'))
+        
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            st.metric("Sold", f"{summary['kg']:.1f} kg")
+        
+        with col2:
+            st.metric("Revenue", f"₹{summary['revenue']:.2f}")
+        
+        with col3:
+            st.metric("Orders", summary['orders'])
+        
+        with col4:
+            st.metric("Buyers", summary['buyers'])
+    
+    page_size = st.selectbox("Per Page", SALES_PAGE_SIZES, key="sales_page_size")
+    
+    # Keyset cursors (oldest id shown) of the pages before the current one
+    if st.session_state.get('sales_filters') != page_size:
+        st.session_state.sales_filters = page_size
+        st.session_state.sales_cursors = []
+    
+    cursors = st.session_state.sales_cursors
+    sales, has_more = list_manure_sales_page(before=cursors[-1] if cursors else None, limit=page_size)
+    
+    with profile_section("dataframes"):
+        df = pd.DataFrame(sales, columns=['id', 'date', 'user', 'quantity', 'amount']).drop(columns='id')
+        st.dataframe(df, use_container_width=True, hide_index=True)
+    
+    col_prev, col_next = st.columns(2)
+    
+    with col_prev:
+        st.button(
+            "⬅️ Newer", key="btn_sales_prev", disabled=not cursors, use_container_width=True,
+            on_click=cursors.pop
+        )
+    
+    with col_next:
+        st.button(
+            "Older ➡️", key="btn_sales_next", disabled=not has_more, use_container_width=True,
+            on_click=cursors.append, args=(sales[-1]['id'] if sales else None,)
+        )
+
+def users_table():
+    """Searchable, sortable Users table - only the visible page is queried and sent"""
+    import pandas as pd
+    
+    col_f1, col_f2, col_f3, col_f4 = st.columns([3, 2, 1, 1])
+    
+    with col_f1:
+        search = st.text_input("Search", key="users_search", placeholder="Email starts with...").strip()
+    
+    with col_f2:
+        sort_label = st.selectbox("Sort By", list(USER_SORTS), key="users_sort")
+    
+    with col_f3:
+        descending = st.toggle("Descending", key="users_desc")
+    
+    with col_f4:
+        page_size = st.selectbox("Per Page", USERS_PAGE_SIZES, key="users_page_size")
+    
+    sort = USER_SORTS[sort_label]
+    filters = (search, sort, descending, page_size)
+    
+    # Keyset cursors (last row's sort keys) of the pages before the current one
+    if st.session_state.get('users_filters') != filters:
+        st.session_state.users_filters = filters
+        st.session_state.users_cursors = []
+    
+    cursors = st.session_state.users_cursors
+    rows, next_after = list_users_page(search, sort, descending, cursors[-1] if cursors else None, page_size)
+    
+    if not rows:
+        st.info("No matching users.")
+        return
+    
+    with profile_section("dataframes"):
+        df = pd.DataFrame.from_records(
+            rows, columns=['Email', 'Credits', 'Submissions', 'Manure (kg)', 'CO₂ (%)']
+        )
+        df.insert(2, 'Wallet (₹)', df['Credits'] / 20)
+        st.dataframe(
+            df,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                'Wallet (₹)': st.column_config.NumberColumn(format="%.2f"),
+                'Manure (kg)': st.column_config.NumberColumn(format="%.1f"),
+                'CO₂ (%)': st.column_config.NumberColumn(format="%.1f")
+            }
+        )
+    
+    total = count_users(search)
+    st.caption(f"Page {len(cursors) + 1} of {max(1, -(-total // page_size))} · {total} users")
+    
+    col_prev, col_next = st.columns(2)
+    
+    with col_prev:
+        st.button(
+            "⬅️ Previous", key="btn_users_prev", disabled=not cursors, use_container_width=True,
+            on_click=cursors.pop
+        )
+    
+    with col_next:
+        st.button(
+            "Next ➡️", key="btn_users_next", disabled=next_after is None, use_container_width=True,
+            on_click=cursors.append, args=(next_after,)
+        )
+
 def admin_dashboard():
     """Admin Dashboard"""
     st.title("🔧 Admin Dashboard")
     st.markdown("**Manage URAMix System**")
     
-    tab1, tab2, tab3, tab4 = st.tabs([
+    job_panel()
+    
+    tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs([
         "📱 QR Verification",
         "🌿 Manure",
         "📊 Analytics",
-        "👥 Users"
+        "👥 Users",
+        "🚛 Collection",
+        "💾 Data",
+        "⏱️ Performance"
     ])
     
     # TAB 1: QR VERIFICATION
     with tab1:
         st.markdown("### 📱 Waste Verification")
         
-        pending = [s for s in st.session_state.waste_submissions if s['status'] == 'pending']
-        
-        if pending:
-            st.markdown(f"**{len(pending)} Pending**")
-            
-            for sub in pending:
-                with st.expander(f"🗑️ {sub['waste_type']} - {sub['user']} - {sub['timestamp']}"):
-                    col_a, col_b = st.columns([2, 1])
-                    
-                    with col_a:
-                        st.write(f"**User:** {sub['user']}")
-                        st.write(f"**Type:** {sub['waste_type']}")
-                        st.write(f"**Time:** {sub['timestamp']}")
-                        
-                        qty = st.number_input(
-                            "Verified Quantity (kg)",
-                            min_value=0.5,
-                            value=5.0,
-                            step=0.5,
-                            key=f"qty_{sub['id']}"
-                        )
-                        
-                        credits, co2 = calculate_credits(sub['waste_type'], qty)
-                        st.info(f"💳 Credits: {credits} | 🌍 CO₂: {co2}%")
-                    
-                    with col_b:
-                        if st.button("✅ Verify", key=f"verify_{sub['id']}", use_container_width=True):
-                            qr_data = sub['id']
-                            qr_img = generate_qr_code(qr_data)
-                            
-                            if qr_img:
-                                st.session_state.qr_codes[qr_data] = {
-                                    'submission_id': sub['id'],
-                                    'user': sub['user'],
-                                    'waste_type': sub['waste_type'],
-                                    'credits': credits,
-                                    'co2_reduction': co2,
-                                    'quantity': qty,
-                                    'scanned': False
-                                }
-                                
-                                sub['status'] = 'verified'
-                                sub['quantity'] = qty
-                                sub['credits'] = credits
-                                
-                                st.success("✅ QR Generated!")
-                                st.image(f"data:image/png;base64,{qr_img}", width=250)
-                                st.code(qr_data)
-        else:
-            st.info("✅ No pending!")
+        verification_queue()
         
         st.markdown("---")
         st.markdown("### 🔍 Scan QR")
         
-        qr_input = st.text_input("QR Code Data", key="qr_scan_input")
+        scan_mode = st.radio("Mode", ["Single", "Bulk"], horizontal=True, key="qr_scan_mode")
         
-        if st.button("🔓 Process QR", key="btn_process_qr"):
-            if qr_input in st.session_state.qr_codes:
-                qr_info = st.session_state.qr_codes[qr_input]
-                
-                if not qr_info['scanned']:
-                    user = st.session_state.users.get(qr_info['user'])
-                    
-                    if user:
-                        user['credits'] += qr_info['credits']
-                        user['co2_reduced'] += qr_info['co2_reduction']
-                        
-                        user['waste_history'].append({
-                            'Date': datetime.now().strftime('%Y-%m-%d'),
-                            'Type': qr_info['waste_type'],
-                            'Quantity (kg)': qr_info['quantity'],
-                            'Credits': qr_info['credits'],
-                            'Status': 'Verified ✅'
-                        })
-                        
-                        if qr_info['waste_type'] == "Organic Waste":
-                            user['organic_bin'] = max(0, user['organic_bin'] - 20)
-                            manure = update_manure_stock(qr_info['quantity'])
-                            st.success(f"🌿 +{manure:.2f} kg manure!")
-                        else:
-                            user['inorganic_bin'] = max(0, user['inorganic_bin'] - 20)
-                        
-                        qr_info['scanned'] = True
-                        st.session_state.total_credits_issued += qr_info['credits']
-                        
-                        today = datetime.now().strftime('%Y-%m-%d')
-                        if today not in st.session_state.daily_waste:
-                            st.session_state.daily_waste[today] = 0
-                        st.session_state.daily_waste[today] += qr_info['quantity']
-                        
-                        st.success(f"""
-✅ **QR Processed!**
-👤 {qr_info['user']}
-💳 {qr_info['credits']} credits
-🌍 {qr_info['co2_reduction']}% CO₂
-📦 {qr_info['quantity']} kg
-                        """)
-                        st.balloons()
-                    else:
-                        st.error("❌ User not found!")
-                else:
-                    st.warning("⚠️ Already scanned!")
-            else:
-                st.error("❌ Invalid QR!")
+        if scan_mode == "Single":
+            qr_input = st.text_input("QR Code Data", key="qr_scan_input")
+            
+            if st.button("🔓 Process QR", key="btn_process_qr", on_click=redeem_clicked, args=(False,)):
+                if not qr_input.strip():
+                    st.warning("⚠️ No QR code entered!")
+        else:
+            bulk_text = st.text_area(
+                "QR Codes (one per line or comma-separated)",
+                key="qr_bulk_input",
+                height=150
+            )
+            bulk_file = st.file_uploader("Or upload a CSV/TXT file", type=["csv", "txt"], key="qr_bulk_file")
+            
+            if st.button("🔓 Process All", key="btn_process_bulk", on_click=redeem_clicked, args=(True,)):
+                if not bulk_text.strip() and bulk_file is None:
+                    st.warning("⚠️ No QR codes entered!")
     
     # TAB 2: MANURE MANAGEMENT
     with tab2:
         st.markdown("### 🌿 Manure Management")
         
-        col1, col2, col3 = st.columns(3)
+        manure_price = get_setting('manure_price')
+        totals = get_aggregates()
+        
+        inventory = get_manure_inventory().snapshot()
+        col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            st.metric("Stock", f"{st.session_state.manure_stock:.1f} kg")
+            st.metric("Stock", f"{get_setting('manure_stock'):.1f} kg")
         
         with col2:
-            st.metric("Price", f"₹{st.session_state.manure_price}/kg")
+            st.metric("Reserved", f"{inventory['held']:.1f} kg", f"{inventory['holds']} holds", delta_color="off")
         
         with col3:
-            total_sold = sum([s['quantity'] for s in st.session_state.manure_sales])
-            st.metric("Sold", f"{total_sold:.1f} kg")
+            st.metric("Price", f"₹{manure_price}/kg")
+        
+        with col4:
+            st.metric("Sold", f"{totals['manure_sold_kg']:.1f} kg")
         
         st.markdown("---")
         
@@ -993,28 +4106,26 @@ def admin_dashboard():
             add_stock = st.number_input("Stock (kg)", min_value=0.0, value=50.0, step=10.0, key="add_stock_input")
             
             if st.button("➕ Add", key="btn_add_stock"):
-                st.session_state.manure_stock += add_stock
+                add_manure_stock(add_stock)
                 st.success(f"✅ +{add_stock} kg!")
                 st.rerun()
         
         with col_b:
             st.markdown("#### Update Price")
-            new_price = st.number_input("Price (₹/kg)", min_value=10, value=st.session_state.manure_price, step=5, key="price_input")
+            new_price = st.number_input("Price (₹/kg)", min_value=10, value=manure_price, step=5, key="price_input")
             
             if st.button("💰 Update", key="btn_update_price"):
-                st.session_state.manure_price = new_price
+                set_manure_price(new_price)
                 st.success(f"✅ ₹{new_price}/kg!")
                 st.rerun()
         
         st.markdown("---")
         st.markdown("#### Sales History")
         
-        if st.session_state.manure_sales:
-            df = pd.DataFrame(st.session_state.manure_sales)
-            st.dataframe(df, use_container_width=True, hide_index=True)
+        if totals['manure_orders']:
+            sales_history()
             
-            revenue = sum([s['amount'] for s in st.session_state.manure_sales])
-            st.success(f"💰 Revenue: ₹{revenue:.2f}")
+            st.success(f"💰 Revenue: ₹{totals['manure_revenue']:.2f}")
         else:
             st.info("No sales yet.")
     
@@ -1025,80 +4136,60 @@ def admin_dashboard():
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            st.metric("Users", len(st.session_state.users))
+            st.metric("Users", totals['users'])
         
         with col2:
-            st.metric("Credits", st.session_state.total_credits_issued)
+            st.metric("Credits", totals['credits_issued'])
         
         with col3:
-            total_waste = sum(st.session_state.daily_waste.values())
-            st.metric("Waste (kg)", f"{total_waste:.1f}")
+            st.metric("Waste (kg)", f"{totals['waste_kg']:.1f}")
         
         with col4:
-            verified = len([s for s in st.session_state.waste_submissions if s['status'] == 'verified'])
-            st.metric("Verified", verified)
+            st.metric("Verified", totals.get('submissions_verified', 0))
+        
+        if st.button("🔍 Check Totals", key="btn_check_totals"):
+            mismatches = check_aggregates(repair=True)
+            if mismatches:
+                st.warning(f"⚠️ Repaired {len(mismatches)} totals: " + ", ".join(
+                    f"{key} {stored} → {actual}" for key, (stored, actual) in mismatches.items()
+                ))
+            else:
+                st.success("✅ All totals consistent!")
         
         st.markdown("---")
         
-        if st.session_state.daily_waste:
-            st.markdown("#### Daily Waste Collection")
+        if totals['daily_waste_version']:
+            st.markdown("#### Waste Collection")
+            series = get_waste_series(totals['daily_waste_version'])
+            period = st.selectbox("Period", list(WASTE_PERIODS), index=len(WASTE_PERIODS) - 1, key="waste_period")
             
-            dates = list(st.session_state.daily_waste.keys())
-            quantities = list(st.session_state.daily_waste.values())
+            end = series_bucket(datetime.now())
+            days = WASTE_PERIODS[period]
+            start = end - days * 24 + 1 if days else min(series.first_bucket() or end, end)
             
-            fig1, ax1 = plt.subplots(figsize=(10, 5))
-            ax1.bar(dates, quantities, color='#43a047', alpha=0.8, edgecolor='#2e7d32', linewidth=2)
-            ax1.set_xlabel('Date', fontsize=12, fontweight='bold')
-            ax1.set_ylabel('Waste (kg)', fontsize=12, fontweight='bold')
-            ax1.set_title('Daily Waste Collection', fontsize=14, fontweight='bold')
-            ax1.grid(axis='y', alpha=0.3)
-            plt.xticks(rotation=45)
-            plt.tight_layout()
-            st.pyplot(fig1)
-            plt.close()
-        
-        if st.session_state.manure_sales:
+            st.caption(" · ".join(
+                f"{waste_type}: {series.total(code, start, end):,.1f} kg" for code, waste_type in enumerate(WASTE_TYPES)
+            ))
+            with profile_section("charts"):
+                st.image(waste_series_chart(totals['daily_waste_version'], start, end), use_container_width=True)
+        
+        if totals['manure_sales_version']:
             st.markdown("#### Manure Sales Trend")
-            
-            df = pd.DataFrame(st.session_state.manure_sales)
-            sales = df.groupby('date')['quantity'].sum()
-            
-            fig2, ax2 = plt.subplots(figsize=(10, 5))
-            ax2.plot(sales.index, sales.values, marker='o', color='#f57c00', linewidth=3, markersize=10)
-            ax2.set_xlabel('Date', fontsize=12, fontweight='bold')
-            ax2.set_ylabel('Quantity (kg)', fontsize=12, fontweight='bold')
-            ax2.set_title('Manure Sales', fontsize=14, fontweight='bold')
-            ax2.grid(True, alpha=0.3)
-            plt.xticks(rotation=45)
-            plt.tight_layout()
-            st.pyplot(fig2)
-            plt.close()
+            with profile_section("charts"):
+                st.image(manure_sales_chart(totals['manure_sales_version']), use_container_width=True)
     
     # TAB 4: USERS
     with tab4:
         st.markdown("### 👥 Users")
         
-        if st.session_state.users:
-            users_data = []
-            
-            for email, data in st.session_state.users.items():
-                users_data.append({
-                    'Email': email,
-                    'Credits': data['credits'],
-                    'Wallet (₹)': f"{data['credits']/20:.2f}",
-                    'Submissions': len(data['waste_history']),
-                    'Manure (kg)': f"{data['manure_purchased']:.1f}",
-                    'CO₂ (%)': f"{data['co2_reduced']:.1f}"
-                })
-            
-            df = pd.DataFrame(users_data)
-            st.dataframe(df, use_container_width=True, hide_index=True)
+        if totals['users']:
+            users_table()
             
             st.markdown("---")
             st.markdown("#### Statistics")
             
-            total_credits = sum([u['credits'] for u in st.session_state.users.values()])
-            total_co2 = sum([u['co2_reduced'] for u in st.session_state.users.values()])
+            total_credits = totals['credit_balance']
+            total_co2 = totals['co2_reduced']
             
             col1, col2, col3 = st.columns(3)
             
@@ -1112,17 +4203,218 @@ def admin_dashboard():
                 st.metric("CO₂ Reduced", f"{total_co2:.1f}%")
         else:
             st.info("No users yet.")
+    
+    # TAB 5: COLLECTION
+    with tab5:
+        collection_panel()
+    
+    # TAB 6: DATA
+    with tab6:
+        data_panel()
+    
+    # TAB 7: PERFORMANCE
+    with tab7:
+        performance_panel()
+
+@st.fragment
+@profiled_fragment
+def collection_panel():
+    """Bins forecast to overflow soon, most urgent first"""
+    import pandas as pd
+    
+    st.markdown("### 🚛 Collection")
+    
+    forecaster = get_bin_forecaster()
+    if st.button("🔄 Recompute Forecast", key="btn_recompute_forecast") or forecaster.due():
+        with st.spinner("Forecasting every bin..."):
+            forecaster.recompute()
+    
+    emptied = st.session_state.pop('bins_emptied', 0)
+    if emptied:
+        st.success(f"✅ {emptied} bins emptied!")
+    
+    horizon = st.selectbox("Overflowing Within", list(OVERFLOW_HORIZONS), key="overflow_horizon")
+    hours = OVERFLOW_HORIZONS[horizon]
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric("Full Now", forecaster.count_within(0))
+    
+    with col2:
+        st.metric(f"Full Within {horizon}", forecaster.count_within(hours))
+    
+    with col3:
+        st.metric("Forecast", forecaster.computed_at.strftime('%H:%M:%S'), f"{forecaster.compute_ms:.0f} ms", delta_color="off")
+    
+    urgent = forecaster.overflowing(hours)
+    if not urgent:
+        st.success("✅ No bins about to overflow.")
+        return
+    
+    rowids = sorted({rowid for *_, rowid in urgent})
+    marks = ",".join("?" * len(rowids))
+    emails = {row['rowid']: row['email'] for row in fetch_all(f"SELECT rowid, email FROM users WHERE rowid IN ({marks})", rowids)}
+    
+    with profile_section("dataframes"):
+        df = pd.DataFrame([{
+            'User': emails.get(rowid, "?"),
+            'Bin': WASTE_TYPES[code],
+            'Fill (%)': fill,
+            'Fill Rate (%/day)': round(rate, 1),
+            'Overflows In': format_hours(hours_left)
+        } for hours_left, fill, rate, code, rowid in urgent])
+        st.dataframe(df, use_container_width=True, hide_index=True)
+    
+    labels = {f"{emails[rowid]} · {WASTE_TYPES[code]}": (emails[rowid], code) for *_, code, rowid in urgent if rowid in emails}
+    picked = st.multiselect("Collected Bins", list(labels), key="collected_bins")
+    st.button(
+        "🚛 Mark Collected", key="btn_mark_collected", disabled=not picked,
+        on_click=mark_collected, args=([labels[label] for label in picked],)
+    )
+
+def mark_collected(bins):
+    """Empty the picked (email, type code) bins and clear the picker"""
+    for email, code in bins:
+        collect_bin(email, code)
+    st.session_state.collected_bins = []
+    st.session_state.bins_emptied = len(bins)
+
+@st.fragment
+@profiled_fragment
+def data_panel():
+    """Download tables as CSV/Parquet and bulk-load them from files"""
+    import pandas as pd
+    
+    tables = {spec['label']: table for table, spec in TRANSFER_TABLES.items()}
+    
+    st.markdown("### ⬇️ Export")
+    
+    col1, col2 = st.columns([2, 1])
+    
+    with col1:
+        table = tables[st.selectbox("Table", list(tables), key="export_table")]
+    
+    with col2:
+        fmt = st.radio("Format", list(EXPORT_FORMATS), horizontal=True, key="export_format")
+    
+    extension, mime = EXPORT_FORMATS[fmt]
+    # Built only when clicked, streaming the table chunk by chunk
+    st.download_button(
+        f"⬇️ Download {fmt}",
+        data=functools.partial(export_file, table, extension),
+        file_name=f"uramix_{table}_{datetime.now().strftime('%Y%m%d')}.{extension}",
+        mime=mime, key="btn_export", on_click="ignore", use_container_width=True
+    )
+    
+    st.markdown("---")
+    st.markdown("### ⬆️ Import")
+    
+    table = tables[st.selectbox("Table", list(tables), key="import_table")]
+    spec = TRANSFER_TABLES[table]
+    required = [name for name, _ in spec['columns'] if name not in spec['defaults']]
+    st.caption(
+        f"Required columns: {', '.join(required)} · rows whose key already exists are skipped"
+        + (" · passwords may be plain text or stored hashes (exports carry hashes)" if table == "users" else "")
+        + (f" · optional waste_type files the day in the Analytics chart (default {WASTE_TYPES[0]})" if table == "daily_waste" else "")
+    )
+    
+    upload = st.file_uploader("File", type=["csv", "parquet"], key="import_file")
+    
+    if st.button("⬆️ Import", key="btn_import", disabled=upload is None, use_container_width=True):
+        rows = read_parquet_rows(upload) if upload.name.endswith(".parquet") else read_csv_rows(upload)
+        with st.spinner(f"Importing {upload.name}..."):
+            start = time.perf_counter()
+            try:
+                report = import_rows(table, rows)
+            except Exception as e:
+                st.error(f"❌ Could not read {upload.name}: {e}")
+                return
+            seconds = time.perf_counter() - start
+        
+        st.success(f"✅ {report['inserted']:,} of {report['rows']:,} rows imported in {seconds:.1f} s")
+        if report['duplicates']:
+            st.info(f"{report['duplicates']:,} rows skipped: already present")
+        if report['rejected']:
+            st.warning(f"⚠️ {report['rejected']:,} rows rejected")
+            st.dataframe(
+                pd.DataFrame(report['errors'], columns=['Row', 'Problem']), use_container_width=True, hide_index=True
+            )
+
+def performance_panel():
+    """Storage health, rerun timing percentiles and the slowest recent reruns"""
+    import pandas as pd
+    
+    st.markdown("### ⏱️ Performance")
+    st.markdown("#### 💾 Storage")
+    
+    db = get_db()
+    if st.button("🧹 Checkpoint Now", key="btn_checkpoint"):
+        result = db.checkpoint()
+        if result['complete']:
+            st.success(f"✅ WAL folded into the database in {result['ms']:.0f} ms")
+        else:
+            st.warning("⚠️ Readers still using the WAL - try again")
+    
+    storage = db.storage_stats()
+    last = storage['last_checkpoint']
+    
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric("Database", f"{storage['db_bytes'] / 1024 / 1024:.1f} MB")
+    
+    with col2:
+        st.metric("WAL", f"{storage['wal_bytes'] / 1024 / 1024:.1f} MB")
+    
+    with col3:
+        st.metric("Startup", f"{storage['open_ms']:.0f} ms")
+    
+    with col4:
+        st.metric("Last Checkpoint", last['at'][11:] if last else "—")
+    
+    st.markdown("#### Rerun Timings")
+    
+    if not PROFILE_ENABLED:
+        st.info("Profiling is off. Start the app with `URAMIX_PROFILE=1` to record rerun timings.")
+        return
+    
+    profiler = get_profiler()
+    stats = profiler.section_stats()
+    
+    if not stats:
+        st.info("No reruns recorded yet.")
+        return
+    
+    st.caption(f"Last {stats['total']['count']} reruns · log: `{PROFILE_LOG_PATH}`")
+    
+    df = pd.DataFrame([{
+        'Section': name,
+        'Runs': row['count'],
+        'p50 (ms)': round(row['p50'], 1),
+        'p95 (ms)': round(row['p95'], 1),
+        'p99 (ms)': round(row['p99'], 1),
+        'Max (ms)': round(row['max'], 1)
+    } for name, row in sorted(stats.items(), key=lambda item: -item[1]['p95'])])
+    st.dataframe(df, use_container_width=True, hide_index=True)
+    
+    st.markdown("#### Slowest Reruns")
+    
+    df = pd.DataFrame([{
+        'Time': rerun['ts'],
+        'Page': rerun['page'],
+        'Total (ms)': round(rerun['total_ms'], 1),
+        'Breakdown': ", ".join(
+            f"{name} {ms:.0f}" for name, ms in sorted(rerun['sections'].items(), key=lambda item: -item[1])
+        )
+    } for rerun in profiler.slowest(10)])
+    st.dataframe(df, use_container_width=True, hide_index=True)
 
 # ============================================
 # MAIN APPLICATION
 # ============================================
-def main():
-    """Main Application Router"""
-    
-    # Initialize Session State
-    init_session_state()
-    
-    # Sidebar
+def sidebar():
+    """Sidebar branding and navigation; returns the selected page"""
     with st.sidebar:
         st.markdown("""
         <div style='text-align: center; padding: 20px;'>
@@ -1165,19 +4457,38 @@ def main():
         </div>
         """, unsafe_allow_html=True)
     
-    # Page Routing
-    if not st.session_state.logged_in:
-        auth_page()
-    else:
-        if st.session_state.is_admin:
-            admin_dashboard()
-        else:
-            if page == "Home":
-                home_page()
-            elif page == "Dashboard":
-                user_dashboard()
-            elif page == "Manure Store":
-                manure_store()
+    return page
+
+def main():
+    """Main Application Router"""
+    with profile_rerun() as rerun:
+        with profile_section("css"):
+            inject_css()
+        
+        # Initialize Session State
+        with profile_section("init_session_state"):
+            init_session_state()
+        
+        # Sidebar
+        with profile_section("sidebar"):
+            page = sidebar()
+        
+        rerun['page'] = page
+        
+        # Page Routing
+        with profile_section(f"page:{page}"):
+            if not st.session_state.logged_in:
+                auth_page()
+            else:
+                if st.session_state.is_admin:
+                    admin_dashboard()
+                else:
+                    if page == "Home":
+                        home_page()
+                    elif page == "Dashboard":
+                        user_dashboard()
+                    elif page == "Manure Store":
+                        manure_store()
 
 # Run Application
 if __name__ == "__main__":
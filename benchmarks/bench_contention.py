@@ -0,0 +1,193 @@
+"""
+URAMix - Concurrent Mutation Stress Test
+Hammers QR redemption, withdrawals, manure purchases and stock top-ups from
+many threads against a small set of hot users, then checks that no update
+was lost: every code redeemed exactly once, balances and stock equal to the
+sum of successful operations, and running totals consistent.
+
+Usage:
+    python benchmarks/bench_contention.py --threads 16 --users 20 --codes 20000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import seed_data
+
+app = seed_data.app
+
+WITHDRAW_AMOUNT = 100
+PURCHASE_KG = 0.5
+STOCK_TOPUP_KG = 5.0
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    return sorted_values[min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))]
+
+def setup(path, users, codes, rng):
+    """Users with verified, unscanned QR codes; returns {code: qr row}"""
+    seed_data.use_database(path)
+    emails = [f"hot{i:04d}@example.com" for i in range(users)]
+    app.create_new_users([(email, "secret1", "2024-01-01 00:00:00") for email in emails])
+    
+    qr_rows = {}
+    for start in range(0, codes, 1000):
+        batch = []
+        for i in range(start, min(codes, start + 1000)):
+            sub = {
+                'id': app.new_submission_id(),
+                'user': emails[i % users],
+                'waste_type': rng.choice(app.WASTE_TYPES),
+                'status': 'pending',
+                'timestamp': "2024-01-01 00:00:00",
+                'credits': 0,
+                'quantity': 0
+            }
+            app.add_submission(sub)
+            quantity = rng.choice(seed_data.QUANTITIES)
+            credits, co2 = app.calculate_credits(sub['waste_type'], quantity)
+            code = app.qr_token(sub['id'])
+            batch.append((sub, code, quantity, credits, co2))
+            qr_rows[code] = {'user': sub['user'], 'waste_type': sub['waste_type'], 'credits': credits, 'quantity': quantity}
+        app.verify_submissions(batch)
+    
+    return emails, qr_rows
+
+def run(path, threads, users, codes, duplicates, rng_seed):
+    """Run the stress phase and verify invariants; returns a result dict"""
+    rng = random.Random(rng_seed)
+    emails, qr_rows = setup(path, users, codes, rng)
+    
+    start_credits = {email: app.get_user(email)['credits'] for email in emails}
+    start_stock = app.get_setting('manure_stock')
+    
+    # Every code is attempted `duplicates` times, by different threads where possible
+    attempts = [code for code in qr_rows for _ in range(duplicates)]
+    rng.shuffle(attempts)
+    shares = [attempts[n::threads] for n in range(threads)]
+    
+    results = [None] * threads
+    barrier = threading.Barrier(threads)
+    
+    def worker(n):
+        wrng = random.Random(rng_seed + n)
+        redeemed = []
+        latencies = []
+        withdrawn = {}
+        purchased = 0.0
+        topped_up = 0.0
+        ops = 0
+        
+        barrier.wait()
+        for code in shares[n]:
+            t0 = time.perf_counter()
+            status, _, _ = app.redeem_qr_code(code)
+            latencies.append(time.perf_counter() - t0)
+            if status == 'redeemed':
+                redeemed.append(code)
+            ops += 1
+            
+            roll = wrng.random()
+            email = wrng.choice(emails)
+            if roll < 0.10:
+                if app.withdraw_credits(email, WITHDRAW_AMOUNT):
+                    withdrawn[email] = withdrawn.get(email, 0) + WITHDRAW_AMOUNT
+                ops += 1
+            elif roll < 0.20:
+                if app.purchase_manure(email, PURCHASE_KG, PURCHASE_KG * 25):
+                    purchased += PURCHASE_KG
+                ops += 1
+            elif roll < 0.22:
+                app.add_manure_stock(STOCK_TOPUP_KG)
+                topped_up += STOCK_TOPUP_KG
+                ops += 1
+        
+        results[n] = (redeemed, withdrawn, purchased, topped_up, ops, latencies)
+    
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    t0 = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    
+    redeemed = [code for r in results for code in r[0]]
+    withdrawn = {}
+    for r in results:
+        for email, amount in r[1].items():
+            withdrawn[email] = withdrawn.get(email, 0) + amount
+    purchased = sum(r[2] for r in results)
+    topped_up = sum(r[3] for r in results)
+    latencies = sorted(t for r in results for t in r[5])
+    
+    # Invariants
+    errors = []
+    if sorted(redeemed) != sorted(qr_rows):
+        errors.append(f"redeemed {len(redeemed)} times for {len(qr_rows)} codes ({len(set(redeemed))} distinct)")
+    
+    earned = {}
+    organic_kg = 0.0
+    for code in redeemed:
+        qr = qr_rows[code]
+        earned[qr['user']] = earned.get(qr['user'], 0) + qr['credits']
+        if qr['waste_type'] == "Organic Waste":
+            organic_kg += qr['quantity']
+    
+    for email in emails:
+        expected = start_credits[email] + earned.get(email, 0) - withdrawn.get(email, 0)
+        actual = app.get_user(email)['credits']
+        if actual != expected:
+            errors.append(f"{email}: credits {actual} != {expected}")
+    
+    expected_stock = start_stock + 0.3 * organic_kg + topped_up - purchased
+    actual_stock = app.get_setting('manure_stock')
+    if abs(actual_stock - expected_stock) > 1e-6 or actual_stock < 0:
+        errors.append(f"stock {actual_stock:.3f} != {expected_stock:.3f}")
+    
+    mismatches = app.check_aggregates()
+    if mismatches:
+        errors.append(f"aggregates: {mismatches}")
+    
+    return {
+        "threads": threads,
+        "users": users,
+        "codes": codes,
+        "attempts": len(attempts),
+        "elapsed_s": round(elapsed, 2),
+        "redemptions_per_s": round(len(redeemed) / elapsed, 1),
+        "ops_per_s": round(sum(r[4] for r in results) / elapsed, 1),
+        "redeem_p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "redeem_p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "redeem_max_ms": round(latencies[-1] * 1000, 2),
+        "withdrawals": sum(withdrawn.values()) // WITHDRAW_AMOUNT,
+        "purchased_kg": purchased,
+        "errors": errors,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent mutation stress test")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--users", type=int, default=20, help="hot users shared by all threads")
+    parser.add_argument("--codes", type=int, default=20000)
+    parser.add_argument("--duplicates", type=int, default=2, help="redemption attempts per code")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        result = run(os.path.join(tmp, "stress.db"), args.threads, args.users, args.codes, args.duplicates, args.seed)
+    
+    print(json.dumps(result, indent=2))
+    sys.exit(1 if result["errors"] else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+URAMix - Credit Calculation Benchmark
+Prices random submissions with the scalar `calculate_credits` loop and with
+`calculate_credits_batch`, checks the results are identical under the
+original and a newly published rate table, and times retroactive
+re-pricing of every QR code in a seeded database.
+
+Usage:
+    python benchmarks/bench_credits.py --rows 1000000 --users 100000
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+
+import seed_data
+
+app = seed_data.app
+
+NEW_RATES = {
+    "Organic Waste": (65, 1.7, 20, 0.85),
+    "Inorganic Waste": (30, 1.3, 12, 0.45),
+}
+
+def timed(func, *args):
+    """(result, seconds)"""
+    t0 = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - t0
+
+def compare(type_list, quantity_list, types, codes, quantities, rates):
+    """Time the scalar loop and the batch call (names and stored type codes); count differing rows"""
+    scalar, scalar_s = timed(lambda: [app.calculate_credits(t, q, rates) for t, q in zip(type_list, quantity_list)])
+    (credits, co2), names_s = timed(app.calculate_credits_batch, types, quantities, rates)
+    (code_credits, code_co2), codes_s = timed(app.calculate_credits_batch, codes, quantities, rates)
+    
+    mismatches = sum(
+        1 for (c, k), bc, bk in zip(scalar, credits.tolist(), co2.tolist()) if c != bc or k != bk
+    )
+    mismatches += int((credits != code_credits).sum() + (co2 != code_co2).sum())
+    return scalar_s, names_s, codes_s, mismatches
+
+def main():
+    parser = argparse.ArgumentParser(description="Scalar vs batch credit calculation")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=100_000, help="seeded users for the re-pricing run")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    
+    rng = np.random.default_rng(args.seed)
+    codes = rng.integers(0, len(app.WASTE_TYPES), args.rows)
+    types = np.array(app.WASTE_TYPES)[codes]
+    # Half on the UI's 0.5 kg steps (exact products), half arbitrary floats
+    steps = rng.integers(1, 60, args.rows) * 0.5
+    floats = rng.uniform(0.0, 30.0, args.rows)
+    quantities = np.where(rng.random(args.rows) < 0.5, steps, floats)
+    type_list, quantity_list = types.tolist(), quantities.tolist()
+    
+    results = {}
+    errors = []
+    with tempfile.TemporaryDirectory() as tmp:
+        seed_data.seed(os.path.join(tmp, "credits.db"), users=args.users, submissions_per_user=1.0)
+        new_version = app.publish_credit_rates(NEW_RATES)
+        
+        for version in (1, new_version):
+            rates = app.get_credit_rates(version)
+            scalar_s, names_s, codes_s, mismatches = compare(type_list, quantity_list, types, codes, quantities, rates)
+            results[f"rates_v{version}"] = {
+                "scalar_rows_per_s": round(args.rows / scalar_s),
+                "batch_names_rows_per_s": round(args.rows / names_s),
+                "batch_codes_rows_per_s": round(args.rows / codes_s),
+                "speedup_codes": round(scalar_s / codes_s, 1),
+                "mismatches": mismatches,
+            }
+            if mismatches:
+                errors.append(f"rates v{version}: {mismatches} rows differ")
+        
+        t0 = time.perf_counter()
+        impact = app.repricing_impact(new_version)
+        results["repricing"] = dict(impact, ms=round((time.perf_counter() - t0) * 1000, 1))
+        
+        unchanged = app.repricing_impact(1)
+        if unchanged['current'] != unchanged['repriced']:
+            errors.append(f"re-pricing at v1 changed credits: {unchanged}")
+    
+    results["errors"] = errors
+    print(json.dumps(results, indent=2))
+    sys.exit(1 if errors else 0)
+
+if __name__ == "__main__":
+    main()
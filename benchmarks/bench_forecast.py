@@ -0,0 +1,134 @@
+"""
+URAMix - Bin Forecast Benchmark
+Seeds a fleet of users (two bins each), recomputes every bin's fill rate
+and time to overflow, and times the "about to overflow" list. A sample of
+bins is re-derived one at a time in plain Python to check the vectorized
+forecast.
+
+Usage:
+    python benchmarks/bench_forecast.py --users 1000000
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import seed_data
+
+app = seed_data.app
+
+SEED_END = datetime(2025, 1, 1)
+
+def reference_rate(email, code, now):
+    """One bin's fill rate (%/day), event by event"""
+    since = now - timedelta(days=app.FORECAST_WINDOW_DAYS)
+    rate = 0.0
+    for row in app.fetch_all(
+        "SELECT timestamp FROM waste_submissions WHERE user = ? AND waste_type = ? AND timestamp >= ?",
+        (email, app.WASTE_TYPES[code], since.strftime('%Y-%m-%d %H:%M:%S'))
+    ):
+        age = max((now - datetime.strptime(row['timestamp'], '%Y-%m-%d %H:%M:%S')).total_seconds(), 0) / 86400
+        rate += app.BIN_FILL_PER_SUBMISSION * math.exp(-age / app.FORECAST_TAU_DAYS) / app.FORECAST_TAU_DAYS
+    for row in app.fetch_all(
+        "SELECT date FROM waste_history WHERE user = ? AND type = ? AND date >= ?",
+        (email, code, since.strftime('%Y-%m-%d'))
+    ):
+        at = datetime.strptime(row['date'], '%Y-%m-%d') + timedelta(hours=12)
+        age = max((now - at).total_seconds(), 0) / 86400
+        rate -= app.BIN_EMPTY_PER_REDEMPTION * math.exp(-age / app.FORECAST_TAU_DAYS) / app.FORECAST_TAU_DAYS
+    return rate
+
+def add_burst(fraction, rng):
+    """Recent pending submissions for a share of users, so some bins head for overflow"""
+    users = [row['email'] for row in app.fetch_all("SELECT email FROM users")]
+    submissions = []
+    fills = {}
+    for n, email in enumerate(rng.sample(users, int(len(users) * fraction))):
+        code = rng.randrange(len(app.WASTE_TYPES))
+        for i in range(rng.randint(1, 6)):
+            at = SEED_END - timedelta(seconds=rng.randrange(3 * 86400))
+            submissions.append((
+                f"burst{n:07d}-{i}", email, app.WASTE_TYPES[code], 'pending', at.strftime('%Y-%m-%d %H:%M:%S'), 0, 0
+            ))
+            fills[email, code] = fills.get((email, code), 0) + app.BIN_FILL_PER_SUBMISSION
+    
+    with app.get_db().transaction() as conn:
+        conn.executemany("INSERT INTO waste_submissions VALUES (?, ?, ?, ?, ?, ?, ?)", submissions)
+        for code, column in enumerate(('organic_bin', 'inorganic_bin')):
+            conn.executemany(
+                f"UPDATE users SET {column} = MIN(100, {column} + ?) WHERE email = ?",
+                [(points, email) for (email, c), points in fills.items() if c == code]
+            )
+    return len(submissions)
+
+def main():
+    parser = argparse.ArgumentParser(description="Fleet-wide bin forecast time")
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--submissions-per-user", type=float, default=2.0)
+    parser.add_argument("--years", type=int, default=1, help="history span; shorter means busier bins")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--sample", type=int, default=200, help="bins checked against the scalar reference")
+    parser.add_argument("--burst", type=float, default=0.05, help="share of users with a burst of recent submissions")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        seed_data.seed(
+            os.path.join(tmp, "forecast.db"), users=args.users,
+            submissions_per_user=args.submissions_per_user, years=args.years, end=SEED_END
+        )
+        rng = random.Random(1)
+        burst = add_burst(args.burst, rng)
+        forecaster = app.get_bin_forecaster()
+        
+        times = []
+        for _ in range(args.runs):
+            forecaster.recompute(now=SEED_END)
+            times.append(forecaster.compute_ms)
+        
+        t0 = time.perf_counter()
+        urgent = forecaster.overflowing(24)
+        list_ms = (time.perf_counter() - t0) * 1000
+        
+        # The list must be in priority order and complete for its size
+        errors = []
+        keys = [(hours, -fill) for hours, fill, *_ in urgent]
+        if keys != sorted(keys):
+            errors.append("overflow list out of order")
+        if len(urgent) < min(app.ALERT_LIST_SIZE, forecaster.count_within(24)):
+            errors.append("overflow list short")
+        
+        users = app.fetch_all("SELECT rowid, email FROM users")
+        worst = 0.0
+        for row in rng.sample(users, min(args.sample, len(users))):
+            for code in range(len(app.WASTE_TYPES)):
+                expected = reference_rate(row['email'], code, SEED_END)
+                worst = max(worst, abs(forecaster.bin(code, row['rowid'])[1] - expected))
+        if worst > 1e-9:
+            errors.append(f"rate differs from the reference by {worst}")
+        
+        result = {
+            "bins": 2 * args.users,
+            "burst_submissions": burst,
+            "recompute_ms": [round(ms) for ms in times],
+            "full_now": forecaster.count_within(0),
+            "full_within_24h": forecaster.count_within(24),
+            "full_within_7d": forecaster.count_within(168),
+            "alert_list_ms": round(list_ms, 2),
+            "max_rate_error": worst,
+            "errors": errors,
+        }
+    
+    print(json.dumps(result, indent=2))
+    sys.exit(1 if errors else 0)
+
+if __name__ == "__main__":
+    main()
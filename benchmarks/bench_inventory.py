@@ -0,0 +1,189 @@
+"""
+URAMix - Manure Flash Sale Benchmark
+Many farmers buy from a limited stock at once. Compares the inventory
+engine (sharded counters, reservations, batched commits) with one guarded
+UPDATE transaction per purchase, and checks that nothing was oversold:
+stored stock never negative, and every kg that left stock is in
+manure_sales exactly once.
+
+Usage:
+    python benchmarks/bench_inventory.py --threads 32 --stock 2000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import seed_data
+
+app = seed_data.app
+
+SIZES = [0.5, 1.0, 2.0, 5.0]
+PRICE = 25
+ABANDON = 0.10
+CANCEL = 0.10
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    return sorted_values[min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))]
+
+def direct_purchase(email, quantity, amount):
+    """One transaction per purchase, all buyers on the one stock value"""
+    with app.get_db().transaction() as conn:
+        cur = conn.execute(
+            "UPDATE settings SET value = value - ? WHERE key = 'manure_stock' AND value >= ?",
+            (quantity, quantity)
+        )
+        if cur.rowcount == 0:
+            return False
+        conn.execute("UPDATE users SET manure_purchased = manure_purchased + ? WHERE email = ?", (quantity, email))
+        today = datetime.now().strftime('%Y-%m-%d')
+        conn.execute(
+            "INSERT INTO manure_sales (date, user, quantity, amount) VALUES (?, ?, ?, ?)",
+            (today, email, quantity, amount)
+        )
+        app.record_daily_sale(conn, today, email, quantity, amount)
+        app.bump_aggregate(conn, 'manure_sold_kg', quantity)
+        app.bump_aggregate(conn, 'manure_revenue', amount)
+        app.bump_aggregate(conn, 'manure_orders', 1)
+        app.bump_aggregate(conn, 'manure_sales_version', 1)
+    return True
+
+def run(path, mode, threads, farmers, stock, rng_seed):
+    """One flash sale; returns a result dict"""
+    seed_data.use_database(path)
+    emails = [f"farmer{i:05d}@example.com" for i in range(farmers)]
+    app.create_new_users([(email, "secret1", "2024-01-01 00:00:00") for email in emails])
+    with app.get_db().transaction() as conn:
+        conn.execute("UPDATE settings SET value = ? WHERE key = 'manure_stock'", (float(stock),))
+    
+    inventory = app.get_manure_inventory()
+    commits = [0]
+    write = inventory._write
+    
+    def counted_write(holds):
+        commits[0] += 1
+        return write(holds)
+    
+    inventory._write = counted_write
+    
+    results = [None] * threads
+    barrier = threading.Barrier(threads)
+    
+    def worker(n):
+        rng = random.Random(rng_seed + n)
+        bought = 0.0
+        orders = 0
+        latencies = []
+        sales = []
+        
+        barrier.wait()
+        # Keep buying until nothing sold for longer than a hold lives (abandoned holds are back by then)
+        last_sale = time.perf_counter()
+        while time.perf_counter() - last_sale < 2 * app.RESERVATION_SECONDS:
+            email = rng.choice(emails)
+            kg = rng.choice(SIZES)
+            roll = rng.random()
+            t0 = time.perf_counter()
+            
+            if mode == "direct":
+                if roll < ABANDON + CANCEL:
+                    continue
+                ok = direct_purchase(email, kg, kg * PRICE)
+            else:
+                hold = app.reserve_manure(email, kg, kg * PRICE)
+                if hold is None:
+                    ok = False
+                elif roll < ABANDON:
+                    continue
+                elif roll < ABANDON + CANCEL:
+                    app.release_manure(hold)
+                    continue
+                else:
+                    ok = app.confirm_manure(hold) == 'ok'
+            
+            latencies.append(time.perf_counter() - t0)
+            if ok:
+                bought += kg
+                orders += 1
+                last_sale = time.perf_counter()
+                sales.append((last_sale, kg))
+            else:
+                time.sleep(0.01)
+        
+        results[n] = (bought, orders, latencies, sales)
+    
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    t0 = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    
+    # Time to sell half the stock: near the end what's left sits in abandoned holds until they expire
+    sold = 0.0
+    for at, kg in sorted(sale for r in results for sale in r[3]):
+        sold += kg
+        if sold >= 0.5 * stock:
+            break
+    elapsed = at - t0
+    
+    bought = sum(r[0] for r in results)
+    orders = sum(r[1] for r in results)
+    latencies = sorted(t for r in results for t in r[2])
+    stored = app.get_setting('manure_stock')
+    sales = app.fetch_one("SELECT COUNT(*) AS n, COALESCE(SUM(quantity), 0) AS kg FROM manure_sales")
+    
+    errors = []
+    if stored < 0:
+        errors.append(f"stock went negative: {stored}")
+    if abs((stock - stored) - bought) > 1e-6 or abs(sales['kg'] - bought) > 1e-6 or sales['n'] != orders:
+        errors.append(f"stock moved {stock - stored} kg, sales {sales['kg']} kg / {sales['n']}, buyers got {bought} kg / {orders}")
+    mismatches = app.check_aggregates()
+    if mismatches:
+        errors.append(f"aggregates: {mismatches}")
+    
+    return {
+        "orders": orders,
+        "sold_kg": bought,
+        "left_kg": stored,
+        "sell_half_s": round(elapsed, 3),
+        "kg_per_s": round(0.5 * stock / elapsed, 1),
+        "purchase_p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "purchase_p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "orders_per_commit": round(orders / commits[0], 1) if mode == "engine" and commits[0] else 1.0,
+        "errors": errors,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Manure flash sale: inventory engine vs direct updates")
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--farmers", type=int, default=500)
+    parser.add_argument("--stock", type=float, default=2000.0)
+    parser.add_argument("--hold-seconds", type=float, default=0.5, help="reservation lifetime during the run")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    
+    app.RESERVATION_SECONDS = args.hold_seconds
+    
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("direct", "engine"):
+            results[mode] = run(
+                os.path.join(tmp, f"{mode}.db"), mode, args.threads, args.farmers, args.stock, args.seed
+            )
+    
+    print(json.dumps(results, indent=2))
+    sys.exit(1 if any(r["errors"] for r in results.values()) else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+URAMix - Background Job Benchmark
+Times what an admin click costs on the script thread: verifying a
+submission and redeeming its QR code inline (render, base64, transaction)
+versus queueing the job for the background workers. Also times how long
+the workers take to drain the queue, and checks every job finished once:
+all submissions verified, all codes redeemed, aggregates consistent.
+
+Usage:
+    python benchmarks/bench_jobs.py --clicks 500
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import seed_data
+
+app = seed_data.app
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    return sorted_values[min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))]
+
+def summary(latencies):
+    """p50/p99/max in ms"""
+    latencies = sorted(latencies)
+    return {
+        "click_p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "click_p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "click_max_ms": round(latencies[-1] * 1000, 2),
+    }
+
+def pending_batch(clicks):
+    """(sub, qr_data, quantity, credits, co2) for the oldest pending submissions"""
+    subs = app.fetch_all("SELECT * FROM waste_submissions WHERE status = 'pending' ORDER BY id LIMIT ?", (clicks,))
+    credits, co2 = app.calculate_credits_batch([sub['waste_type'] for sub in subs], [5.0] * len(subs))
+    return [
+        (sub, app.qr_token(sub['id']), 5.0, c, k) for sub, c, k in zip(subs, credits.tolist(), co2.tolist())
+    ]
+
+def drain(ids):
+    """Seconds until every job in ids has finished"""
+    queue = app.get_job_queue()
+    t0 = time.perf_counter()
+    while True:
+        jobs = queue.statuses(ids)
+        if all(job['status'] in ('done', 'failed') for job in jobs.values()):
+            return time.perf_counter() - t0
+        time.sleep(0.01)
+
+def run_inline(batch):
+    """Verify then redeem one click at a time on this thread"""
+    verify = []
+    for item in batch:
+        t0 = time.perf_counter()
+        app.generate_qr_code(item[1])
+        app.verify_submission(*item)
+        verify.append(time.perf_counter() - t0)
+    
+    redeem = []
+    for _, qr_data, *_ in batch:
+        t0 = time.perf_counter()
+        app.redeem_qr_code(qr_data)
+        redeem.append(time.perf_counter() - t0)
+    
+    return {"verify": summary(verify), "redeem": summary(redeem)}
+
+def run_queued(batch):
+    """Queue one click at a time; the workers do the rest"""
+    verify = []
+    ids = []
+    for item in batch:
+        t0 = time.perf_counter()
+        ids += app.queue_verifications([item])
+        verify.append(time.perf_counter() - t0)
+    verify_drain = drain(ids)
+    
+    redeem = []
+    redeem_ids = []
+    for _, qr_data, *_ in batch:
+        t0 = time.perf_counter()
+        redeem_ids += app.queue_redemptions([qr_data])
+        redeem.append(time.perf_counter() - t0)
+    redeem_drain = drain(redeem_ids)
+    
+    jobs = app.get_job_queue().statuses(ids + redeem_ids)
+    return {
+        "verify": dict(summary(verify), drain_s=round(verify_drain, 3), jobs_per_s=round(len(ids) / verify_drain)),
+        "redeem": dict(summary(redeem), drain_s=round(redeem_drain, 3), jobs_per_s=round(len(redeem_ids) / redeem_drain)),
+        "failed": sum(1 for job in jobs.values() if job['status'] != 'done'),
+        "retried": sum(1 for job in jobs.values() if job['attempts'] > 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Admin click latency: inline side effects vs background jobs")
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--clicks", type=int, default=500)
+    args = parser.parse_args()
+    
+    results = {}
+    errors = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode, run in (("inline", run_inline), ("queued", run_queued)):
+            seed_data.seed(os.path.join(tmp, f"{mode}.db"), users=args.users)
+            batch = pending_batch(args.clicks)
+            scanned = app.fetch_one("SELECT COUNT(*) AS n FROM qr_codes WHERE scanned = 1")['n']
+            
+            results[mode] = run(batch)
+            
+            codes = [qr_data for _, qr_data, *_ in batch]
+            marks = ",".join("?" * len(codes))
+            verified = app.fetch_one(
+                f"SELECT COUNT(*) AS n FROM waste_submissions WHERE status = 'verified' AND id IN ({marks})",
+                [sub['id'] for sub, *_ in batch]
+            )['n']
+            redeemed = app.fetch_one("SELECT COUNT(*) AS n FROM qr_codes WHERE scanned = 1")['n'] - scanned
+            if verified != len(batch) or redeemed != len(batch):
+                errors.append(f"{mode}: {verified} verified and {redeemed} redeemed of {len(batch)}")
+            if results[mode].get("failed"):
+                errors.append(f"{mode}: {results[mode]['failed']} jobs did not finish")
+            mismatches = app.check_aggregates()
+            if mismatches:
+                errors.append(f"{mode}: aggregates {mismatches}")
+    
+    results["errors"] = errors
+    print(json.dumps(results, indent=2))
+    sys.exit(1 if errors else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+URAMix - Login Throughput Benchmark
+Runs concurrent logins against scrypt-hashed and legacy plaintext accounts
+and reports logins per second and login latency, together with the latency
+of a small CPU-bound probe standing in for other sessions' reruns. Compares
+hashing inline on every login thread with the bounded hashing pool.
+
+Usage:
+    python benchmarks/bench_login.py --threads 32 --duration 10
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import seed_data
+
+app = seed_data.app
+
+PASSWORD = "secret1"
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    return sorted_values[min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))]
+
+def probe_work():
+    """Some milliseconds of pure-Python work, like a page rerun"""
+    return sum(i * i for i in range(400000))
+
+def run(mode, threads, duration, users):
+    """Login storm plus rerun probe; returns a result dict"""
+    path = os.path.join(tempfile.mkdtemp(), f"{mode}.db")
+    seed_data.use_database(path)
+    
+    # Half the accounts are hashed, half still hold legacy plaintext
+    hashed = app.scrypt_hash(PASSWORD)
+    emails = [f"login{i:05d}@example.com" for i in range(users)]
+    app.create_new_users([
+        (email, hashed if i % 2 else PASSWORD, "2024-01-01 00:00:00") for i, email in enumerate(emails)
+    ])
+    
+    check_password = app.check_password
+    if mode == "inline":
+        app.check_password = app.scrypt_check
+    
+    stop_at = time.perf_counter() + duration
+    login_times = [[] for _ in range(threads)]
+    probe_times = []
+    
+    def login_worker(n):
+        rng = random.Random(n)
+        while time.perf_counter() < stop_at:
+            t0 = time.perf_counter()
+            status = app.authenticate(rng.choice(emails), PASSWORD)
+            login_times[n].append(time.perf_counter() - t0)
+            assert status == 'ok', status
+    
+    def probe():
+        while time.perf_counter() < stop_at:
+            t0 = time.perf_counter()
+            probe_work()
+            probe_times.append(time.perf_counter() - t0)
+            time.sleep(0.01)
+    
+    workers = [threading.Thread(target=login_worker, args=(n,)) for n in range(threads)]
+    workers.append(threading.Thread(target=probe))
+    t0 = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    app.check_password = check_password
+    
+    # Let queued background rehashes finish before counting them
+    hasher = app.get_password_hasher()
+    while hasher._rehashing:
+        time.sleep(0.05)
+    legacy = app.fetch_one("SELECT COUNT(*) AS n FROM users WHERE password NOT LIKE 'scrypt$%'")['n']
+    
+    logins = sorted(t for times in login_times for t in times)
+    probes = sorted(probe_times)
+    return {
+        "logins": len(logins),
+        "logins_per_s": round(len(logins) / elapsed, 1),
+        "login_p50_ms": round(percentile(logins, 50) * 1000, 1),
+        "login_p99_ms": round(percentile(logins, 99) * 1000, 1),
+        "probe_p50_ms": round(percentile(probes, 50) * 1000, 1),
+        "probe_p99_ms": round(percentile(probes, 99) * 1000, 1),
+        "legacy_left": legacy,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent login benchmark")
+    parser.add_argument("--threads", type=int, default=32, help="concurrent login sessions")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--users", type=int, default=200)
+    args = parser.parse_args()
+    
+    baseline_t0 = time.perf_counter()
+    for _ in range(20):
+        probe_work()
+    results = {
+        "hash_workers": app.HASH_WORKERS,
+        "scrypt_n": app.SCRYPT_N,
+        "probe_idle_ms": round((time.perf_counter() - baseline_t0) / 20 * 1000, 1),
+    }
+    for mode in ("inline", "pool"):
+        results[mode] = run(mode, args.threads, args.duration, args.users)
+    
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+URAMix - Page Latency Benchmark
+Drives every page headlessly with streamlit.testing.v1.AppTest against
+seeded populations and reports p50/p95 rerun latency and peak memory.
+
+Usage:
+    python benchmarks/bench_pages.py --scales 100 10000 100000
+    python benchmarks/bench_pages.py --save-baseline benchmarks/baseline.json
+    python benchmarks/bench_pages.py --compare benchmarks/baseline.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT, "app.py")
+sys.path.insert(0, ROOT)
+
+import seed_data
+
+SAMPLE_USER = "user0000000@example.com"
+
+# name -> (session state, widget action run before every timed rerun)
+SCENARIOS = {
+    "auth_page": ({}, None),
+    "home_page": ({'logged_in': True, 'current_user': SAMPLE_USER}, lambda at: at.sidebar.radio[0].set_value("🏠 Home")),
+    "user_dashboard": ({'logged_in': True, 'current_user': SAMPLE_USER}, lambda at: at.sidebar.radio[0].set_value("📊 Dashboard")),
+    "manure_store": ({'logged_in': True, 'current_user': SAMPLE_USER}, lambda at: at.sidebar.radio[0].set_value("🛒 Manure Store")),
+    # st.tabs renders every admin tab on each rerun
+    "admin_dashboard": ({'logged_in': True, 'is_admin': True, 'current_user': "admin"}, None),
+    "admin_queue_next_page": (
+        {'logged_in': True, 'is_admin': True, 'current_user': "admin"},
+        lambda at: at.button(key="btn_queue_next").click() if not at.button(key="btn_queue_next").disabled else None
+    ),
+}
+
+def percentile(values, pct):
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+def bench_scenario(name, reruns):
+    """Time `reruns` reruns of one page and measure peak memory of one more"""
+    from streamlit.testing.v1 import AppTest
+    
+    state, action = SCENARIOS[name]
+    at = AppTest.from_file(APP_PATH, default_timeout=600)
+    for key, value in state.items():
+        at.session_state[key] = value
+    
+    if action:
+        at.run()
+        action(at)
+    at.run()
+    if at.exception:
+        raise RuntimeError(f"{name}: {[e.message for e in at.exception]}")
+    
+    timings = []
+    for _ in range(reruns):
+        if action:
+            action(at)
+        t0 = time.perf_counter()
+        at.run()
+        timings.append(time.perf_counter() - t0)
+    
+    tracemalloc.start()
+    at.run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    return {
+        "p50_ms": round(percentile(timings, 50) * 1000, 2),
+        "p95_ms": round(percentile(timings, 95) * 1000, 2),
+        "peak_mem_mb": round(peak / 1024 / 1024, 2),
+    }
+
+def compare(results, baseline, tolerance):
+    """Regressions where p95 grew by more than `tolerance` over the baseline"""
+    regressions = []
+    for scale, pages in results.items():
+        for page, stats in pages.items():
+            base = baseline.get(scale, {}).get(page)
+            if base and stats["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+                regressions.append(f"{page} @ {scale}: p95 {base['p95_ms']} -> {stats['p95_ms']} ms")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[100, 10_000, 100_000])
+    parser.add_argument("--pages", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--reruns", type=int, default=20)
+    parser.add_argument("--save-baseline", metavar="PATH")
+    parser.add_argument("--compare", metavar="PATH")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p95 growth vs baseline")
+    args = parser.parse_args()
+    
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.scales:
+            # A fresh path per scale: app.get_db() is cached per process
+            path = os.path.join(tmp, f"bench_{size}.db")
+            os.environ["URAMIX_DB_PATH"] = path
+            
+            t0 = time.perf_counter()
+            seed_data.seed(path, users=size, submissions_per_user=1.0)
+            print(f"# seeded {size:,} users/submissions in {time.perf_counter() - t0:.1f}s", file=sys.stderr)
+            
+            results[str(size)] = {}
+            for page in args.pages:
+                results[str(size)][page] = stats = bench_scenario(page, args.reruns)
+                print(f"{size:>8,}  {page:<24} p50 {stats['p50_ms']:>9.1f} ms  "
+                      f"p95 {stats['p95_ms']:>9.1f} ms  peak {stats['peak_mem_mb']:>7.1f} MB", file=sys.stderr)
+    
+    print(json.dumps(results, indent=2))
+    
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2)
+    
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
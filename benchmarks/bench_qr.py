@@ -0,0 +1,92 @@
+"""
+URAMix - QR Payload Benchmark
+Compares the old QR payload (email_type_timestamp submission ID) with the
+short signed token: QR version (symbol size), encode time and PNG size.
+Also checks that generated IDs are unique and strictly increasing.
+
+Usage:
+    python benchmarks/bench_qr.py --codes 500
+"""
+
+import argparse
+import base64
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import qrcode
+
+import app
+from qr_render import render_qr_png
+
+os.environ.setdefault("URAMIX_QR_SECRET", "bench-secret")
+
+def legacy_payload(rng, n):
+    """Submission ID in the pre-token format"""
+    waste_type = rng.choice(app.WASTE_TYPES)
+    stamp = datetime(2024, 1, 1) + timedelta(seconds=rng.randrange(365 * 86400))
+    return f"user{n:07d}@example.com_{waste_type.replace(' ', '_')}_{stamp.strftime('%Y%m%d%H%M%S')}"
+
+def measure(payloads):
+    """QR version, encode time and PNG size over a list of payloads"""
+    versions = []
+    times = []
+    sizes = []
+    
+    for data in payloads:
+        qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_L)
+        qr.add_data(data)
+        qr.make(fit=True)
+        versions.append(qr.version)
+        
+        t0 = time.perf_counter()
+        img = render_qr_png(data)
+        times.append(time.perf_counter() - t0)
+        sizes.append(len(base64.b64decode(img)))
+    
+    times.sort()
+    return {
+        "payload_chars": round(sum(map(len, payloads)) / len(payloads), 1),
+        "qr_version_max": max(versions),
+        "modules": 17 + 4 * max(versions),
+        "encode_p50_ms": round(times[len(times) // 2] * 1000, 3),
+        "encode_mean_ms": round(sum(times) / len(times) * 1000, 3),
+        "png_bytes_mean": round(sum(sizes) / len(sizes)),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="QR payload size and encode time, before and after")
+    parser.add_argument("--codes", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    
+    rng = random.Random(args.seed)
+    generator = app.IdGenerator(0)
+    
+    t0 = time.perf_counter()
+    ids = [generator.next_id() for _ in range(100_000)]
+    id_rate = 100_000 / (time.perf_counter() - t0)
+    if len(set(ids)) != len(ids) or ids != sorted(ids):
+        print("generated IDs are not unique and increasing", file=sys.stderr)
+        sys.exit(1)
+    
+    tokens = [app.qr_token(sub_id) for sub_id in ids[:args.codes]]
+    if not all(app.qr_token_valid(token) for token in tokens):
+        print("token failed its own signature check", file=sys.stderr)
+        sys.exit(1)
+    
+    result = {
+        "before": measure([legacy_payload(rng, n) for n in range(args.codes)]),
+        "after": measure(tokens),
+        "ids_per_s": round(id_rate),
+    }
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+URAMix - Restart Benchmark
+Seeds a database, replays write traffic in a child process that is killed
+without a clean shutdown (so the WAL is left behind, as after a crash or
+redeploy), then times how long a fresh process takes to open the database
+and serve its first query. Reports WAL size and reopen time with the app's
+checkpoint policy and with checkpointing disabled.
+
+Usage:
+    python benchmarks/bench_restart.py --users 100000 --load 20
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import seed_data
+
+app = seed_data.app
+
+def child_load(path, duration, checkpoints):
+    """Write traffic plus a concurrent reader, then exit without closing anything"""
+    if not checkpoints:
+        app.WAL_AUTOCHECKPOINT_PAGES = 0
+        app.WAL_TRUNCATE_BYTES = 0
+    seed_data.use_database(path)
+    
+    # Page reads alongside the writes, as from admin sessions
+    stop = threading.Event()
+    
+    def reader():
+        while not stop.is_set():
+            app.count_users("user00")
+            time.sleep(0.002)
+    
+    threading.Thread(target=reader, daemon=True).start()
+    rates = seed_data.run_load(path, duration=duration, threads=4)
+    stop.set()
+    
+    print(json.dumps(rates), flush=True)
+    os._exit(0)
+
+def child_open(path):
+    """Time opening the database and the first read"""
+    t0 = time.perf_counter()
+    seed_data.use_database(path)
+    app.get_aggregates()
+    print(json.dumps({"open_ms": round((time.perf_counter() - t0) * 1000, 1)}), flush=True)
+    os._exit(0)
+
+def run_child(*args):
+    """Run this script in a subprocess and return its last JSON line"""
+    out = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), *args],
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+def file_mb(path):
+    """File size in MB, 0 if missing"""
+    return round(os.path.getsize(path) / 1024 / 1024, 2) if os.path.exists(path) else 0.0
+
+def main():
+    parser = argparse.ArgumentParser(description="Restart time after unclean shutdown")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--load", type=float, default=20.0, help="seconds of write traffic before the kill")
+    parser.add_argument("--child", nargs="+", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.child:
+        if args.child[0] == "load":
+            child_load(args.child[1], float(args.child[2]), args.child[3] == "1")
+        else:
+            child_open(args.child[1])
+        return
+    
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for policy, checkpoints in (("checkpointed", "1"), ("no_checkpoints", "0")):
+            path = os.path.join(tmp, f"{policy}.db")
+            seed_data.seed(path, users=args.users, submissions_per_user=1.0)
+            
+            load = run_child("--child", "load", path, str(args.load), checkpoints)
+            wal_mb = file_mb(path + "-wal")
+            # Without the shared-memory index (as after a reboot) SQLite must scan the whole WAL
+            os.remove(path + "-shm")
+            opened = run_child("--child", "open", path)
+            
+            results[policy] = {
+                "ops_per_s": load["total"],
+                "db_mb": file_mb(path),
+                "wal_mb": wal_mb,
+                "open_ms": opened["open_ms"],
+            }
+    
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
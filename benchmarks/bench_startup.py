@@ -0,0 +1,88 @@
+"""
+URAMix - Cold Start Benchmark
+Measures import time and first login-page render in fresh interpreters
+
+Usage: python benchmarks/bench_startup.py [--runs 5]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+HEAVY_MODULES = ["pandas", "matplotlib", "qrcode", "PIL"]
+
+# Runs in a fresh interpreter so every measurement is a cold start
+CHILD_SCRIPT = """
+import json, sys, time
+
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+t1 = time.perf_counter()
+
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+at.run()
+t2 = time.perf_counter()
+
+at.run()
+t3 = time.perf_counter()
+
+print(json.dumps({
+    "streamlit_import_s": t1 - t0,
+    "first_render_s": t2 - t1,
+    "warm_rerun_s": t3 - t2,
+    "errors": [e.message for e in at.exception],
+    "heavy_loaded": [m for m in sys.argv[2:] if m in sys.modules],
+}))
+"""
+
+def app_import_time(env):
+    """Cumulative import time of app.py's own top-level imports (python -X importtime)"""
+    code = "import sys; sys.path.insert(0, %r); import app" % os.path.dirname(APP_PATH)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        env=env, capture_output=True, text=True
+    )
+    
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        parts = [p.strip() for p in line.split("|")]
+        if len(parts) == 3 and parts[2] == "app":
+            return int(parts[1]) / 1e6
+    return None
+
+def run_once(env):
+    """One cold start of the login page"""
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD_SCRIPT, APP_PATH] + HEAVY_MODULES,
+        env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, URAMIX_DB_PATH=os.path.join(tmp, "bench.db"))
+        runs = [run_once(env) for _ in range(args.runs)]
+        app_import = [app_import_time(env) for _ in range(args.runs)]
+    
+    report = {
+        "runs": args.runs,
+        "app_import_s": statistics.median(t for t in app_import if t is not None),
+        "streamlit_import_s": statistics.median(r["streamlit_import_s"] for r in runs),
+        "first_render_s": statistics.median(r["first_render_s"] for r in runs),
+        "warm_rerun_s": statistics.median(r["warm_rerun_s"] for r in runs),
+        "heavy_loaded_on_login": sorted({m for r in runs for m in r["heavy_loaded"]}),
+        "errors": sorted({e for r in runs for e in r["errors"]}),
+    }
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+URAMix - Export/Import Benchmark
+Streams every transferable table out of a seeded database as CSV and as
+Parquet, then bulk-imports the files into a fresh database. Reports rows/s
+in both directions and checks the round trip: every row back, nothing
+rejected, aggregates consistent, and re-exports byte-identical. Also
+compares peak Python memory of the streaming CSV export with building one
+DataFrame for the largest table.
+
+Usage:
+    python benchmarks/bench_transfer.py --users 100000
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pandas as pd
+
+import seed_data
+
+app = seed_data.app
+
+FORMATS = {"csv": app.read_csv_rows, "parquet": app.read_parquet_rows}
+
+def export_table(table, fmt, path):
+    """Stream one table to a file; returns seconds"""
+    t0 = time.perf_counter()
+    with open(path, "wb") as f:
+        shutil.copyfileobj(app.export_file(table, fmt), f, 1 << 20)
+    return time.perf_counter() - t0
+
+def count_rows(table):
+    """Rows in a table"""
+    return app.fetch_one(f"SELECT COUNT(*) AS n FROM {table}")['n']
+
+def peak_mb(func):
+    """Peak traced Python memory of func() in MB"""
+    tracemalloc.start()
+    try:
+        func()
+        return round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 1)
+    finally:
+        tracemalloc.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming export and batched import throughput")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--submissions-per-user", type=float, default=2.0)
+    args = parser.parse_args()
+    
+    results = {}
+    errors = []
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "source.db")
+        seed_data.seed(source, users=args.users, submissions_per_user=args.submissions_per_user)
+        rows = {table: count_rows(table) for table in app.TRANSFER_TABLES}
+        
+        largest = max(rows, key=rows.get)
+        
+        def stream_csv():
+            for _ in app.export_csv(largest):
+                pass
+        
+        def dataframe_csv():
+            with app.get_db().connection() as conn:
+                pd.read_sql(f"SELECT * FROM {largest}", conn).to_csv(os.path.join(tmp, "frame.csv"), index=False)
+        
+        results["memory"] = {
+            "table": largest,
+            "rows": rows[largest],
+            "streaming_csv_peak_mb": peak_mb(stream_csv),
+            "dataframe_csv_peak_mb": peak_mb(dataframe_csv),
+        }
+        
+        for fmt, reader in FORMATS.items():
+            seed_data.use_database(source)
+            exported = {}
+            export = {}
+            for table in app.TRANSFER_TABLES:
+                path = os.path.join(tmp, f"{table}.{fmt}")
+                seconds = export_table(table, fmt, path)
+                exported[table] = path
+                export[table] = {
+                    "rows_per_s": round(rows[table] / seconds),
+                    "mb": round(os.path.getsize(path) / 1024 / 1024, 1),
+                }
+            
+            seed_data.use_database(os.path.join(tmp, f"import_{fmt}.db"))
+            imported = {}
+            for table, path in exported.items():
+                with open(path, "rb") as f:
+                    source_rows = reader(f)
+                    t0 = time.perf_counter()
+                    report = app.import_rows(table, source_rows)
+                    seconds = time.perf_counter() - t0
+                imported[table] = {"rows_per_s": round(report['rows'] / seconds)}
+                
+                if report['inserted'] != rows[table] or report['rejected'] or report['duplicates']:
+                    errors.append(f"{fmt} {table}: {rows[table]} rows exported, import report {report}")
+                # Per-user history counts are derived, so imported users re-export differently
+                if table != "users":
+                    again = os.path.join(tmp, f"{table}.again.{fmt}")
+                    export_table(table, fmt, again)
+                    with open(path, "rb") as a, open(again, "rb") as b:
+                        if a.read() != b.read():
+                            errors.append(f"{fmt} {table}: re-export differs from the original")
+            
+            with open(exported["daily_waste"], "rb") as f:
+                report = app.import_rows("daily_waste", reader(f))
+            if report['inserted'] or report['duplicates'] != rows["daily_waste"]:
+                errors.append(f"{fmt}: importing a file twice inserted rows again: {report}")
+            
+            mismatches = app.check_aggregates()
+            if mismatches:
+                errors.append(f"{fmt}: aggregates after import: {mismatches}")
+            
+            results[fmt] = {table: {"rows": rows[table], "export": export[table], "import": imported[table]} for table in rows}
+    
+    results["errors"] = errors
+    print(json.dumps(results, indent=2))
+    sys.exit(1 if errors else 0)
+
+if __name__ == "__main__":
+    main()
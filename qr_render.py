@@ -0,0 +1,29 @@
+"""
+URAMix - QR Rendering
+Pure QR encoding helpers, importable by process-pool workers
+"""
+
+import qrcode
+from io import BytesIO
+import base64
+
+def render_qr_png(data):
+    """Render QR code data as a base64 PNG string"""
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=10,
+        border=4,
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+    
+    img = qr.make_image(fill_color="black", back_color="white")
+    
+    buffer = BytesIO()
+    img.save(buffer, format="PNG")
+    return base64.b64encode(buffer.getvalue()).decode()
+
+def render_qr_batch(payloads):
+    """Render a chunk of payloads in one worker call"""
+    return [render_qr_png(data) for data in payloads]
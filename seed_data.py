@@ -0,0 +1,312 @@
+"""
+URAMix - Synthetic Data Seeding & Load Generator
+Fills a database with a repeatable, realistic dataset, or replays live
+traffic against it through the same repository functions the app uses.
+
+Usage:
+    python seed_data.py --db uramix.db --users 1000000
+    python seed_data.py --db uramix.db --users 10000 --submissions-per-user 3 --years 3
+    python seed_data.py --db uramix.db --load 30 --threads 8
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+import app
+
+QUANTITIES = [1.0, 2.5, 5.0, 7.5, 10.0, 15.0]
+# Relative submission volume per hour of day (morning and evening peaks)
+HOUR_WEIGHTS = [1, 1, 1, 1, 2, 5, 9, 10, 8, 6, 5, 4, 4, 4, 4, 5, 6, 8, 9, 7, 5, 3, 2, 1]
+BATCH_SIZE = 50_000
+
+def use_database(path):
+    """Point the app's repository functions at `path`"""
+    app.DB_PATH = path
+    return app.get_db()
+
+def batched(rows, size=BATCH_SIZE):
+    """Yield lists of up to `size` rows"""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def seed(path, users=10_000, submissions_per_user=2.0, pending_ratio=0.2, scanned_ratio=0.85,
+         organic_ratio=0.55, sales_per_user=0.1, years=2, rng_seed=42, end=None):
+    """Fill the database at `path` with synthetic data; returns row counts"""
+    db = use_database(path)
+    rng = random.Random(rng_seed)
+    end = end or datetime(2025, 1, 1)
+    start = end - timedelta(days=365 * years)
+    # Formatting dates is the hot spot at millions of rows, so format each day once
+    days = [(start + timedelta(days=d)).strftime('%Y-%m-%d') for d in range((end - start).days + 3)]
+    n_days = len(days) - 3
+    hours = list(range(24))
+    cum_hours = list(accumulate(HOUR_WEIGHTS))
+    rand = rng.random
+    
+    def email(i):
+        return f"user{i:07d}@example.com"
+    
+    def random_time():
+        """(day index, 'HH:MM:SS') weighted towards busy hours"""
+        hour = rng.choices(hours, cum_weights=cum_hours)[0]
+        second = int(rand() * 3600)
+        return int(rand() * n_days), f"{hour:02d}:{second // 60:02d}:{second % 60:02d}"
+    
+    # Users go through the same code path as signup, sharing one password hash
+    password = app.scrypt_hash("secret1")
+    rates = app.get_credit_rates()
+    for batch in batched(
+        (email(i), password, f"{days[day]} {clock}")
+        for i, (day, clock) in ((i, random_time()) for i in range(users))
+    ):
+        app.create_new_users(batch)
+    
+    n_submissions = int(users * submissions_per_user)
+    n_sales = int(users * sales_per_user)
+    counts = {'users': users, 'submissions': n_submissions, 'qr_codes': 0, 'history': 0, 'manure_sales': n_sales}
+    
+    with db.connection() as conn:
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute("BEGIN")
+        
+        # Bulk load without secondary indexes, then rebuild them once
+        indexes = conn.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL "
+            "AND tbl_name IN ('users', 'waste_submissions', 'waste_history', 'qr_codes', 'manure_sales')"
+        ).fetchall()
+        for name, _ in indexes:
+            conn.execute(f"DROP INDEX {name}")
+        
+        for batch in batched(range(n_submissions)):
+            submissions = []
+            qr_codes = []
+            history = []
+            
+            for i in batch:
+                user = email(int(rand() * users))
+                waste_type = app.WASTE_TYPES[0] if rand() < organic_ratio else app.WASTE_TYPES[1]
+                day, clock = random_time()
+                timestamp = f"{days[day]} {clock}"
+                sub_id = f"seed{i:09d}"
+                
+                if rand() < pending_ratio:
+                    submissions.append((sub_id, user, waste_type, 'pending', timestamp, 0, 0))
+                    continue
+                
+                quantity = QUANTITIES[int(rand() * len(QUANTITIES))]
+                credits, co2 = app.calculate_credits(waste_type, quantity, rates)
+                scanned = rand() < scanned_ratio
+                submissions.append((sub_id, user, waste_type, 'verified', timestamp, credits, quantity))
+                qr_codes.append((sub_id, sub_id, user, waste_type, credits, co2, quantity, int(scanned)))
+                if scanned:
+                    # Redeemed up to two days after submission
+                    history.append((user, days[day + int(rand() * 3)], app.WASTE_TYPES.index(waste_type), quantity, credits, 0))
+            
+            conn.executemany("INSERT INTO waste_submissions VALUES (?, ?, ?, ?, ?, ?, ?)", submissions)
+            conn.executemany("INSERT INTO qr_codes VALUES (?, ?, ?, ?, ?, ?, ?, ?)", qr_codes)
+            conn.executemany(
+                "INSERT INTO waste_history (user, date, type, quantity, credits, status) VALUES (?, ?, ?, ?, ?, ?)",
+                history
+            )
+            counts['qr_codes'] += len(qr_codes)
+            counts['history'] += len(history)
+        
+        price = app.get_setting('manure_price')
+        for batch in batched(range(n_sales)):
+            conn.executemany(
+                "INSERT INTO manure_sales (date, user, quantity, amount) VALUES (?, ?, ?, ?)",
+                [
+                    (days[int(rand() * n_days)], email(int(rand() * users)), q, q * price)
+                    for q in (rng.choice([1.0, 2.5, 5.0, 10.0]) for _ in batch)
+                ]
+            )
+        
+        # Derive per-user and platform state from the activity above
+        # (executescript would commit the open transaction, so run statements one by one)
+        for statement in """
+            INSERT OR REPLACE INTO daily_waste (date, quantity)
+                SELECT date, SUM(quantity) FROM waste_history GROUP BY date;
+            INSERT OR REPLACE INTO waste_series (type, bucket, quantity, credits, count)
+                SELECT type, CAST(strftime('%s', date) AS INTEGER) / 3600, SUM(quantity), SUM(credits), COUNT(*)
+                FROM waste_history GROUP BY type, date;
+            INSERT OR REPLACE INTO manure_daily (date, kg, revenue, orders, buyers)
+                SELECT date, SUM(quantity), SUM(amount), COUNT(*), COUNT(DISTINCT user) FROM manure_sales GROUP BY date;
+            INSERT OR IGNORE INTO manure_daily_buyers (date, user)
+                SELECT DISTINCT date, user FROM manure_sales;
+            
+            CREATE TEMP TABLE seed_activity AS
+                SELECT user,
+                       COUNT(*) AS redeemed,
+                       SUM(credits) AS credits,
+                       SUM(co2_reduction) AS co2,
+                       SUM(waste_type = 'Organic Waste') AS organic,
+                       SUM(waste_type = 'Inorganic Waste') AS inorganic
+                FROM qr_codes WHERE scanned = 1 GROUP BY user;
+            CREATE TEMP TABLE seed_pending AS
+                SELECT user,
+                       SUM(waste_type = 'Organic Waste') AS organic,
+                       SUM(waste_type = 'Inorganic Waste') AS inorganic
+                FROM waste_submissions WHERE status = 'pending' GROUP BY user;
+            CREATE TEMP TABLE seed_purchases AS
+                SELECT user, SUM(quantity) AS kg FROM manure_sales GROUP BY user;
+            
+            UPDATE users SET credits = a.credits, co2_reduced = a.co2, history_count = a.redeemed
+                FROM seed_activity a WHERE a.user = users.email;
+            UPDATE users SET organic_bin = MIN(100, 15 * p.organic), inorganic_bin = MIN(100, 15 * p.inorganic)
+                FROM seed_pending p WHERE p.user = users.email;
+            UPDATE users SET manure_purchased = p.kg
+                FROM seed_purchases p WHERE p.user = users.email;
+            
+            DROP TABLE seed_activity;
+            DROP TABLE seed_pending;
+            DROP TABLE seed_purchases;
+        """.split(";"):
+            conn.execute(statement)
+        
+        # Referral bonus for some users, withdrawals for those over the minimum
+        conn.execute("UPDATE users SET credits = credits + 20, referral_used = 1 WHERE (rowid * 7919) % 10 < 6")
+        conn.execute("UPDATE users SET credits = credits - (credits / 2 / 100) * 100 WHERE credits >= 1000")
+        
+        conn.execute(
+            "UPDATE settings SET value = 500.0 "
+            "+ 0.3 * (SELECT COALESCE(SUM(quantity), 0) FROM waste_history WHERE type = 0) "
+            "- (SELECT COALESCE(SUM(quantity), 0) FROM manure_sales) "
+            "WHERE key = 'manure_stock'"
+        )
+        conn.execute("UPDATE settings SET value = MAX(value, 0) WHERE key = 'manure_stock'")
+        
+        for _, sql in indexes:
+            conn.execute(sql)
+        conn.execute("COMMIT")
+        conn.execute("PRAGMA synchronous=NORMAL")
+    
+    app.check_aggregates(repair=True)
+    
+    with db.transaction() as conn:
+        app.bump_aggregate(conn, 'daily_waste_version', 1)
+        app.bump_aggregate(conn, 'manure_sales_version', 1)
+    
+    return counts
+
+# ============================================
+# LOAD GENERATOR
+# ============================================
+def run_load(path, duration=10.0, threads=4, rng_seed=42):
+    """Replay signup/submit/verify/redeem/withdraw/purchase traffic; returns ops per second"""
+    use_database(path)
+    stop_at = time.perf_counter() + duration
+    totals = {}
+    lock = threading.Lock()
+    
+    def worker(n):
+        rng = random.Random(rng_seed + n)
+        done = {}
+        my_users = []
+        my_pending = []
+        my_codes = []
+        seq = 0
+        
+        while time.perf_counter() < stop_at:
+            seq += 1
+            op = rng.choices(
+                ['signup', 'submit', 'verify', 'redeem', 'withdraw', 'purchase'],
+                [1, 6, 4, 4, 1, 1]
+            )[0]
+            
+            if op == 'signup' or not my_users:
+                op = 'signup'
+                user = f"load{n:03d}-{seq:08d}@example.com"
+                app.create_new_user(user, "secret1")
+                my_users.append(user)
+            elif op == 'submit':
+                sub = {
+                    'id': app.new_submission_id(),
+                    'user': rng.choice(my_users),
+                    'waste_type': rng.choice(app.WASTE_TYPES),
+                    'status': 'pending',
+                    'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                    'credits': 0,
+                    'quantity': 0
+                }
+                app.add_submission(sub)
+                my_pending.append(sub)
+            elif op == 'verify' and my_pending:
+                sub = my_pending.pop(rng.randrange(len(my_pending)))
+                quantity = rng.choice(QUANTITIES)
+                credits, co2 = app.calculate_credits(sub['waste_type'], quantity)
+                code = app.qr_token(sub['id'])
+                app.verify_submission(sub, code, quantity, credits, co2)
+                my_codes.append(code)
+            elif op == 'redeem' and my_codes:
+                app.redeem_qr_code(my_codes.pop(rng.randrange(len(my_codes))))
+            elif op == 'withdraw':
+                app.withdraw_credits(rng.choice(my_users), 500)
+            elif op == 'purchase':
+                app.purchase_manure(rng.choice(my_users), 1.0, 1.0 * app.get_setting('manure_price'))
+            else:
+                continue
+            
+            done[op] = done.get(op, 0) + 1
+        
+        with lock:
+            for op, count in done.items():
+                totals[op] = totals.get(op, 0) + count
+    
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    t0 = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    
+    rates = {op: round(count / elapsed, 1) for op, count in sorted(totals.items())}
+    rates['total'] = round(sum(totals.values()) / elapsed, 1)
+    return rates
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=os.environ.get("URAMIX_DB_PATH", "uramix.db"))
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--submissions-per-user", type=float, default=2.0)
+    parser.add_argument("--pending-ratio", type=float, default=0.2)
+    parser.add_argument("--scanned-ratio", type=float, default=0.85)
+    parser.add_argument("--sales-per-user", type=float, default=0.1)
+    parser.add_argument("--years", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--load", type=float, metavar="SECONDS", help="run the load generator instead of seeding")
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+    
+    t0 = time.perf_counter()
+    if args.load:
+        result = run_load(args.db, args.load, args.threads, args.seed)
+    else:
+        result = seed(
+            args.db,
+            users=args.users,
+            submissions_per_user=args.submissions_per_user,
+            pending_ratio=args.pending_ratio,
+            scanned_ratio=args.scanned_ratio,
+            sales_per_user=args.sales_per_user,
+            years=args.years,
+            rng_seed=args.seed
+        )
+    
+    print(json.dumps(dict(result, elapsed_s=round(time.perf_counter() - t0, 2)), indent=2))
+
+if __name__ == "__main__":
+    sys.exit(main())